@@ -0,0 +1 @@
+"""Performance benchmarks for the HTML Clip Maker pipeline."""
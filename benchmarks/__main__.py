@@ -0,0 +1,246 @@
+"""
+Benchmark command line.
+
+Usage:
+    python -m benchmarks run --sizes 1K,100K,1M --output results.json
+    python -m benchmarks run --backends builtin,python-markdown
+    python -m benchmarks compare baseline.json results.json --threshold 0.1
+    python -m benchmarks escape --sizes 100K,1M
+    python -m benchmarks legacy --sizes 10K,100K --show-diff 20
+    python -m benchmarks corpus mixed 10M --output sample.txt
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from modules.backends import BACKENDS, DEFAULT_BACKEND
+
+from .corpus import KINDS, generate, parse_size
+
+DEFAULT_SIZES = '1K,10K,100K,1M'
+
+
+def parse_arguments(argv):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the HTML Clip Maker pipeline stage by stage'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmark matrix')
+    run_parser.add_argument(
+        '--kinds',
+        help=f'Comma-separated corpus kinds (default: all of {",".join(KINDS)})',
+        default=','.join(KINDS)
+    )
+    run_parser.add_argument(
+        '--sizes',
+        help=f'Comma-separated document sizes, 1K to 100M (default: {DEFAULT_SIZES})',
+        default=DEFAULT_SIZES
+    )
+    run_parser.add_argument(
+        '--backends',
+        help=f'Comma-separated markdown backends run side by side '
+             f'(default: {DEFAULT_BACKEND}; available: {",".join(BACKENDS)})',
+        default=DEFAULT_BACKEND
+    )
+    run_parser.add_argument(
+        '--repeat',
+        help='Timed runs per stage (default: 5)',
+        type=int,
+        default=5
+    )
+    run_parser.add_argument(
+        '--seed',
+        help='Corpus seed (default: 0)',
+        type=int,
+        default=0
+    )
+    run_parser.add_argument(
+        '--output',
+        help='Write JSON results to this file instead of stdout',
+        type=Path,
+        default=None
+    )
+
+    compare_parser = commands.add_parser(
+        'compare', help='Flag regressions between two result files')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.add_argument(
+        '--threshold',
+        help='Relative slowdown counted as a regression (default: 0.10)',
+        type=float,
+        default=0.10
+    )
+    compare_parser.add_argument(
+        '--metric',
+        help='Statistic to compare (default: min)',
+        choices=['min', 'median', 'mean'],
+        default='min'
+    )
+
+    escape_parser = commands.add_parser(
+        'escape', help='Compare HTML escaping strategies with html.escape')
+    escape_parser.add_argument(
+        '--kinds',
+        help=f'Comma-separated corpus kinds (default: all of {",".join(KINDS)})',
+        default=','.join(KINDS)
+    )
+    escape_parser.add_argument(
+        '--sizes',
+        help='Comma-separated document sizes (default: 100K,1M)',
+        default='100K,1M'
+    )
+    escape_parser.add_argument('--repeat', type=int, default=5)
+    escape_parser.add_argument('--seed', type=int, default=0)
+
+    legacy_parser = commands.add_parser(
+        'legacy',
+        help='Diff outputs, speed and memory against Source/make_html_clip')
+    legacy_parser.add_argument(
+        '--kinds',
+        help=f'Comma-separated corpus kinds (default: all of {",".join(KINDS)})',
+        default=','.join(KINDS)
+    )
+    legacy_parser.add_argument(
+        '--sizes',
+        help='Comma-separated document sizes (default: 10K,100K)',
+        default='10K,100K'
+    )
+    legacy_parser.add_argument(
+        '--repeat',
+        help='Runs per implementation and document; the best time is '
+             'reported (default: 3)',
+        type=int,
+        default=3
+    )
+    legacy_parser.add_argument('--seed', type=int, default=0)
+    legacy_parser.add_argument(
+        '--show-diff',
+        help='Print up to this many lines of each structural diff (default: 0)',
+        type=int,
+        default=0,
+        metavar='LINES'
+    )
+    legacy_parser.add_argument(
+        '--output',
+        help='Also write the JSON results, with full diffs, to this file',
+        type=Path,
+        default=None
+    )
+
+    corpus_parser = commands.add_parser(
+        'corpus', help='Write a synthetic document')
+    corpus_parser.add_argument('kind', choices=KINDS)
+    corpus_parser.add_argument('size', help='Document size, e.g. 10K or 100M')
+    corpus_parser.add_argument('--seed', type=int, default=0)
+    corpus_parser.add_argument('--output', type=Path, default=None)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Benchmark command line entry point."""
+    args = parse_arguments(sys.argv[1:] if argv is None else argv)
+
+    if args.command == 'corpus':
+        text = generate(args.kind, parse_size(args.size), args.seed)
+        if args.output:
+            args.output.write_text(text, encoding='utf-8')
+        else:
+            sys.stdout.write(text)
+        return 0
+
+    if args.command == 'legacy':
+        return legacy_main(args)
+
+    from .runner import bench_escape, compare, load_results, run, save_results
+
+    if args.command == 'escape':
+        results = bench_escape(
+            kinds=args.kinds.split(','),
+            sizes=[parse_size(size) for size in args.sizes.split(',')],
+            repeat=args.repeat,
+            seed=args.seed
+        )
+        print(f"{'kind':<8} {'size':>6} {'escaper':<12} {'time':>10} {'MB/s':>8}")
+        for row in results:
+            print(f"{row['kind']:<8} {row['size']:>6} {row['escaper']:<12} "
+                  f"{row['min'] * 1000:>8.2f}ms {row['mb_per_s']:>8.1f}")
+        return 0
+
+    if args.command == 'run':
+        results = run(
+            kinds=args.kinds.split(','),
+            sizes=[parse_size(size) for size in args.sizes.split(',')],
+            repeat=args.repeat,
+            seed=args.seed,
+            backends=args.backends.split(','),
+            progress=lambda label: print(f"benchmarking {label}...",
+                                         file=sys.stderr)
+        )
+        if args.output:
+            save_results(results, args.output)
+        else:
+            print(json.dumps(results, indent=2))
+        return 0
+
+    comparison = compare(load_results(args.baseline),
+                         load_results(args.current),
+                         args.threshold, args.metric)
+    regressions = 0
+    print(f"{'backend':<16}{'kind':<8} {'size':>6} {'stage':<11} {'baseline':>10} "
+          f"{'current':>10} {'ratio':>7}")
+    for row in comparison:
+        flag = '  REGRESSION' if row['regression'] else ''
+        regressions += row['regression']
+        print(f"{row['backend']:<16}{row['kind']:<8} {row['size']:>6} {row['stage']:<11} "
+              f"{row['baseline'] * 1000:>8.2f}ms {row['current'] * 1000:>8.2f}ms "
+              f"{row['ratio']:>7.2f}{flag}")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def legacy_main(args) -> int:
+    """Report the legacy comparison; non-zero unless every document matched."""
+    from .legacy import run_legacy
+
+    results = run_legacy(
+        kinds=args.kinds.split(','),
+        sizes=[parse_size(size) for size in args.sizes.split(',')],
+        repeat=args.repeat,
+        seed=args.seed
+    )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    print(f"{'kind':<8} {'size':>6} {'impl':<7} {'time':>10} {'MB/s':>8} "
+          f"{'peak RSS':>10}  result")
+    differing = 0
+    for row in results:
+        differing += not row['equivalent']
+        for name in ('legacy', 'python'):
+            run = row[name]
+            status = ('exit %d' % run['returncode'] if run['returncode']
+                      else 'same' if row['equivalent']
+                      else f"{row['only_' + name]} tokens only here")
+            print(f"{row['kind']:<8} {row['size']:>6} {name:<7} "
+                  f"{run['seconds'] * 1000:>8.1f}ms {run['mb_per_s']:>8.2f} "
+                  f"{run['max_rss_kb'] / 1024:>8.1f}MB  {status}")
+        if args.show_diff and not row['equivalent']:
+            print(f"    first difference at token {row['first_difference']}:")
+            for line in row['diff'][:args.show_diff]:
+                print(f"    {line}")
+    if results:
+        print(f"peak RSS includes {results[0]['rss_floor_kb'] / 1024:.1f}MB "
+              f"of the measuring launcher")
+    print(f"{differing} of {len(results)} document(s) differ in structure")
+    return 1 if differing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
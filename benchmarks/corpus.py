@@ -0,0 +1,192 @@
+"""Seeded synthetic corpus generator.
+
+Documents are assembled from the same kinds of blocks exercised by
+``Source/testfile.txt``: prose, headers, nested lists, blockquotes, fenced
+code, inline math and ``$$``/``\\[`` display math (including indented math
+inside list items and blockquotes). The same kind, size and seed always
+produce the same document.
+"""
+
+import random
+from typing import Callable, Dict, List
+
+KINDS = ('prose', 'list', 'code', 'math', 'mixed')
+
+WORDS = (
+    'the of and to in is that for it as with was on be by this are from '
+    'at or an which have not has but were all can more one their also '
+    'function value matrix equation vector series limit integral proof '
+    'theorem result document clipboard format render output section '
+    'example input process method system formula structure element'
+).split()
+
+INLINE_MATH = [
+    r'$x = \frac{-b \pm \sqrt{b^2-4ac}}{2a}$',
+    r'$E=mc^2$',
+    r'$\pi r^2$',
+    r'$\sum_{i=1}^n i$',
+    r'$\int f(x)dx$',
+    r'$\frac{1}{2}$',
+    r'$a_{ij}$',
+]
+
+DISPLAY_MATH = [
+    [r'f(x) = ax^2 + bx + c'],
+    [r'\begin{bmatrix}', r'    a & b & c \\', r'    d & e & f \\',
+     r'    g & h & i', r'\end{bmatrix}'],
+    [r'\begin{align}', r'    x &= a + b \\', r'    y &= c + d \\',
+     r'    z &= e + f', r'\end{align}'],
+    [r'\int_{-\infty}^{\infty} e^{-x^2} dx = \sqrt{\pi}'],
+    [r'\begin{cases}', r'    x + y + z = 1 \\', r'    2x - y + z = 3',
+     r'\end{cases}'],
+    [r'\lim_{x \to 0} \frac{\sin x}{x} = 1'],
+]
+
+CODE_LINES = [
+    'def {name}(radius):',
+    '    """Calculate {name} area"""',
+    '    return math.pi * radius ** 2',
+    'for i in range({n}):',
+    '    total += values[i] * weights[i]',
+    'if total > {n}:',
+    '    raise ValueError("overflow in {name}")',
+    'result = {{"key": {n}, "items": [1, 2, 3]}}',
+]
+
+LANGUAGES = ['python', 'javascript', 'bash', '']
+
+# Relative weights of block generators for each document kind
+WEIGHTS = {
+    'prose': {'paragraph': 8, 'header': 1},
+    'list': {'list': 8, 'header': 1, 'paragraph': 1},
+    'code': {'code': 8, 'header': 1, 'paragraph': 1},
+    'math': {'display_math': 4, 'inline_math': 4, 'header': 1,
+             'paragraph': 1},
+    'mixed': {'paragraph': 3, 'header': 1, 'list': 2, 'blockquote': 1,
+              'code': 1, 'inline_math': 2, 'display_math': 2,
+              'formatting': 1},
+}
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as '1K', '10M' or '2048' into bytes."""
+    size = size.strip().upper()
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if size and size[-1] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+
+def format_size(size: int) -> str:
+    """Format a byte count as the shortest of '1K', '10M' or '2048'."""
+    for suffix, multiplier in (('M', 1024 ** 2), ('K', 1024)):
+        if size >= multiplier and size % multiplier == 0:
+            return f"{size // multiplier}{suffix}"
+    return str(size)
+
+
+class CorpusGenerator:
+    """Generates synthetic markdown/math documents."""
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self._blocks: Dict[str, Callable[[], List[str]]] = {
+            'paragraph': self._paragraph,
+            'header': self._header,
+            'list': self._list,
+            'blockquote': self._blockquote,
+            'code': self._code,
+            'inline_math': self._inline_math,
+            'display_math': self._display_math,
+            'formatting': self._formatting,
+        }
+
+    def generate(self, kind: str, size: int) -> str:
+        """Generate a document of the given kind of roughly ``size`` bytes."""
+        if kind not in WEIGHTS:
+            raise ValueError(f"Unknown corpus kind: {kind}")
+        self.random.seed(f"{self.seed}:{kind}:{size}")
+
+        names = list(WEIGHTS[kind])
+        weights = [WEIGHTS[kind][name] for name in names]
+
+        lines = [f"# Synthetic {kind} document ({format_size(size)})", '']
+        total = len(lines[0]) + 2
+        while total < size:
+            name = self.random.choices(names, weights)[0]
+            for line in self._blocks[name]() + ['']:
+                lines.append(line)
+                total += len(line.encode('utf-8')) + 1
+        return '\n'.join(lines)
+
+    def _words(self, low: int, high: int) -> str:
+        count = self.random.randint(low, high)
+        return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def _sentence(self) -> str:
+        sentence = self._words(6, 16)
+        return sentence[0].upper() + sentence[1:] + '.'
+
+    def _paragraph(self) -> List[str]:
+        return [' '.join(self._sentence()
+                         for _ in range(self.random.randint(2, 6)))]
+
+    def _header(self) -> List[str]:
+        level = self.random.randint(2, 4)
+        return ['#' * level + ' ' + self._words(2, 5).title()]
+
+    def _list(self) -> List[str]:
+        ordered = self.random.random() < 0.4
+        lines = []
+        for i in range(self.random.randint(2, 6)):
+            marker = f"{i + 1}." if ordered else '-'
+            lines.append(f"{marker} {self._words(3, 10)}")
+            for j in range(self.random.choice([0, 0, 1, 2])):
+                sub_marker = f"{j + 1}." if ordered else '-'
+                lines.append(f"   {sub_marker} Nested {self._words(2, 6)}")
+        return lines
+
+    def _blockquote(self) -> List[str]:
+        lines = [f"> {self._sentence()}" for _ in range(self.random.randint(1, 3))]
+        if self.random.random() < 0.3:
+            lines += ['> $$'] + [f"> {line}" for line in
+                                  self.random.choice(DISPLAY_MATH)] + ['> $$']
+        return lines
+
+    def _code(self) -> List[str]:
+        language = self.random.choice(LANGUAGES)
+        name = self.random.choice(WORDS)
+        body = [self.random.choice(CODE_LINES).format(
+                    name=name, n=self.random.randint(1, 1000))
+                for _ in range(self.random.randint(3, 15))]
+        return [f"```{language}"] + body + ['```']
+
+    def _inline_math(self) -> List[str]:
+        parts = []
+        for _ in range(self.random.randint(1, 3)):
+            parts.append(self._sentence())
+            parts.append(self.random.choice(INLINE_MATH))
+        return [' '.join(parts)]
+
+    def _display_math(self) -> List[str]:
+        body = self.random.choice(DISPLAY_MATH)
+        opening, closing = self.random.choice([('$$', '$$'), ('\\[', '\\]')])
+        if self.random.random() < 0.3:
+            # Math inside a list item, indented like the item text
+            indent = '   '
+            return ([f"1. {self._words(2, 5)}:", indent + opening] +
+                    [indent + line for line in body] + [indent + closing])
+        return [f"{self._words(2, 4).capitalize()}:", opening] + body + [closing]
+
+    def _formatting(self) -> List[str]:
+        words = [self._words(1, 3) for _ in range(5)]
+        return [
+            f"**{words[0]}** and *{words[1]}* with `{words[2]}`",
+            f"***{words[3]}*** ~~{words[4]}~~ [link](https://example.com/{words[0].split()[0]})",
+        ]
+
+
+def generate(kind: str, size: int, seed: int = 0) -> str:
+    """Generate a document of the given kind and size."""
+    return CorpusGenerator(seed).generate(kind, size)
@@ -0,0 +1,301 @@
+"""Differential comparison with the legacy bash/awk script.
+
+``Source/make_html_clip`` reads the clipboard with xclip or wl-paste and
+writes ``<name>.html`` into the working directory. Each run here happens in
+a scratch directory whose ``xclip`` and ``wl-paste`` print a corpus file, so
+the script and ``main.py`` convert the same text without touching the
+real clipboard or the repository. Both run as child processes, timed end
+to end, with peak memory from ``wait4``.
+
+A process's peak RSS includes the image it was forked from, so children
+of this (large) process would all report its size. Commands are started
+by a small launcher instead, whose own size is the floor of every peak
+reported (``Sandbox.floor_kb``).
+
+Outputs are compared by structure, not bytes: the page title, then the
+elements, link targets and text inside ``<div id="content">``. Attributes
+that only style the page (classes, ids) and whitespace are dropped.
+"""
+
+import difflib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .corpus import CorpusGenerator, format_size
+
+ROOT = Path(__file__).resolve().parent.parent
+LEGACY_SCRIPT = ROOT / 'Source' / 'make_html_clip'
+MAIN_SCRIPT = ROOT / 'main.py'
+
+# Attributes that change what a page means rather than how it looks
+KEPT_ATTRIBUTES = ('href', 'src', 'start')
+
+# Tokens after the first difference that go into the reported diff; a full
+# difflib diff of two large, differing documents takes minutes
+DIFF_WINDOW = 400
+
+# Prints the sandbox's clipboard; installed as both xclip and wl-paste
+_CLIPBOARD_STUB = '#!/bin/sh\nexec cat "$CLIP_FILE"\n'
+
+# Runs argv[2:], writes "<seconds> <peak RSS in KiB>" to argv[1] and exits
+# with the command's status
+_LAUNCHER = """\
+import os, sys, time
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    try:
+        os.execvp(sys.argv[2], sys.argv[2:])
+    finally:
+        os._exit(127)
+_, status, usage = os.wait4(pid, 0)
+with open(sys.argv[1], 'w') as f:
+    f.write(f"{time.perf_counter() - start} {usage.ru_maxrss}")
+sys.exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 128)
+"""
+
+
+def legacy_available() -> bool:
+    """Check for the legacy script and the tools it runs."""
+    return LEGACY_SCRIPT.exists() and all(
+        shutil.which(tool) for tool in ('bash', 'awk', 'sed'))
+
+
+class _StructureParser(HTMLParser):
+    """Collects the title and the content's elements and text as lines."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.tokens: List[str] = []
+        self._in_title = False
+        # Depth of open elements inside the content div, or None outside it
+        self._depth: Optional[int] = None
+        self._text: List[str] = []
+
+    def _flush(self) -> None:
+        text = ' '.join(''.join(self._text).split())
+        if text:
+            self.tokens.append(f"text: {text}")
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self._in_title = True
+        elif self._depth is None:
+            if tag == 'div' and ('id', 'content') in attrs:
+                self._depth = 0
+        else:
+            self._flush()
+            kept = ''.join(f' {name}="{value}"' for name, value in sorted(attrs)
+                           if name in KEPT_ATTRIBUTES)
+            self.tokens.append(f"<{tag}{kept}>")
+            if tag not in ('br', 'hr', 'img', 'wbr'):
+                self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif self._depth is not None:
+            self._flush()
+            if self._depth == 0:
+                self._depth = None
+            else:
+                self.tokens.append(f"</{tag}>")
+                self._depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._depth is not None:
+            self._text.append(data)
+
+
+def normalize(html: str) -> List[str]:
+    """Reduce a page to lines describing its title and content structure."""
+    parser = _StructureParser()
+    parser.feed(html)
+    parser.close()
+    return [f"title: {' '.join(parser.title.split())}"] + parser.tokens
+
+
+def structural_diff(legacy: List[str], python: List[str],
+                    context: int = 1) -> Dict:
+    """
+    Compare two normalized pages.
+
+    Returns:
+        dict: ``first_difference`` (token index, or None if equal), the
+        number of tokens found only in each page, and a unified ``diff``
+        of the ``DIFF_WINDOW`` tokens from the first difference on
+    """
+    start = next((i for i, (a, b) in enumerate(zip(legacy, python)) if a != b),
+                 min(len(legacy), len(python)))
+    if start == len(legacy) == len(python):
+        return {'first_difference': None, 'only_legacy': 0, 'only_python': 0,
+                'diff': []}
+
+    begin = max(0, start - context)
+    end = start + DIFF_WINDOW
+    legacy_counts, python_counts = Counter(legacy), Counter(python)
+    return {
+        'first_difference': start,
+        'only_legacy': sum((legacy_counts - python_counts).values()),
+        'only_python': sum((python_counts - legacy_counts).values()),
+        'diff': list(difflib.unified_diff(
+            legacy[begin:end], python[begin:end], 'legacy', 'python',
+            n=context, lineterm='')),
+    }
+
+
+@dataclass
+class RunResult:
+    """One conversion by one implementation."""
+    html: Optional[str]
+    seconds: float
+    max_rss_kb: int
+    returncode: int
+    stderr: str
+
+
+class Sandbox:
+    """A scratch directory with a stubbed clipboard for conversions."""
+
+    def __init__(self):
+        self.root = Path(tempfile.mkdtemp(prefix='legacy-bench-'))
+        self.bin = self.root / 'bin'
+        self.work = self.root / 'work'
+        self.clip_file = self.root / 'clipboard.txt'
+        for directory in (self.bin, self.work, self.root / 'tmp'):
+            directory.mkdir()
+        for name in ('xclip', 'wl-paste'):
+            stub = self.bin / name
+            stub.write_text(_CLIPBOARD_STUB)
+            stub.chmod(0o755)
+        self.env = dict(
+            os.environ,
+            PATH=f"{self.bin}{os.pathsep}{os.environ.get('PATH', '')}",
+            XDG_SESSION_TYPE='x11',
+            CLIP_FILE=str(self.clip_file),
+            TMPDIR=str(self.root / 'tmp'),
+        )
+        self._floor_kb: Optional[int] = None
+
+    def __enter__(self) -> 'Sandbox':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _launch(self, command: Sequence[str]):
+        """Run a command through the launcher; return (seconds, peak RSS
+        in KiB, exit status, stderr)."""
+        measurement = self.root / 'measurement'
+        with open(self.root / 'stderr', 'w+') as stderr:
+            returncode = subprocess.call(
+                [sys.executable, '-S', '-c', _LAUNCHER, str(measurement),
+                 *command],
+                cwd=self.work, env=self.env, stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=stderr)
+            stderr.seek(0)
+            errors = stderr.read()
+        seconds, max_rss_kb = measurement.read_text().split()
+        return float(seconds), int(max_rss_kb), returncode, errors
+
+    @property
+    def floor_kb(self) -> int:
+        """Peak RSS reported for a command that allocates nothing."""
+        if self._floor_kb is None:
+            self._floor_kb = self._launch(['true'])[1]
+        return self._floor_kb
+
+    def run(self, command: Sequence[str], text: str,
+            name: str = 'clip') -> RunResult:
+        """Put ``text`` on the clipboard and run ``command name``."""
+        self.clip_file.write_text(text, encoding='utf-8')
+        output = self.work / f"{name}.html"
+        if output.exists():
+            output.unlink()
+
+        seconds, max_rss_kb, returncode, errors = self._launch([*command, name])
+        html = output.read_text(encoding='utf-8') if output.exists() else None
+        return RunResult(html, seconds, max_rss_kb, returncode, errors)
+
+
+IMPLEMENTATIONS = {
+    'legacy': ['bash', str(LEGACY_SCRIPT)],
+    'python': [sys.executable, str(MAIN_SCRIPT)],
+}
+
+
+def _best(sandbox: Sandbox, command: Sequence[str], text: str,
+          repeat: int) -> RunResult:
+    """Run ``repeat`` times; keep the last output, the best time and the
+    highest peak memory."""
+    runs = [sandbox.run(command, text) for _ in range(repeat)]
+    last = runs[-1]
+    returncode = next((run.returncode for run in runs if run.returncode), 0)
+    return RunResult(last.html, min(run.seconds for run in runs),
+                     max(run.max_rss_kb for run in runs), returncode,
+                     last.stderr)
+
+
+def compare_document(sandbox: Sandbox, text: str, repeat: int = 3,
+                     context: int = 1) -> Dict:
+    """
+    Convert one document with both implementations and compare them.
+
+    Returns:
+        dict: Timing, peak memory and exit status per implementation, and
+        the structural_diff of the outputs
+    """
+    nbytes = len(text.encode('utf-8'))
+    result = {'bytes': nbytes, 'rss_floor_kb': sandbox.floor_kb}
+    structures = {}
+    for name, command in IMPLEMENTATIONS.items():
+        run = _best(sandbox, command, text, repeat)
+        result[name] = {
+            'seconds': run.seconds,
+            'mb_per_s': nbytes / run.seconds / 1e6 if run.seconds else None,
+            'max_rss_kb': run.max_rss_kb,
+            'returncode': run.returncode,
+        }
+        if run.returncode != 0 or run.html is None:
+            result[name]['error'] = run.stderr.strip()[-500:]
+        structures[name] = normalize(run.html) if run.html is not None else []
+
+    result.update(structural_diff(structures['legacy'], structures['python'],
+                                  context))
+    result['equivalent'] = (result['first_difference'] is None and all(
+        result[name]['returncode'] == 0 for name in IMPLEMENTATIONS))
+    return result
+
+
+def run_legacy(kinds: Sequence[str], sizes: Sequence[int], repeat: int = 3,
+               seed: int = 0, context: int = 1) -> List[Dict]:
+    """
+    Compare the implementations on every (kind, size) corpus document.
+
+    Returns:
+        list: compare_document results, tagged with kind and size
+    """
+    if not legacy_available():
+        raise RuntimeError(f"Needs {LEGACY_SCRIPT} and bash, awk and sed")
+    generator = CorpusGenerator(seed)
+    results = []
+    with Sandbox() as sandbox:
+        for kind in kinds:
+            for size in sizes:
+                text = generator.generate(kind, size)
+                result = compare_document(sandbox, text, repeat, context)
+                results.append({'kind': kind, 'size': format_size(size),
+                                **result})
+    return results
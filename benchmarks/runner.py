@@ -0,0 +1,211 @@
+"""Per-stage pipeline timing and result comparison."""
+
+import gc
+import html
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from main import HTMLClipMaker
+from modules.backends import DEFAULT_BACKEND
+from modules.config import DEFAULT_FONTS, VERSION
+from modules.escape import escape_text
+from modules.html_generator import HTMLTemplate
+
+from .corpus import CorpusGenerator, format_size
+
+STAGES = ('math', 'markdown', 'wrap', 'generate', 'save', 'end_to_end')
+
+_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Escaping strategies compared by bench_escape; the first is the pipeline's
+ESCAPERS = {
+    'escape_text': escape_text,
+    'html.escape': lambda text: html.escape(text, quote=False),
+    'translate': lambda text: text.translate(_ESCAPE_TABLE),
+}
+
+
+def time_call(func: Callable, repeat: int) -> List[float]:
+    """Call func ``repeat`` times and return the wall time of each call."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_document(app: HTMLClipMaker, text: str, repeat: int,
+                   output_dir: Path) -> Dict[str, List[float]]:
+    """Time each pipeline stage, and the whole pipeline, on one document."""
+    lines = text.strip().split('\n')
+    title, content_lines = lines[0].lstrip('#').strip(), lines[1:]
+
+    # Each stage is fed the output of the previous one, as in process_content
+    math_lines = app.math.process_math_blocks(content_lines)
+    math_text = '\n'.join(math_lines)
+    markdown_html = app.markdown.process(math_text)
+    wrapped = app.html_gen.wrap_content(markdown_html)
+    template_data = HTMLTemplate(title=title, content=wrapped,
+                                 version=VERSION, fonts=DEFAULT_FONTS)
+    html = app.html_gen.generate(template_data)
+    output_path = output_dir / 'bench.html'
+
+    def end_to_end():
+        app.save_output(app.render(text), output_path)
+
+    return {
+        'math': time_call(lambda: app.math.process_math_blocks(content_lines), repeat),
+        'markdown': time_call(lambda: app.markdown.process(math_text), repeat),
+        'wrap': time_call(lambda: app.html_gen.wrap_content(markdown_html), repeat),
+        'generate': time_call(lambda: app.html_gen.generate(template_data), repeat),
+        'save': time_call(lambda: app.html_gen.save(html, output_path), repeat),
+        'end_to_end': time_call(end_to_end, repeat),
+    }
+
+
+def run(kinds: Sequence[str], sizes: Sequence[int], repeat: int = 5,
+        seed: int = 0, progress: Optional[Callable[[str], None]] = None,
+        backends: Sequence[str] = (DEFAULT_BACKEND,)) -> Dict:
+    """
+    Run the benchmark matrix and return machine-readable results.
+
+    Every markdown backend runs on the same documents, so their rows can
+    be compared side by side.
+
+    Returns:
+        dict: Environment metadata and one result entry per
+        (backend, kind, size, stage) with min/median/mean seconds and
+        throughput.
+    """
+    import logging
+
+    # Keep save_output's per-call log lines out of the timings
+    logging.getLogger('main').setLevel(logging.WARNING)
+
+    apps = {backend: HTMLClipMaker(backend=backend) for backend in backends}
+    generator = CorpusGenerator(seed)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in kinds:
+            for size in sizes:
+                text = generator.generate(kind, size)
+                nbytes = len(text.encode('utf-8'))
+                for backend, app in apps.items():
+                    if progress:
+                        progress(f"{backend} {kind} {format_size(size)}")
+                    timings = bench_document(app, text, repeat, Path(tmp))
+                    results.extend(_summarize(timings, backend, kind, size,
+                                              nbytes, repeat))
+
+    return {
+        'version': VERSION,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def bench_escape(kinds: Sequence[str], sizes: Sequence[int], repeat: int = 5,
+                 seed: int = 0) -> List[Dict]:
+    """
+    Time each escaping strategy over the lines of corpus documents, as the
+    markdown stage escapes them.
+
+    Returns:
+        list: One entry per (kind, size, escaper) with the best time and
+        throughput.
+    """
+    generator = CorpusGenerator(seed)
+    results = []
+    for kind in kinds:
+        for size in sizes:
+            lines = generator.generate(kind, size).split('\n')
+            nbytes = sum(len(line.encode('utf-8')) for line in lines)
+            for name, escape in ESCAPERS.items():
+                best = min(time_call(lambda: [escape(line) for line in lines],
+                                     repeat))
+                results.append({
+                    'kind': kind,
+                    'size': format_size(size),
+                    'escaper': name,
+                    'min': best,
+                    'mb_per_s': nbytes / best / 1e6 if best else None,
+                })
+    return results
+
+
+def _summarize(timings: Dict[str, List[float]], backend: str, kind: str,
+               size: int, nbytes: int, repeat: int) -> List[Dict]:
+    results = []
+    for stage in STAGES:
+        samples = timings[stage]
+        best = min(samples)
+        results.append({
+            'backend': backend,
+            'kind': kind,
+            'size': format_size(size),
+            'bytes': nbytes,
+            'stage': stage,
+            'min': best,
+            'median': statistics.median(samples),
+            'mean': statistics.fmean(samples),
+            'repeat': repeat,
+            'mb_per_s': nbytes / best / 1e6 if best else None,
+        })
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10,
+            metric: str = 'min') -> List[Dict]:
+    """
+    Compare two result sets.
+
+    Returns:
+        list: One entry per (backend, kind, size, stage) present in both
+        sets, with the ratio of current to baseline time and a regression
+        flag when the ratio exceeds ``1 + threshold``.
+    """
+    def key(result):
+        # Results from before backends were benchmarked are builtin ones
+        return (result.get('backend', DEFAULT_BACKEND), result['kind'],
+                result['size'], result['stage'])
+
+    baseline_results = {key(r): r for r in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        base = baseline_results.get(key(result))
+        if base is None or not base[metric]:
+            continue
+        ratio = result[metric] / base[metric]
+        comparison.append({
+            'backend': key(result)[0],
+            'kind': result['kind'],
+            'size': result['size'],
+            'stage': result['stage'],
+            'baseline': base[metric],
+            'current': result[metric],
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold,
+        })
+    return comparison
+
+
+def load_results(path: Path) -> Dict:
+    """Load a results file written by ``save_results``."""
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def save_results(results: Dict, path: Path) -> None:
+    """Write results as JSON."""
+    Path(path).write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
@@ -4,18 +4,22 @@ HTML Clip Maker - Main Program
 Converts clipboard content with markdown and math notation to styled HTML
 """
 
+# Startup time is user-visible latency (the tool usually runs from a
+# hotkey), so only what every invocation needs is imported here. Argument
+# parsing, processors and rarely used commands import on first use; see
+# tests/test_startup.py for the budget.
 import sys
-import argparse
-from pathlib import Path
-from typing import Optional, Dict
+import time
 import logging
-from datetime import datetime
+from contextlib import contextmanager
+from functools import cached_property
+from itertools import chain
+from pathlib import Path
+from typing import Optional, Dict, Iterable, Sequence, TextIO
 
-from modules.clipboard import ClipboardManager
-from modules.markdown import MarkdownProcessor
-from modules.math_processor import MathProcessor
-from modules.html_generator import HTMLGenerator, HTMLTemplate
-from modules.config import VERSION, DEFAULT_FONTS
+from modules.config import VERSION, DEFAULT_FONTS, TEMPLATES
+from modules.instrumentation import NULL_MEMORY, NULL_METRICS
+from modules.tracing import NULL_TRACER
 
 # Configure logging
 logging.basicConfig(
@@ -26,13 +30,93 @@ logger = logging.getLogger(__name__)
 
 
 class HTMLClipMaker:
-    """Main application class for HTML Clip Maker."""
+    """Main application class for HTML Clip Maker.
+
+    Processors are constructed on first use, so paths that fail early (an
+    empty clipboard, ``--help``) never pay for them.
+    """
+
+    def __init__(self, tracer=None, metrics=None, memory=None,
+                 timestamp: Optional[str] = None, backend: str = 'builtin',
+                 template: str = 'default', targets: Sequence[str] = ('page',)):
+        """
+        Args:
+            timestamp: Fixed generation time for reproducible output; saves
+                then leave files whose content is unchanged untouched
+            backend: Markdown backend, 'builtin' or 'python-markdown'
+            template: Page template, 'default' or 'fast' (third-party
+                resources kept off the critical rendering path)
+            targets: Outputs ``render_targets`` produces: 'page',
+                'fragment' and/or 'json'
+        """
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.memory = memory if memory is not None else NULL_MEMORY
+        self.timestamp = timestamp
+        self.backend = backend
+        self.template = template
+        self.targets = tuple(targets)
+
+    @property
+    def reproducible(self) -> bool:
+        return self.timestamp is not None
+
+    @cached_property
+    def clipboard(self):
+        from modules.clipboard import ClipboardManager
+        return ClipboardManager()
+
+    @cached_property
+    def markdown(self):
+        from modules.backends import create_backend
+        processor = create_backend(self.backend)
+        processor.tracer = self.tracer
+        processor.metrics = self.metrics
+        return processor
+
+    @cached_property
+    def math(self):
+        from modules.math_processor import MathProcessor
+        processor = MathProcessor()
+        processor.tracer = self.tracer
+        processor.metrics = self.metrics
+        return processor
 
-    def __init__(self):
-        self.clipboard = ClipboardManager()
-        self.markdown = MarkdownProcessor()
-        self.math = MathProcessor()
-        self.html_gen = HTMLGenerator()
+    @cached_property
+    def html_gen(self):
+        from modules.html_generator import HTMLGenerator
+        generator = HTMLGenerator(self.template)
+        generator.metrics = self.metrics
+        generator.skip_unchanged = self.reproducible
+        return generator
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage for the tracer and the latency histogram,
+        and account for its memory when a memory report is requested."""
+        start = time.perf_counter()
+        with self.tracer.span(name), self.memory.stage(name):
+            yield
+        self.metrics.stage_seconds.observe(time.perf_counter() - start, name)
+
+    def output_settings(self, custom_styles: Optional[Dict] = None) -> Dict:
+        """Return everything besides the input text that shapes the output."""
+        import hashlib
+
+        return {
+            'version': VERSION,
+            'backend': self.backend,
+            'template': self.template,
+            # The template text itself, so an upgrade that changes the page
+            # without a new VERSION does not match old cache entries
+            'template_sha256': hashlib.sha256(
+                self.html_gen.template.encode('utf-8')).hexdigest(),
+            'fonts': DEFAULT_FONTS,
+            'custom_styles': custom_styles,
+            # Only fixed timestamps; otherwise a hit keeps the time of the
+            # conversion that filled the entry
+            'timestamp': self.timestamp,
+        }
 
     def process_content(self, content: str) -> tuple[str, str]:
         """
@@ -44,57 +128,242 @@ class HTMLClipMaker:
         Returns:
             tuple: (title, processed_content)
         """
-        # Split content into lines
-        lines = content.strip().split('\n')
+        if self.metrics.enabled or self.memory.enabled:
+            self._record_input(len(content.encode('utf-8')))
 
-        # Extract title from first line
-        title = lines[0].lstrip('#').strip()
-        content_lines = lines[1:]
+        from modules.document import Document, normalize_newlines
+        from modules.sniff import sniff
+
+        # Files and stdin are read with universal newlines; so is the clipboard
+        content = normalize_newlines(content)
+
+        with self.stage('title'):
+            # Index the stripped lines without copying the text
+            document = Document.stripped(content)
 
-        # Process math blocks first
-        math_processed = self.math.process_math_blocks(content_lines)
+            # Extract title from first line
+            title = document.line(0).lstrip('#').strip()
 
-        # Process markdown
-        processed_content = self.markdown.process('\n'.join(math_processed))
+        with self.stage('sniff'):
+            profile = sniff(content)
+
+        # Process math blocks first, as replacements for their lines;
+        # without display delimiters the math stage changes nothing
+        with self.stage('math'):
+            if profile.display_math:
+                replacements = self.math.annotate_math_blocks(document, 1)
+            else:
+                self.math.count_inline_math(document.iter_lines(1))
+                replacements = []
+
+        # Process markdown, reading the lines lazily
+        with self.stage('markdown'):
+            lines = (document.iter_lines(1, replacements)
+                     if len(document) > 1 else [''])
+            if profile.plain:
+                chunks = self.markdown.iter_plain(lines)
+            else:
+                chunks = self.markdown.iter_process(lines)
+            processed_content = '\n'.join(chunks)
 
         return title, processed_content
 
     def generate_html(self, title: str, content: str,
                       custom_styles: Optional[Dict] = None) -> str:
         """Generate HTML document from processed content."""
+        with self.stage('wrap'):
+            wrapped_content = self.html_gen.wrap_content(content)
+        return self.page_html(title, wrapped_content, custom_styles)
+
+    def page_html(self, title: str, wrapped_content: str,
+                  custom_styles: Optional[Dict] = None,
+                  timestamp: Optional[str] = None) -> str:
+        """Put wrapped content into the page template."""
+        from modules.html_generator import HTMLTemplate, current_timestamp
+
         template_data = HTMLTemplate(
             title=title,
-            content=self.html_gen.wrap_content(content),
+            content=wrapped_content,
             version=VERSION,
-            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            timestamp=timestamp or self.timestamp or current_timestamp(),
             fonts=DEFAULT_FONTS
         )
 
-        html = self.html_gen.generate(template_data)
+        with self.stage('template'):
+            html = self.html_gen.generate(template_data)
 
         if custom_styles:
-            html = self.html_gen.apply_custom_styles(html, custom_styles)
+            with self.stage('custom_styles'):
+                html = self.html_gen.apply_custom_styles(html, custom_styles)
 
         return html
 
+    def render(self, content: str,
+               custom_styles: Optional[Dict] = None) -> str:
+        """Convert raw input text into a complete HTML document."""
+        title, processed_content = self.process_content(content)
+        return self.generate_html(title, processed_content, custom_styles)
+
+    def render_targets(self, content: str,
+                       custom_styles: Optional[Dict] = None) -> Dict[str, str]:
+        """
+        Convert raw input text once and serialize it to every target.
+
+        Returns:
+            dict: Target name -> output text, in ``targets`` order
+        """
+        from modules.html_generator import current_timestamp
+        from modules.targets import SERIALIZERS, ParsedDocument, check_targets
+
+        check_targets(self.targets)
+        title, processed_content = self.process_content(content)
+        with self.stage('wrap'):
+            wrapped_content = self.html_gen.wrap_content(processed_content)
+        # One generation time for every output of the run
+        document = ParsedDocument(title, wrapped_content, content,
+                                  self.timestamp or current_timestamp())
+
+        outputs = {}
+        for target in self.targets:
+            with self.stage(f'target_{target}'):
+                outputs[target] = SERIALIZERS[target](self, document,
+                                                      custom_styles)
+        return outputs
+
+    def save_targets(self, outputs: Dict[str, str],
+                     base_path: Path) -> Dict[Path, bool]:
+        """
+        Write each target's output next to ``base_path``, concurrently.
+
+        Returns:
+            dict: Output path -> whether it was written (False if
+            ``skip_unchanged`` left an identical file alone)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from modules.targets import TARGETS
+
+        paths = [Path(f"{base_path}{TARGETS[target]}") for target in outputs]
+        with self.stage('save'), ThreadPoolExecutor(len(paths)) as executor:
+            written = executor.map(self.html_gen.save, outputs.values(), paths)
+            return dict(zip(paths, written))
+
+    def stream(self, lines: Iterable[str], output: TextIO,
+               custom_styles: Optional[Dict] = None) -> None:
+        """
+        Convert input lines and write the document to a stream incrementally.
+
+        Produces the same document as ``render`` but passes lines through
+        every stage lazily, so memory stays bounded by the longest block
+        rather than the size of the input. Lines are given without line
+        breaks, as ``streams.iter_input_lines`` yields them.
+        """
+        from modules.html_generator import HTMLTemplate, current_timestamp
+        from modules.streams import strip_lines
+
+        if self.metrics.enabled or self.memory.enabled:
+            lines = self._count_input_bytes(lines)
+        lines = strip_lines(lines)
+
+        # Extract title from first line
+        title = next(lines).lstrip('#').strip()
+
+        # process_content always hands the markdown pass at least one line
+        first = next(lines, None)
+        content_lines = [''] if first is None else chain([first], lines)
+
+        math_processed = self.math.iter_math_blocks(content_lines)
+        processed_content = self.markdown.iter_process(math_processed)
+
+        template_data = HTMLTemplate(
+            title=title,
+            content='',
+            version=VERSION,
+            timestamp=self.timestamp or current_timestamp(),
+            fonts=DEFAULT_FONTS
+        )
+        # Stages are interleaved line by line, so only the whole pass is timed
+        with self.stage('stream'):
+            self.html_gen.write(template_data,
+                                self.html_gen.iter_wrap(processed_content),
+                                output, custom_styles)
+
+    def _record_input(self, nbytes: int) -> None:
+        self.metrics.bytes_in.inc(amount=nbytes)
+        if self.memory.enabled:
+            self.memory.input_bytes += nbytes
+
+    def _count_input_bytes(self, lines: Iterable[str]) -> Iterable[str]:
+        separator = 0
+        for line in lines:
+            self._record_input(separator + len(line.encode('utf-8')))
+            separator = 1
+            yield line
+
+    def render_file(self, source_path: Path,
+                    custom_styles: Optional[Dict] = None) -> Path:
+        """Render a source file to an HTML file next to it."""
+        content = source_path.read_text(encoding='utf-8')
+        output_path = source_path.with_suffix('.html')
+        html = self.render(content, custom_styles)
+        with self.stage('save'):
+            self.html_gen.save(html, output_path)
+        return output_path
+
     def save_output(self, html: str, output_path: Path) -> None:
         """Save HTML content to file."""
         try:
-            self.html_gen.save(html, output_path)
-            logger.info(f"HTML content has been successfully written to {output_path}")
+            with self.stage('save'):
+                written = self.html_gen.save(html, output_path)
+            if written:
+                logger.info(f"HTML content has been successfully written to {output_path}")
+            else:
+                logger.info(f"{output_path} is unchanged")
         except Exception as e:
             logger.error(f"Error saving file: {e}")
             raise
 
 
+def parse_targets(value: str) -> tuple:
+    """Parse a comma-separated --targets value."""
+    import argparse
+    from modules.targets import check_targets
+
+    targets = tuple(filter(None, (target.strip() for target in value.split(','))))
+    try:
+        check_targets(targets)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return targets
+
+
+def add_template_argument(parser) -> None:
+    """Add the --template option shared by the converting commands."""
+    parser.add_argument(
+        '--template',
+        help='Page template: default, or fast, which loads fonts, styles and '
+             'scripts without blocking first paint (default: default)',
+        choices=TEMPLATES,
+        default='default'
+    )
+
+
 def parse_arguments():
     """Parse command line arguments."""
+    import argparse
+
     parser = argparse.ArgumentParser(
-        description='Convert clipboard content to styled HTML with math support'
+        description='Convert clipboard content to styled HTML with math support',
+        epilog='Other commands: watch <dir>, serve, batch <dir>, merge-manifests. '
+               'Run "<command> --help" for details.'
     )
     parser.add_argument(
         'filename',
-        help='Base name for output files (without extension)'
+        help='Base name for output files (without extension), or - for stdout'
+    )
+    parser.add_argument(
+        '-i', '--input',
+        help='Read from a file, or - for stdin, instead of the clipboard',
+        default=None
     )
     parser.add_argument(
         '--style',
@@ -102,6 +371,96 @@ def parse_arguments():
         type=Path,
         default=None
     )
+    parser.add_argument(
+        '--archive',
+        help='Store the original text in this content-addressed archive '
+             'instead of writing a .txt file',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--trace',
+        help='Write per-stage timing spans to this file as Chrome '
+             'trace-event JSON (open in Perfetto)',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--profile',
+        help='Run under cProfile and dump pstats to this file',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--metrics',
+        help='Write pipeline metrics to this file (Prometheus textfile '
+             'format, or JSON for a .json path)',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--split-at',
+        help='Split the document at h1 or h2 headers into one page per '
+             'section, written with an index page to the directory FILENAME',
+        choices=['h1', 'h2'],
+        default=None
+    )
+    parser.add_argument(
+        '--workers',
+        help='Worker processes rendering sections with --split-at '
+             '(default: CPU count)',
+        type=int,
+        default=None
+    )
+    parser.add_argument(
+        '--backend',
+        help='Markdown backend: the fast built-in processor, or the more '
+             'complete python-markdown (default: builtin)',
+        choices=['builtin', 'python-markdown'],
+        default='builtin'
+    )
+    add_template_argument(parser)
+    parser.add_argument(
+        '--targets',
+        help='Comma-separated outputs to produce from one conversion: page '
+             '(FILENAME.html), fragment (FILENAME.fragment.html, the page '
+             'content alone) and json (FILENAME.json, title, outline and '
+             'content) (default: page)',
+        type=parse_targets,
+        default=('page',),
+        metavar='TARGET[,TARGET...]'
+    )
+    parser.add_argument(
+        '--reproducible',
+        help='Use a fixed generation time (SOURCE_DATE_EPOCH, or the Unix '
+             'epoch) and leave output files with unchanged content alone; '
+             'implied when SOURCE_DATE_EPOCH is set',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help='Reuse documents converted from the same text and settings by '
+             'earlier runs, kept in this directory (ignored with --split-at)',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--cache-size',
+        help='Largest total size of the --cache-dir entries in MiB before '
+             'the least recently used are evicted (default: 256)',
+        type=int,
+        default=256
+    )
+    parser.add_argument(
+        '--memory-report',
+        help='Trace allocations and report peak/retained memory and the top '
+             'allocation sites per stage, to stderr or to this file (JSON '
+             'for a .json path)',
+        nargs='?',
+        const='-',
+        default=None,
+        metavar='PATH'
+    )
     parser.add_argument(
         '--debug',
         help='Enable debug logging',
@@ -144,46 +503,706 @@ def load_custom_styles(style_path: Path) -> Optional[Dict]:
         return None
 
 
-def main():
-    """Main program entry point."""
-    args = parse_arguments()
+def parse_watch_arguments(argv):
+    """Parse command line arguments for the watch command."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='html-clip-maker watch',
+        description='Re-render notes in a directory whenever they change'
+    )
+    parser.add_argument(
+        'directory',
+        help='Directory containing .txt/.md notes',
+        type=Path
+    )
+    parser.add_argument(
+        '--style',
+        help='Path to custom CSS file',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--debounce',
+        help='Seconds to wait for a burst of saves to settle (default: 0.05)',
+        type=float,
+        default=0.05
+    )
+    parser.add_argument(
+        '--poll',
+        help='Use mtime polling instead of inotify',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--backend',
+        help='Markdown backend: the fast built-in processor, or the more '
+             'complete python-markdown (default: builtin)',
+        choices=['builtin', 'python-markdown'],
+        default='builtin'
+    )
+    add_template_argument(parser)
+    parser.add_argument(
+        '--reproducible',
+        help='Use a fixed generation time (SOURCE_DATE_EPOCH, or the Unix '
+             'epoch) and leave outputs with unchanged content alone; '
+             'implied when SOURCE_DATE_EPOCH is set',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--metrics',
+        help='Rewrite pipeline metrics to this file after every rebuild '
+             '(Prometheus textfile format, or JSON for a .json path)',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--debug',
+        help='Enable debug logging',
+        action='store_true'
+    )
+    return parser.parse_args(argv)
+
+
+def watch_main(argv):
+    """Watch a notes directory and incrementally re-render changed files."""
+    from modules.watcher import FileWatcher
+
+    args = parse_watch_arguments(argv)
+
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+
+    if not args.directory.is_dir():
+        logger.error(f"Not a directory: {args.directory}")
+        sys.exit(1)
+
+    metrics = None
+    if args.metrics:
+        from modules.instrumentation import PipelineMetrics
+        metrics = PipelineMetrics()
+
+    # One resident instance keeps the processors and template warm
+    app = HTMLClipMaker(metrics=metrics, timestamp=build_timestamp(args),
+                        backend=args.backend, template=args.template)
+    custom_styles = load_custom_styles(args.style) if args.style else None
+
+    def render(source_path: Path) -> None:
+        start = time.perf_counter()
+        try:
+            output_path = app.render_file(source_path, custom_styles)
+        except Exception as e:
+            logger.error(f"Error rendering {source_path}: {e}")
+            if args.debug:
+                logger.exception("Detailed error information:")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Rendered {output_path} in {elapsed:.1f} ms")
+
+    watcher = FileWatcher(
+        args.directory,
+        debounce=args.debounce,
+        backend='poll' if args.poll else 'auto'
+    )
+    with watcher:
+        # Bring stale outputs up to date before waiting for changes
+        for source_path in watcher.sources():
+            output_path = source_path.with_suffix('.html')
+            if (not output_path.exists() or
+                    output_path.stat().st_mtime < source_path.stat().st_mtime):
+                render(source_path)
+        if metrics is not None:
+            write_metrics(metrics, args.metrics)
+
+        logger.info(f"Watching {args.directory} ({watcher.backend})")
+        try:
+            for changed in watcher:
+                for source_path in sorted(changed):
+                    if source_path.is_file():
+                        render(source_path)
+                if metrics is not None:
+                    write_metrics(metrics, args.metrics)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+
+
+def parse_serve_arguments(argv):
+    """Parse command line arguments for the serve command."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='html-clip-maker serve',
+        description='Run a local HTTP render service with live-reload preview'
+    )
+    parser.add_argument(
+        '--host',
+        help='Address to listen on (default: 127.0.0.1)',
+        default='127.0.0.1'
+    )
+    parser.add_argument(
+        '--port',
+        help='TCP port to listen on (default: 8765)',
+        type=int,
+        default=8765
+    )
+    parser.add_argument(
+        '--unix',
+        help='Listen on a Unix socket instead of a TCP port',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--watch',
+        help='Serve sources from this directory at /view/<path> with live reload',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--workers',
+        help='Number of warm render workers (default: 2)',
+        type=int,
+        default=2
+    )
+    parser.add_argument(
+        '--executor',
+        help='Run renders in worker threads or processes (default: thread)',
+        choices=['thread', 'process'],
+        default='thread'
+    )
+    parser.add_argument(
+        '--style',
+        help='Path to custom CSS file',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--backend',
+        help='Markdown backend: the fast built-in processor, or the more '
+             'complete python-markdown (default: builtin)',
+        choices=['builtin', 'python-markdown'],
+        default='builtin'
+    )
+    add_template_argument(parser)
+    parser.add_argument(
+        '--metrics',
+        help='Expose pipeline metrics at /metrics and /metrics.json '
+             '(thread executor only)',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--debug',
+        help='Enable debug logging',
+        action='store_true'
+    )
+    return parser.parse_args(argv)
+
+
+def serve_main(argv):
+    """Run the local render service until interrupted."""
+    import asyncio
+    from modules.server import RenderServer
+
+    args = parse_serve_arguments(argv)
+
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    if args.watch is not None and not args.watch.is_dir():
+        logger.error(f"Not a directory: {args.watch}")
+        sys.exit(1)
+
+    from functools import partial
+
+    app_factory = partial(HTMLClipMaker, backend=args.backend,
+                          template=args.template)
+    metrics = None
+    if args.metrics:
+        if args.executor != 'thread':
+            logger.error("--metrics requires the thread executor")
+            sys.exit(1)
+        from modules.instrumentation import PipelineMetrics
+        metrics = PipelineMetrics()
+        app_factory = partial(app_factory, metrics=metrics)
+
+    server = RenderServer(
+        app_factory,
+        metrics=metrics,
+        workers=args.workers,
+        executor=args.executor,
+        watch_dir=args.watch,
+        custom_styles=load_custom_styles(args.style) if args.style else None
+    )
+    if args.unix is not None:
+        logger.info(f"Serving on unix:{args.unix}")
+    else:
+        logger.info(f"Serving on http://{args.host}:{args.port}")
+
+    try:
+        asyncio.run(server.serve_forever(
+            host=args.host, port=args.port, unix_path=args.unix))
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+
+
+def parse_batch_arguments(argv):
+    """Parse command line arguments for the batch command."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='html-clip-maker batch',
+        description='Convert every note under a directory, optionally as one '
+                    'shard of a rebuild split across machines'
+    )
+    parser.add_argument(
+        'directory',
+        help='Directory containing .txt/.md notes',
+        type=Path
+    )
+    parser.add_argument(
+        '--output-dir',
+        help='Directory for the HTML files, mirroring the source tree '
+             '(default: next to the sources)',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--shard',
+        help='Convert only the i-th of N shards, assigned by a hash of each '
+             'source path; run shards 1/N to N/N anywhere that sees the same '
+             'directory (default: 1/1)',
+        default='1/1',
+        metavar='i/N'
+    )
+    parser.add_argument(
+        '--manifest',
+        help='Where to write the shard manifest of input hash, output hash '
+             'and timing per source (default: '
+             'OUTPUT_DIR/.manifests/shard-i-of-N.json)',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--style',
+        help='Path to custom CSS file',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--backend',
+        help='Markdown backend: the fast built-in processor, or the more '
+             'complete python-markdown (default: builtin)',
+        choices=['builtin', 'python-markdown'],
+        default='builtin'
+    )
+    add_template_argument(parser)
+    parser.add_argument(
+        '--reproducible',
+        help='Use a fixed generation time (SOURCE_DATE_EPOCH, or the Unix '
+             'epoch) and leave outputs with unchanged content alone; '
+             'implied when SOURCE_DATE_EPOCH is set',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--search-index',
+        help='Record search terms in the manifest; a single-shard run also '
+             'writes the client-side index to OUTPUT_DIR/search (for shards, '
+             'see merge-manifests --search-index)',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--debug',
+        help='Enable debug logging',
+        action='store_true'
+    )
+    return parser.parse_args(argv)
+
+
+def batch_main(argv):
+    """Convert one shard of a notes directory and write its manifest."""
+    from modules.batch import convert_shard, manifest_name, parse_shard
+
+    args = parse_batch_arguments(argv)
 
     if args.debug:
         logger.setLevel(logging.DEBUG)
 
+    if not args.directory.is_dir():
+        logger.error(f"Not a directory: {args.directory}")
+        sys.exit(1)
     try:
-        # Initialize application
-        app = HTMLClipMaker()
+        shard, count = parse_shard(args.shard)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
 
-        # Get clipboard content
-        logger.debug("Reading clipboard content...")
-        content = app.clipboard.get_clipboard_content()
-        if not content:
-            logger.error("Clipboard is empty")
+    output_dir = args.output_dir or args.directory
+    manifest_path = args.manifest or (
+        output_dir / '.manifests' / manifest_name(shard, count))
+
+    app = HTMLClipMaker(timestamp=build_timestamp(args),
+                        backend=args.backend, template=args.template)
+    custom_styles = load_custom_styles(args.style) if args.style else None
+    manifest = convert_shard(app, args.directory, output_dir, shard, count,
+                             custom_styles, search=args.search_index)
+    manifest.save(manifest_path)
+    if args.search_index and count == 1:
+        from modules.batch import write_search_index
+
+        index_dir = write_search_index(manifest.entries, output_dir)
+        logger.info(f"Search index written to {index_dir}")
+
+    for entry in manifest.failed:
+        logger.error(f"Error converting {entry.source}: {entry.error}")
+    logger.info(f"Shard {shard}/{count}: converted "
+                f"{len(manifest.entries) - len(manifest.failed)} of "
+                f"{manifest.total} sources in {manifest.seconds:.1f} s; "
+                f"manifest written to {manifest_path}")
+    if manifest.failed:
+        sys.exit(1)
+
+
+def parse_merge_arguments(argv):
+    """Parse command line arguments for the merge-manifests command."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='html-clip-maker merge-manifests',
+        description='Combine the manifests of a sharded batch conversion and '
+                    'verify that every source was converted exactly once'
+    )
+    parser.add_argument(
+        'manifests',
+        help='Shard manifests written by batch --shard',
+        type=Path,
+        nargs='+'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the merged manifest to this file',
+        type=Path,
+        default=None
+    )
+    parser.add_argument(
+        '--search-index',
+        help='Write the client-side search index of the converted notes to '
+             'OUTPUT_DIR/search; the shards must have run with --search-index',
+        type=Path,
+        default=None,
+        metavar='OUTPUT_DIR'
+    )
+    return parser.parse_args(argv)
+
+
+def merge_main(argv):
+    """Merge shard manifests; exit with an error if the shards disagree or
+    missed or duplicated sources."""
+    from modules.batch import ShardManifest, merge_manifests
+
+    args = parse_merge_arguments(argv)
+
+    try:
+        merged = merge_manifests(
+            [ShardManifest.load(path) for path in args.manifests])
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logger.error(f"Error reading manifests: {e}")
+        sys.exit(1)
+
+    if args.output is not None:
+        from modules.fileutil import write_if_changed
+        write_if_changed(args.output, merged.to_json())
+        logger.info(f"Merged manifest written to {args.output}")
+
+    for problem in merged.problems:
+        logger.error(problem)
+    if not merged.ok:
+        sys.exit(1)
+    logger.info(f"All {merged.total} sources converted once by "
+                f"{merged.count} shards")
+
+    if args.search_index is not None:
+        from modules.batch import write_search_index
+
+        try:
+            index_dir = write_search_index(merged.entries, args.search_index)
+        except ValueError as e:
+            logger.error(str(e))
             sys.exit(1)
+        logger.info(f"Search index written to {index_dir}")
 
+
+COMMANDS = {
+    'watch': watch_main,
+    'serve': serve_main,
+    'batch': batch_main,
+    'merge-manifests': merge_main,
+}
+
+
+def convert(app: HTMLClipMaker, args) -> None:
+    """Run a single conversion as described by the parsed arguments."""
+    to_stdout = args.filename == '-'
+    output_path = Path(args.filename).with_suffix('.html')
+
+    # Load custom styles if provided
+    custom_styles = None
+    if args.style:
+        logger.debug("Loading custom styles...")
+        custom_styles = load_custom_styles(args.style)
+
+    if args.split_at and to_stdout:
+        logger.error("--split-at writes a directory and cannot write to stdout")
+        sys.exit(1)
+
+    several_targets = args.targets != ('page',)
+    if several_targets and (to_stdout or args.split_at):
+        logger.error("--targets writes files next to FILENAME and cannot be "
+                     "combined with stdout output or --split-at")
+        sys.exit(1)
+
+    cache = None
+    if args.cache_dir is not None and not (args.split_at or several_targets):
+        from modules.cache import ConversionCache
+        cache = ConversionCache(args.cache_dir, max_bytes=args.cache_size << 20)
+
+    if args.input:
+        # Stream the input through the pipeline with bounded memory
+        from modules.streams import iter_input_lines, strip_lines
+
+        logger.debug(f"Streaming content from {args.input}...")
+        lines = iter_input_lines(args.input)
+        if args.archive and not to_stdout:
+            # The archive stores the whole text, so it is read up front
+            lines = list(lines)
+        if several_targets:
+            # Every target is serialized from the one converted document
+            convert_targets(app, '\n'.join(lines), args, custom_styles)
+        elif args.split_at:
+            paginate(app, strip_lines(lines), args, custom_styles)
+        elif cache is not None:
+            if args.input == '-':
+                # Stdin cannot be read a second time for the conversion
+                lines = list(lines)
+                key_lines = lines
+            else:
+                key_lines = iter_input_lines(args.input)
+            convert_cached(app, cache, key_lines, args, custom_styles,
+                           lambda output: app.stream(lines, output, custom_styles))
+        elif to_stdout:
+            app.stream(lines, sys.stdout, custom_styles)
+        elif app.reproducible:
+            from modules.fileutil import ChangeAwareFile
+
+            output_file = ChangeAwareFile(output_path)
+            with output_file as output:
+                app.stream(lines, output, custom_styles)
+            if output_file.changed:
+                logger.info(f"HTML content has been successfully written to {output_path}")
+            else:
+                logger.info(f"{output_path} is unchanged")
+        else:
+            with open(output_path, 'w', encoding='utf-8') as output:
+                app.stream(lines, output, custom_styles)
+            logger.info(f"HTML content has been successfully written to {output_path}")
+        if args.archive and not to_stdout:
+            with app.stage('save_original'):
+                archive_original(args, '\n'.join(lines))
+        return
+
+    # Get clipboard content
+    logger.debug("Reading clipboard content...")
+    with app.stage('clipboard'):
+        content = app.clipboard.get_clipboard_content()
+    if not content:
+        logger.error("Clipboard is empty")
+        sys.exit(1)
+
+    if args.split_at:
+        paginate(app, content.strip().split('\n'), args, custom_styles)
+    elif several_targets:
+        convert_targets(app, content, args, custom_styles)
+    elif cache is not None:
+        if not convert_cached(app, cache, [content], args, custom_styles,
+                              lambda output: output.write(
+                                  app.render(content, custom_styles))):
+            return
+    else:
         # Process content
         logger.debug("Processing content...")
         title, processed_content = app.process_content(content)
 
-        # Load custom styles if provided
-        custom_styles = None
-        if args.style:
-            logger.debug("Loading custom styles...")
-            custom_styles = load_custom_styles(args.style)
-
         # Generate HTML
         logger.debug("Generating HTML...")
         html = app.generate_html(title, processed_content, custom_styles)
 
+        if to_stdout:
+            sys.stdout.write(html)
+            return
+
         # Save output
-        output_path = Path(args.filename).with_suffix('.html')
         app.save_output(html, output_path)
 
-        # Save original text content
-        text_path = Path(args.filename).with_suffix('.txt')
-        text_path.write_text(content, encoding='utf-8')
-        logger.info(f"Original content saved to {text_path}")
+    # Save original text content
+    with app.stage('save_original'):
+        if args.archive:
+            archive_original(args, content)
+        else:
+            text_path = Path(args.filename).with_suffix('.txt')
+            if app.reproducible:
+                from modules.fileutil import write_if_changed
+                written = write_if_changed(text_path, content)
+            else:
+                text_path.write_text(content, encoding='utf-8')
+                written = True
+            if written:
+                logger.info(f"Original content saved to {text_path}")
+            else:
+                logger.info(f"{text_path} is unchanged")
+
+
+def archive_original(args, content: str) -> None:
+    """Store the original text in the --archive object store."""
+    from modules.archive import ObjectStore
+
+    digest = ObjectStore(args.archive).put_text(args.filename, content)
+    logger.info(f"Original content archived as {digest[:12]} in {args.archive}")
+
+
+def convert_targets(app: HTMLClipMaker, content: str, args,
+                    custom_styles: Optional[Dict]) -> None:
+    """Convert once and write every output target next to FILENAME."""
+    outputs = app.render_targets(content, custom_styles)
+    written = app.save_targets(outputs, Path(args.filename).with_suffix(''))
+    for path, changed in written.items():
+        if changed:
+            logger.info(f"{path} has been successfully written")
+        else:
+            logger.info(f"{path} is unchanged")
+
+
+def convert_cached(app: HTMLClipMaker, cache, key_lines, args,
+                   custom_styles: Optional[Dict], write) -> bool:
+    """
+    Put the document for the input at its destination from the cache; on
+    a miss, call ``write(output)`` to convert it and store a copy.
+
+    Returns:
+        bool: False if the document went to stdout
+    """
+    from modules.cache import conversion_key
+
+    to_stdout = args.filename == '-'
+    output_path = Path(args.filename).with_suffix('.html')
+
+    with app.stage('cache'):
+        key = conversion_key(key_lines, app.output_settings(custom_styles))
+        if to_stdout:
+            data = cache.read(key)
+            hit = data is not None
+        else:
+            written = cache.fetch(key, output_path, app.reproducible)
+            hit = written is not None
+    logger.debug(f"Cache {'hit' if hit else 'miss'} for {key[:12]}")
+
+    if to_stdout:
+        if hit:
+            sys.stdout.write(data.decode('utf-8'))
+        else:
+            import io
+
+            output = io.StringIO()
+            write(output)
+            html = output.getvalue()
+            sys.stdout.write(html)
+            with app.stage('cache'):
+                cache.put(key, html)
+        return False
+
+    if not hit:
+        from modules.fileutil import ChangeAwareFile
+
+        # Replace rather than rewrite: the old output may be linked to an entry
+        output_file = ChangeAwareFile(output_path)
+        with output_file as output:
+            write(output)
+        written = output_file.changed
+        with app.stage('cache'):
+            cache.add(key, output_path)
+
+    if written:
+        logger.info(f"HTML content has been successfully written to {output_path}")
+    else:
+        logger.info(f"{output_path} is unchanged")
+    return True
+
+
+def paginate(app: HTMLClipMaker, lines, args,
+             custom_styles: Optional[Dict]) -> None:
+    """Render stripped lines as paginated sections into args.filename."""
+    from modules.paginate import Paginator
+
+    output_dir = Path(args.filename)
+    paths = Paginator(app, args.split_at, args.workers).render(
+        lines, output_dir, custom_styles)
+    logger.info(f"{len(paths) - 1} sections written to {output_dir}; "
+                f"open {paths[0]}")
+
+
+def build_timestamp(args) -> Optional[str]:
+    """Return the fixed timestamp for reproducible output, or None."""
+    import os
+
+    if not (args.reproducible or 'SOURCE_DATE_EPOCH' in os.environ):
+        return None
+    from modules.html_generator import reproducible_timestamp
+    return reproducible_timestamp()
+
+
+def write_metrics(metrics, path: Path) -> None:
+    """Export metrics as JSON for .json paths, else as a Prometheus textfile."""
+    if path.suffix == '.json':
+        metrics.registry.write_json(path)
+    else:
+        metrics.registry.write_textfile(path)
+
+
+def main():
+    """Main program entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return COMMANDS[sys.argv[1]](sys.argv[2:])
+
+    args = parse_arguments()
+
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+
+    tracer = None
+    if args.trace:
+        from modules.tracing import Tracer
+        tracer = Tracer()
+
+    metrics = None
+    if args.metrics:
+        from modules.instrumentation import PipelineMetrics
+        metrics = PipelineMetrics()
+
+    memory = None
+    if args.memory_report:
+        from modules.memory import MemoryProfiler
+        memory = MemoryProfiler()
+        memory.start()
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        # Initialize application
+        app = HTMLClipMaker(tracer=tracer, metrics=metrics, memory=memory,
+                            timestamp=build_timestamp(args),
+                            backend=args.backend, template=args.template,
+                            targets=args.targets)
+        convert(app, args)
 
     except Exception as e:
         logger.error(f"Error: {e}")
@@ -191,6 +1210,25 @@ def main():
             logger.exception("Detailed error information:")
         sys.exit(1)
 
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            logger.info(f"Profile written to {args.profile}")
+        if tracer is not None:
+            tracer.save(args.trace)
+            logger.info(f"Trace written to {args.trace}")
+        if metrics is not None:
+            write_metrics(metrics, args.metrics)
+            logger.info(f"Metrics written to {args.metrics}")
+        if memory is not None:
+            memory.stop()
+            if args.memory_report == '-':
+                sys.stderr.write(memory.format_report())
+            else:
+                memory.save(args.memory_report)
+                logger.info(f"Memory report written to {args.memory_report}")
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Content-addressed archive for original clipboard text."""
+
+import hashlib
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+INDEX_NAME = 'index'
+OBJECTS_DIR = 'objects'
+
+
+class ObjectStore:
+    """Stores zlib-compressed blobs under their SHA-256 digest.
+
+    Blobs live at ``objects/<first two hex digits>/<remaining digits>``, so
+    identical content is stored once. An append-only ``index`` file maps
+    output names to digests; the last entry for a name wins.
+    """
+
+    def __init__(self, root: Path, compression_level: int = 9):
+        self.root = Path(root)
+        self.compression_level = compression_level
+
+    def object_path(self, digest: str) -> Path:
+        """Return the path of the blob with the given digest."""
+        return self.root / OBJECTS_DIR / digest[:2] / digest[2:]
+
+    def contains(self, digest: str) -> bool:
+        """Check whether a blob is stored."""
+        return self.object_path(digest).exists()
+
+    def put(self, data: bytes) -> str:
+        """Store a blob and return its digest; existing blobs are reused."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if path.exists():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = zlib.compress(data, self.compression_level)
+        # Write to a temporary file and rename so readers and concurrent
+        # writers never observe a partial blob
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Return the content of a stored blob."""
+        try:
+            compressed = self.object_path(digest).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        return zlib.decompress(compressed)
+
+    def put_text(self, name: str, text: str) -> str:
+        """Store text under an output name and return its digest."""
+        digest = self.put(text.encode('utf-8'))
+        self.record(name, digest)
+        return digest
+
+    def get_text(self, name: str) -> str:
+        """Return the text most recently stored under an output name."""
+        digest = self.lookup(name)
+        if digest is None:
+            raise KeyError(name)
+        return self.get(digest).decode('utf-8')
+
+    def record(self, name: str, digest: str) -> None:
+        """Map an output name to a digest in the index.
+
+        Nothing is written if the name already maps to the digest, so
+        archiving the same text again costs no extra bytes.
+        """
+        if '\n' in name or '\t' in name:
+            raise ValueError(f"Invalid archive name: {name!r}")
+        if self.lookup(name) == digest:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Single O_APPEND writes of a short line are atomic between processes
+        fd = os.open(self.root / INDEX_NAME,
+                     os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, f"{digest}\t{name}\n".encode('utf-8'))
+        finally:
+            os.close(fd)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Return the digest recorded for an output name."""
+        return self.index().get(name)
+
+    def index(self) -> Dict[str, str]:
+        """Return the current ``{name: digest}`` mapping."""
+        entries = {}
+        try:
+            with open(self.root / INDEX_NAME, encoding='utf-8') as f:
+                for line in f:
+                    digest, _, name = line.rstrip('\n').partition('\t')
+                    if name:
+                        entries[name] = digest
+        except FileNotFoundError:
+            pass
+        return entries
@@ -0,0 +1,35 @@
+"""Markdown backend selection module.
+
+``HTMLClipMaker`` renders markdown with one of these backends:
+
+- ``builtin``: the regex-based, line-oriented ``MarkdownProcessor``. It
+  is the fastest, streams with bounded memory, and supports incremental
+  previews.
+- ``python-markdown``: ``PythonMarkdownProcessor``, the python-markdown
+  package with its ``extra`` extensions and math protection. It has the
+  most complete syntax.
+
+Both take the output of the math pass through ``iter_process`` (and
+``iter_plain`` for input without markup) and yield HTML chunks for
+``HTMLGenerator.iter_wrap``; ``process_inline`` renders a single line.
+"""
+
+BACKENDS = ('builtin', 'python-markdown')
+DEFAULT_BACKEND = 'builtin'
+
+
+def create_backend(name: str = DEFAULT_BACKEND):
+    """Construct a markdown backend by name, importing it on first use."""
+    if name == 'builtin':
+        from .markdown import MarkdownProcessor
+        return MarkdownProcessor()
+
+    if name == 'python-markdown':
+        try:
+            from .python_markdown import PythonMarkdownProcessor
+        except ImportError as e:
+            raise RuntimeError("The python-markdown backend needs the "
+                               "'markdown' package") from e
+        return PythonMarkdownProcessor()
+
+    raise ValueError(f"Unknown markdown backend: {name}")
@@ -0,0 +1,286 @@
+"""Sharded batch conversion module.
+
+A rebuild of a large notes tree can be split across machines that share
+nothing but a filesystem. Every node lists the same sources, converts
+those whose path hashes to its shard, and writes a manifest of what it
+converted; merging the manifests then checks that the shards together
+covered every source exactly once. Nodes never talk to each other, so
+there is no coordinator to run.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .fileutil import write_if_changed
+from .watcher import DEFAULT_SUFFIXES
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse ``i/N``, the i-th of N shards counting from 1, into (i, N)."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N: {value}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and N: {value}")
+    return index, count
+
+
+def shard_of(source: str, count: int) -> int:
+    """
+    Return the shard (1 to ``count``) that converts a source.
+
+    ``source`` is the path relative to the source directory in POSIX form,
+    so every node assigns it alike wherever the tree is mounted.
+    """
+    digest = hashlib.sha256(source.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def list_sources(root: Path,
+                 suffixes: Sequence[str] = DEFAULT_SUFFIXES) -> List[str]:
+    """Return the sorted relative POSIX paths of the sources under root.
+
+    Hidden files and directories are skipped.
+    """
+    sources = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+        relative = PurePosixPath(Path(directory).relative_to(root).as_posix())
+        for name in filenames:
+            if not name.startswith('.') and os.path.splitext(name)[1] in suffixes:
+                sources.append(str(relative / name))
+    return sorted(sources)
+
+
+def listing_digest(sources: Sequence[str]) -> str:
+    """Return the SHA-256 digest identifying a sorted source listing."""
+    return hashlib.sha256('\n'.join(sources).encode('utf-8')).hexdigest()
+
+
+def output_name(source: str) -> str:
+    """Return the output path for a source, relative to the output directory."""
+    return str(PurePosixPath(source).with_suffix('.html'))
+
+
+@dataclass
+class ManifestEntry:
+    """One converted source; ``output`` is None if the conversion failed.
+
+    ``title`` and ``terms`` are recorded for the search index only.
+    """
+    source: str
+    input_sha256: str
+    output: Optional[str]
+    output_sha256: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+    title: Optional[str] = None
+    terms: Optional[Dict[str, int]] = None
+
+
+@dataclass
+class ShardManifest:
+    """What one shard converted, and the listing it was taken from."""
+    shard: int
+    count: int
+    total: int     # Sources in the whole listing, over all shards
+    listing: str   # listing_digest of the whole listing
+    settings: Dict
+    seconds: float = 0.0
+    entries: List[ManifestEntry] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[ManifestEntry]:
+        return [entry for entry in self.entries if entry.error is not None]
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2, ensure_ascii=False) + '\n'
+
+    @classmethod
+    def from_json(cls, text: str) -> 'ShardManifest':
+        data = json.loads(text)
+        data['entries'] = [ManifestEntry(**entry) for entry in data['entries']]
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ShardManifest':
+        return cls.from_json(Path(path).read_text(encoding='utf-8'))
+
+    def save(self, path: Path) -> None:
+        """Write the manifest atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(path, self.to_json())
+
+
+def manifest_name(shard: int, count: int) -> str:
+    """Return the default file name of a shard's manifest."""
+    return f"shard-{shard}-of-{count}.json"
+
+
+def convert_shard(app, source_dir: Path, output_dir: Path,
+                  shard: int = 1, count: int = 1,
+                  custom_styles: Optional[Dict] = None,
+                  search: bool = False) -> ShardManifest:
+    """
+    Convert the sources of one shard and return its manifest.
+
+    A source that fails to convert is recorded with its error and the
+    rest of the shard carries on. With ``search``, each entry also records
+    the title and search terms of its document.
+    """
+    source_dir = Path(source_dir)
+    output_dir = Path(output_dir)
+    start = time.perf_counter()
+    sources = list_sources(source_dir)
+    manifest = ShardManifest(shard, count, len(sources),
+                             listing_digest(sources),
+                             app.output_settings(custom_styles))
+
+    for source in sources:
+        if shard_of(source, count) != shard:
+            continue
+        entry_start = time.perf_counter()
+        data = b''
+        try:
+            data = (source_dir / source).read_bytes()
+            title, content = app.process_content(data.decode('utf-8'))
+            html = app.generate_html(title, content, custom_styles)
+            output = output_name(source)
+            output_path = output_dir / output
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with app.stage('save'):
+                app.html_gen.save(html, output_path)
+        except Exception as e:
+            manifest.entries.append(ManifestEntry(
+                source, hashlib.sha256(data).hexdigest(), None, None,
+                time.perf_counter() - entry_start, f"{type(e).__name__}: {e}"))
+            continue
+        entry = ManifestEntry(
+            source, hashlib.sha256(data).hexdigest(), output,
+            hashlib.sha256(html.encode('utf-8')).hexdigest(),
+            time.perf_counter() - entry_start)
+        if search:
+            from .search import document_terms
+
+            with app.stage('search_terms'):
+                entry.title = title
+                entry.terms = document_terms(title, content)
+        manifest.entries.append(entry)
+
+    manifest.seconds = time.perf_counter() - start
+    return manifest
+
+
+@dataclass
+class MergedManifest:
+    """The combined shard manifests; ``problems`` is empty if they agree
+    and cover every source of the listing exactly once."""
+    count: int
+    total: int
+    listing: str
+    settings: Dict
+    seconds: float    # Summed over shards, not wall time
+    entries: List[ManifestEntry]
+    problems: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2, ensure_ascii=False) + '\n'
+
+
+def merge_manifests(manifests: Sequence[ShardManifest]) -> MergedManifest:
+    """Combine shard manifests and verify that nothing was missed or
+    converted twice."""
+    if not manifests:
+        raise ValueError("No manifests to merge")
+    first = manifests[0]
+    problems = []
+
+    for manifest in manifests[1:]:
+        for name in ('count', 'total', 'listing', 'settings'):
+            if getattr(manifest, name) != getattr(first, name):
+                problems.append(
+                    f"Shard {manifest.shard}/{manifest.count} has a different "
+                    f"{name} from shard {first.shard}/{first.count}")
+
+    shards = Counter(manifest.shard for manifest in manifests)
+    for shard in range(1, first.count + 1):
+        if shards[shard] == 0:
+            problems.append(f"Missing manifest for shard {shard}/{first.count}")
+        elif shards[shard] > 1:
+            problems.append(f"{shards[shard]} manifests for shard "
+                            f"{shard}/{first.count}")
+
+    converted_by: Dict[str, int] = {}
+    entries = []
+    merged_shards = set()
+    for manifest in manifests:
+        # A repeated shard is reported above; its sources once are enough
+        if manifest.shard in merged_shards:
+            continue
+        merged_shards.add(manifest.shard)
+        for entry in manifest.entries:
+            if entry.source in converted_by:
+                problems.append(
+                    f"{entry.source} converted by shards "
+                    f"{converted_by[entry.source]} and {manifest.shard}")
+                continue
+            converted_by[entry.source] = manifest.shard
+            entries.append(entry)
+            if shard_of(entry.source, first.count) != manifest.shard:
+                problems.append(f"{entry.source} does not belong to shard "
+                                f"{manifest.shard}/{first.count}")
+            if entry.error is not None:
+                problems.append(f"{entry.source} failed: {entry.error}")
+
+    entries.sort(key=lambda entry: entry.source)
+    sources = [entry.source for entry in entries]
+    if len(sources) < first.total:
+        problems.append(f"{first.total - len(sources)} of {first.total} "
+                        f"sources were not converted")
+    elif listing_digest(sources) != first.listing:
+        problems.append("Converted sources do not match the source listing")
+
+    return MergedManifest(
+        count=first.count,
+        total=first.total,
+        listing=first.listing,
+        settings=first.settings,
+        seconds=sum(manifest.seconds for manifest in manifests),
+        entries=entries,
+        problems=problems,
+    )
+
+
+def write_search_index(entries: Sequence[ManifestEntry],
+                       output_dir: Path) -> Path:
+    """
+    Write the search index of converted entries to OUTPUT_DIR/search.
+
+    Raises:
+        ValueError: If an entry was converted without search terms
+    """
+    from .search import INDEX_DIR, SearchIndexBuilder
+
+    builder = SearchIndexBuilder()
+    for entry in sorted(entries, key=lambda entry: entry.source):
+        if entry.error is not None:
+            continue
+        if entry.terms is None:
+            raise ValueError(f"{entry.source} has no search terms; convert "
+                             f"with --search-index")
+        builder.add(entry.output, entry.title, entry.terms)
+    directory = Path(output_dir) / INDEX_DIR
+    builder.write(directory)
+    return directory
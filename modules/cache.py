@@ -0,0 +1,282 @@
+"""Cross-run conversion cache.
+
+Automation re-converts the same text with the same settings over and over.
+The cache keeps finished documents keyed by a hash of the text the pipeline
+sees and every setting that shapes the output, so a repeated conversion is
+a hash plus a hard link.
+
+Entries live at ``<first two hex digits of the key>/<rest>-<digest>.html``,
+where ``digest`` identifies the entry's content. Outputs are hard links to
+entries where the filesystem allows it, and an output rewritten in place
+would rewrite its entry as well, so each entry is checked against its
+digest before it is used. Entries are written to temporary files and
+renamed into place, so concurrent processes never see a partial entry, and
+the least recently used entries are evicted once the cache outgrows its
+size limit.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO
+
+from .fileutil import _replace, _same_content, file_digest
+
+DEFAULT_MAX_BYTES = 256 << 20
+
+# Hex digits of the content digest kept in entry names
+_DIGEST_CHARS = 32
+_SUFFIX = '.html'
+# Temporary files older than this were left by a crashed writer
+_STALE_SECONDS = 3600
+
+
+def _content_digest(path: Path) -> Optional[str]:
+    digest = file_digest(path)
+    return None if digest is None else digest.hex()[:_DIGEST_CHARS]
+
+
+def conversion_key(lines: Iterable[str], settings: Dict) -> str:
+    """
+    Return the cache key for converting a document with ``settings``.
+
+    ``lines`` is the text the pipeline sees, as lines without newlines;
+    ``settings`` must be JSON-serializable.
+    """
+    key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    key.update(b'\0')
+    separator = b''
+    for line in lines:
+        key.update(separator)
+        key.update(line.encode('utf-8'))
+        separator = b'\n'
+    return key.hexdigest()
+
+
+class CacheWriter:
+    """A cache entry written incrementally as a text file.
+
+    Content goes to a temporary file that is renamed to the entry on a
+    clean exit; ``path`` is then the entry's path.
+    """
+
+    def __init__(self, cache: 'ConversionCache', key: str):
+        self.cache = cache
+        self.key = key
+        self.path: Optional[Path] = None
+        self._file = None
+        self._tmp_name = None
+
+    def __enter__(self) -> TextIO:
+        directory = self.cache.root / self.key[:2]
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp_name = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._file.close()
+        if exc_type is not None:
+            os.unlink(self._tmp_name)
+            return
+        try:
+            self.path = self.cache._store(self.key, Path(self._tmp_name))
+        except BaseException:
+            os.unlink(self._tmp_name)
+            raise
+        self.cache.evict(keep=self.path)
+
+
+class ConversionCache:
+    """A size-bounded directory of converted documents, shared by processes."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        # Absolute, so entry paths compare equal however they were built
+        self.root = Path(root).absolute()
+        self.max_bytes = max_bytes
+
+    def _entries(self, key: str) -> List[Path]:
+        """Return the entries stored under a key, normally at most one."""
+        prefix = key[2:] + '-'
+        try:
+            names = os.listdir(self.root / key[:2])
+        except FileNotFoundError:
+            return []
+        return [self.root / key[:2] / name for name in names
+                if name.startswith(prefix) and name.endswith(_SUFFIX)]
+
+    @staticmethod
+    def _digest_of(entry: Path) -> str:
+        return entry.name[:-len(_SUFFIX)].rpartition('-')[2]
+
+    def _store(self, key: str, tmp_path: Path) -> Path:
+        """Rename a finished temporary file to the entry for ``key``."""
+        entry = tmp_path.parent / f"{key[2:]}-{_content_digest(tmp_path)}{_SUFFIX}"
+        _replace(str(tmp_path), entry)
+        # A concurrent or earlier conversion may have stored other content
+        for other in self._entries(key):
+            if other != entry:
+                self._discard(other)
+        return entry
+
+    @staticmethod
+    def _discard(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _touch(entry: Path) -> None:
+        # Recency lives in the access time: the modification time is shared
+        # with every output linked to the entry and must not change
+        try:
+            st = entry.stat()
+            os.utime(entry, ns=(time.time_ns(), st.st_mtime_ns))
+        except FileNotFoundError:
+            pass
+
+    def writer(self, key: str) -> CacheWriter:
+        """Return a context manager that stores the text written to it."""
+        return CacheWriter(self, key)
+
+    def put(self, key: str, html: str) -> Path:
+        """Store a converted document and return its entry."""
+        writer = self.writer(key)
+        with writer as output:
+            output.write(html)
+        return writer.path
+
+    def add(self, key: str, path: Path) -> Path:
+        """Store a copy of a converted file and return its entry."""
+        directory = self.root / key[:2]
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp_name)
+            entry = self._store(key, Path(tmp_name))
+        except BaseException:
+            self._discard(Path(tmp_name))
+            raise
+        self.evict(keep=entry)
+        return entry
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Return a stored document's content, or None on a miss."""
+        for entry in self._entries(key):
+            try:
+                data = entry.read_bytes()
+            except FileNotFoundError:
+                continue
+            digest = hashlib.blake2b(data).hexdigest()[:_DIGEST_CHARS]
+            if digest != self._digest_of(entry):
+                self._discard(entry)
+                continue
+            self._touch(entry)
+            return data
+        return None
+
+    def fetch(self, key: str, dest: Path,
+              skip_unchanged: bool = False) -> Optional[bool]:
+        """
+        Put a stored document at ``dest``, as a hard link where possible.
+
+        ``dest`` is replaced atomically. Linked outputs share the entry's
+        modification time.
+
+        Args:
+            skip_unchanged: Leave ``dest`` alone if it already holds the
+                document
+
+        Returns:
+            None on a miss; otherwise whether ``dest`` was written
+        """
+        dest = Path(dest)
+        for entry in self._entries(key):
+            digest = self._digest_of(entry)
+            tmp_name = str(dest.parent / f".tmp-{secrets.token_hex(8)}")
+            try:
+                # The link pins the entry's content even if it is evicted
+                # meanwhile
+                os.link(entry, tmp_name)
+                linked = True
+            except FileNotFoundError:
+                continue
+            except OSError:
+                # Another filesystem, or links not supported
+                try:
+                    shutil.copyfile(entry, tmp_name)
+                except FileNotFoundError:
+                    self._discard(Path(tmp_name))
+                    continue
+                linked = False
+
+            try:
+                if _content_digest(Path(tmp_name)) != digest:
+                    # Rewritten in place through a linked output
+                    self._discard(entry)
+                    continue
+                self._touch(entry)
+                if skip_unchanged and _same_content(
+                        dest, os.path.getsize(tmp_name), file_digest(tmp_name)):
+                    return False
+                if linked:
+                    os.replace(tmp_name, dest)
+                else:
+                    _replace(tmp_name, dest)
+                return True
+            finally:
+                self._discard(Path(tmp_name))
+        return None
+
+    def size(self) -> int:
+        """Return the total size of the stored entries in bytes."""
+        return sum(st.st_size for _, st in self._scan())
+
+    def _scan(self):
+        """Yield (path, stat) for every entry, removing stale temporaries."""
+        if not self.root.is_dir():
+            return
+        stale = time.time() - _STALE_SECONDS
+        for directory in self.root.iterdir():
+            if not directory.is_dir():
+                continue
+            for item in os.scandir(directory):
+                try:
+                    st = item.stat()
+                except FileNotFoundError:
+                    continue
+                if item.name.startswith('.tmp-'):
+                    if st.st_mtime < stale:
+                        self._discard(Path(item.path))
+                elif item.name.endswith(_SUFFIX):
+                    yield Path(item.path), st
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits its limit.
+
+        ``keep``, normally the entry just stored, is never removed, even
+        if it alone is over the limit.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = sorted(self._scan(), key=lambda entry: entry[1].st_atime_ns)
+        total = sum(st.st_size for _, st in entries)
+        removed = 0
+        for path, st in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._discard(path)
+            total -= st.st_size
+            removed += 1
+        return removed
@@ -6,6 +6,10 @@ VERSION = "1.0.0"
 HIGHLIGHT_JS_VERSION = "10.0.3"
 MATHJAX_VERSION = "3"
 
+# Template variants: 'fast' keeps third-party resources off the critical
+# rendering path (see HTMLGenerator)
+TEMPLATES = ('default', 'fast')
+
 # Font settings
 DEFAULT_FONTS = {
     'main_font': "'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif",
@@ -15,6 +19,11 @@ DEFAULT_FONTS = {
     'code_font_size': "14px"
 }
 
+# Fenced code blocks longer than this are split into chunks that the page
+# materializes and highlights on scroll (see MarkdownProcessor)
+LARGE_CODE_BLOCK_LINES = 1000
+CODE_CHUNK_LINES = 250
+
 # Math delimiters
 INLINE_MATH_DELIMITERS = ['$', '$']
 DISPLAY_MATH_DELIMITERS = [['$$', '$$'], ['\\[', '\\]']]
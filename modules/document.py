@@ -0,0 +1,137 @@
+"""Shared document buffer module.
+
+A ``Document`` is one immutable string plus an array of line start
+offsets. Stages read lines as lazy slices, and record changes as
+``LineReplacement`` annotations, instead of splitting and re-joining
+the whole text at every step.
+"""
+
+from array import array
+from bisect import bisect_right
+from itertools import repeat
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+# Offsets are str indices; 'I' holds up to 4G characters in 4 bytes each
+_MAX_SMALL_OFFSET = 2 ** 32 - 1
+
+# Window used to find strip() bounds without copying the whole text
+_STRIP_WINDOW = 4096
+
+
+def normalize_newlines(text: str) -> str:
+    """Translate '\\r\\n' and bare '\\r' line breaks to '\\n', as reading a
+    file in text mode would."""
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class LineReplacement(NamedTuple):
+    """Replace lines ``first`` up to (not including) ``stop`` with ``text``."""
+    first: int
+    stop: int
+    text: str
+
+
+class Document:
+    """An immutable text with an index of its line start offsets.
+
+    Lines are the pieces ``text[start:end].split('\\n')`` would produce,
+    but none is materialized until it is read.
+    """
+
+    __slots__ = ('text', 'start', 'end', 'offsets')
+
+    def __init__(self, text: str, start: int = 0, end: Optional[int] = None):
+        """
+        Args:
+            text: The full text; it is referenced, never copied
+            start: Index where the document begins within ``text``
+            end: Index where it ends (default: the end of ``text``)
+        """
+        self.text = text
+        self.start = start
+        self.end = len(text) if end is None else end
+        self.offsets = array('I' if self.end <= _MAX_SMALL_OFFSET else 'Q',
+                             [start])
+
+        find = text.find
+        append = self.offsets.append
+        position = find('\n', start, self.end)
+        while position != -1:
+            append(position + 1)
+            position = find('\n', position + 1, self.end)
+
+    @classmethod
+    def stripped(cls, text: str) -> 'Document':
+        """Return the document ``text.strip()`` would give, without the copy."""
+        start = 0
+        window = _STRIP_WINDOW
+        while start < len(text):
+            head = text[start:start + window]
+            kept = head.lstrip()
+            if kept:
+                start += len(head) - len(kept)
+                break
+            start += len(head)
+            window *= 2
+
+        end = len(text)
+        window = _STRIP_WINDOW
+        while end > start:
+            tail = text[max(start, end - window):end]
+            kept = tail.rstrip()
+            if kept:
+                end -= len(tail) - len(kept)
+                break
+            end -= len(tail)
+            window *= 2
+
+        return cls(text, start, end)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def line(self, index: int) -> str:
+        """Return one line, without its newline."""
+        offsets = self.offsets
+        line_start = offsets[index]
+        if index + 1 < len(offsets):
+            return self.text[line_start:offsets[index + 1] - 1]
+        return self.text[line_start:self.end]
+
+    def line_at(self, position: int) -> int:
+        """Return the index of the line containing a text position."""
+        return bisect_right(self.offsets, position) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_lines()
+
+    def iter_lines(self, first: int = 0,
+                   replacements: Sequence[LineReplacement] = ()) -> Iterator[str]:
+        """
+        Lazily yield lines from ``first`` on, applying replacements.
+
+        Replacements must be sorted and must not overlap.
+        """
+        pending = [r for r in replacements if r.first >= first]
+        index = first
+        for replacement in pending:
+            yield from self._slices(index, replacement.first)
+            yield replacement.text
+            index = replacement.stop
+        yield from self._slices(index, len(self.offsets))
+
+    def _slices(self, first: int, stop: int) -> Iterator[str]:
+        """Yield lines ``first`` up to ``stop``, slicing at C speed."""
+        if first >= stop:
+            return
+        offsets = self.offsets
+        last = len(offsets) - 1
+        starts = offsets[first:stop]
+        # Each line ends one before the next line's start
+        ends = map(int.__sub__, offsets[first + 1:stop + 1], repeat(1))
+        yield from map(self.text.__getitem__, map(slice, starts, ends))
+        if stop > last:
+            # The last line ends at the end of the document
+            yield self.text[offsets[last]:self.end]
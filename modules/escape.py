@@ -0,0 +1,32 @@
+"""HTML escaping module.
+
+Text taken from the input must reach the page as text: a ``<`` in pasted
+code or prose otherwise opens a tag and the browser builds a broken DOM.
+
+Most prose lines contain no special characters, so a membership check
+returns them unchanged; the rest go through chained ``str.replace`` calls,
+each one C-level pass over the string. ``str.translate`` with a table of
+multi-character replacements maps one code point at a time and measured
+several times slower than ``html.escape`` (see ``python -m benchmarks
+escape``).
+"""
+
+# Replacements in the order they must be applied: '&' first, so the
+# entities the others introduce are not escaped again
+TEXT_ENTITIES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'))
+ATTRIBUTE_ENTITIES = TEXT_ENTITIES + (('"', '&quot;'), ("'", '&#x27;'))
+
+
+def escape_text(text: str) -> str:
+    """Escape ``&``, ``<`` and ``>`` for an HTML text node."""
+    if '&' in text or '<' in text or '>' in text:
+        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return text
+
+
+def escape_attribute(text: str) -> str:
+    """Escape text for a quoted HTML attribute value."""
+    text = escape_text(text)
+    if '"' in text or "'" in text:
+        return text.replace('"', '&quot;').replace("'", '&#x27;')
+    return text
@@ -0,0 +1,109 @@
+"""Change-aware output writing.
+
+Rewriting a file with identical bytes still bumps its mtime, so rsync,
+backups and static-site deploys copy it again. These helpers compare the
+new content with what is on disk and leave unchanged files alone; files
+that do change are replaced atomically.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, TextIO, Union
+
+# Read size when hashing existing files
+_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: Path) -> Optional[bytes]:
+    """Return the BLAKE2b digest of a file, or None if it does not exist."""
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.digest()
+
+
+def _same_content(path: Path, size: int, digest: bytes) -> bool:
+    try:
+        if path.stat().st_size != size:
+            return False
+    except FileNotFoundError:
+        return False
+    return file_digest(path) == digest
+
+
+def _replace(tmp_name: str, path: Path) -> None:
+    # mkstemp creates files readable only by the owner
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp_name, 0o666 & ~umask)
+    os.replace(tmp_name, path)
+
+
+def write_if_changed(path: Path, data: Union[str, bytes],
+                     encoding: str = 'utf-8') -> bool:
+    """
+    Write data to a file unless it already holds exactly that content.
+
+    Returns:
+        bool: True if the file was written, False if it was left alone
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    if _same_content(path, len(data), hashlib.blake2b(data).digest()):
+        return False
+
+    # Write to a temporary file and rename so readers never observe a
+    # partially written output
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        _replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return True
+
+
+class ChangeAwareFile:
+    """A text file written incrementally, replacing ``path`` only if changed.
+
+    Content goes to a temporary file next to ``path``; on a clean exit it
+    is compared with ``path`` and either renamed over it or discarded.
+    ``changed`` tells which happened.
+    """
+
+    def __init__(self, path: Path, encoding: str = 'utf-8'):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.changed: Optional[bool] = None
+        self._file = None
+        self._tmp_name = None
+
+    def __enter__(self) -> TextIO:
+        fd, self._tmp_name = tempfile.mkstemp(dir=self.path.parent,
+                                              prefix='.tmp-')
+        self._file = os.fdopen(fd, 'w', encoding=self.encoding)
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._file.close()
+        try:
+            if exc_type is None:
+                size = os.path.getsize(self._tmp_name)
+                digest = file_digest(self._tmp_name)
+                self.changed = not _same_content(self.path, size, digest)
+                if self.changed:
+                    _replace(self._tmp_name, self.path)
+                    return
+        except BaseException:
+            os.unlink(self._tmp_name)
+            raise
+        os.unlink(self._tmp_name)
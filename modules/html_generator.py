@@ -1,11 +1,85 @@
 """HTML generation module."""
 
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional, TextIO
 from pathlib import Path
-import json
-from datetime import datetime
-from dataclasses import dataclass
+from functools import cached_property
+from dataclasses import dataclass, field
+import os
+import time
 from . import config
+from .document import Document
+from .escape import escape_text
+from .instrumentation import NULL_METRICS
+
+
+# Placeholder used to split the formatted template around the content
+_CONTENT_MARKER = '\x00content\x00'
+
+# Headers that open an indented section, and the class of their content
+SECTION_HEADERS = ('<h1', '<h2', '<h3', '<h4')
+_INDENT_CLASSES = {header[2]: f"indent-h{header[2]}" for header in SECTION_HEADERS}
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+TEMPLATES = config.TEMPLATES
+
+_FONTS_URL = ("https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600"
+              "&family=Fira+Code&display=swap")
+_HIGHLIGHT_URL = "https://cdnjs.cloudflare.com/ajax/libs/highlight.js/{highlightjs_version}"
+
+# Replaces the default head's stylesheets and scripts. Stylesheets are
+# preloaded and applied once fetched, fonts swap in when they arrive
+# (display=swap), and the deferred highlight.js has run by
+# DOMContentLoaded, whose handler highlights code before touching the
+# async MathJax; initHighlightingOnLoad would only highlight twice.
+_FAST_HEAD = f'''    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link rel="preconnect" href="https://cdnjs.cloudflare.com">
+    <link rel="preconnect" href="https://cdn.jsdelivr.net">
+    <link rel="preload" as="style" href="{_FONTS_URL}" onload="this.onload=null;this.rel='stylesheet'">
+    <link rel="preload" as="style" href="{_HIGHLIGHT_URL}/styles/default.min.css" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript>
+        <link rel="stylesheet" href="{_FONTS_URL}">
+        <link rel="stylesheet" href="{_HIGHLIGHT_URL}/styles/default.min.css">
+    </noscript>
+    <script defer src="{_HIGHLIGHT_URL}/highlight.min.js"></script>
+'''
+
+_FAST_CSS = '''        /* Long code blocks skip layout and paint until scrolled near */
+        pre {{
+            content-visibility: auto;
+            contain-intrinsic-size: auto 20em;
+        }}
+'''
+
+
+def format_timestamp(epoch: int) -> str:
+    """Format a Unix time as a UTC template timestamp."""
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(epoch))
+
+
+def reproducible_timestamp() -> str:
+    """
+    Return the fixed build time used for reproducible output.
+
+    Honors ``SOURCE_DATE_EPOCH`` (https://reproducible-builds.org/specs/
+    source-date-epoch/) and falls back to the Unix epoch when it is unset.
+    """
+    value = os.environ.get('SOURCE_DATE_EPOCH', '0')
+    try:
+        epoch = int(value)
+    except ValueError:
+        raise ValueError(
+            f"SOURCE_DATE_EPOCH must be an integer, got {value!r}") from None
+    return format_timestamp(epoch)
+
+
+def current_timestamp() -> str:
+    """Return the generation time, or SOURCE_DATE_EPOCH when it is set."""
+    if 'SOURCE_DATE_EPOCH' in os.environ:
+        return reproducible_timestamp()
+    return time.strftime(TIMESTAMP_FORMAT)
 
 
 @dataclass
@@ -14,7 +88,7 @@ class HTMLTemplate:
     title: str
     content: str
     version: str = config.VERSION
-    timestamp: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp: str = field(default_factory=current_timestamp)
     fonts: Dict = None
 
     def __post_init__(self):
@@ -25,8 +99,39 @@ class HTMLTemplate:
 class HTMLGenerator:
     """Generates HTML documents with MathJax and syntax highlighting."""
 
-    def __init__(self):
-        self.template = self._load_base_template()
+    def __init__(self, template_name: str = 'default'):
+        """
+        Args:
+            template_name: Template variant, one of ``TEMPLATES``
+        """
+        if template_name not in TEMPLATES:
+            raise ValueError(f"Unknown template: {template_name}")
+        self.template_name = template_name
+        # Document counters; replaced by PipelineMetrics when enabled
+        self.metrics = NULL_METRICS
+        # Leave outputs whose content is unchanged untouched; only useful
+        # when the output is deterministic (a fixed timestamp)
+        self.skip_unchanged = False
+
+    @cached_property
+    def template(self) -> str:
+        """The selected template, loaded on first use."""
+        if self.template_name == 'fast':
+            return self._load_fast_template()
+        return self._load_base_template()
+
+    def _load_fast_template(self) -> str:
+        """
+        Load the base template tuned for first paint.
+
+        Only the page's own CSS stays inline and blocking; fonts, the
+        highlight.js theme and script load without blocking rendering.
+        """
+        base = self._load_base_template()
+        start = base.index('    <!-- Add Google Fonts -->')
+        end = base.index('    <style>')
+        template = base[:start] + _FAST_HEAD + base[end:]
+        return template.replace('    </style>', _FAST_CSS + '    </style>', 1)
 
     def _load_base_template(self) -> str:
         """Load the base HTML template."""
@@ -112,6 +217,16 @@ class HTMLGenerator:
             text-decoration: line-through;
             color: #666;
         }}
+        .code-virtual pre code {{
+            display: block;
+            padding: 0;
+        }}
+        .code-toolbar {{
+            text-indent: 0;
+        }}
+        .code-toolbar button {{
+            margin-right: 8px;
+        }}
         .footer {{
             margin-top: 2em;
             padding-top: 1em;
@@ -132,6 +247,12 @@ class HTMLGenerator:
             svg: {{
                 fontCache: 'global'
             }},
+            startup: {{
+                // MathJax typesets the page itself once loaded; it is
+                // async, so that may be after DOMContentLoaded
+                pageReady: () => MathJax.startup.defaultPageReady()
+                    .then(() => markMath([document]))
+            }},
             options: {{
                 renderActions: {{
                     addMenu: []
@@ -155,39 +276,96 @@ class HTMLGenerator:
     </div>
 
     <script type="text/javascript">
-        function renderMath() {{
-            MathJax.typeset().then(() => {{
-                document.querySelectorAll("mjx-container").forEach(container => {{
-                    if (container.parentNode.tagName === "P") {{
-                        container.classList.add("inline");
-                    }} else {{
-                        container.classList.add("display");
+        function markMath(roots) {{
+            roots.forEach(root => root.querySelectorAll("mjx-container").forEach(container => {{
+                if (container.parentNode.tagName === "P") {{
+                    container.classList.add("inline");
+                }} else {{
+                    container.classList.add("display");
+                }}
+            }}));
+        }}
+
+        // Typesets the whole page, or only the given elements. Until the
+        // async MathJax script has loaded there is nothing to call; its
+        // startup pageReady hook typesets the page instead.
+        function renderMath(elements) {{
+            if (!(window.MathJax && MathJax.typesetPromise)) {{
+                return;
+            }}
+            MathJax.typesetPromise(elements).then(() => {{
+                markMath(elements || [document]);
+            }}).catch(function (err) {{
+                console.error(err.message);
+            }});
+        }}
+
+        // Large code blocks keep most chunks in <template> elements until needed
+        function hydrateChunk(block, highlight) {{
+            const template = block.querySelector("template.code-chunk");
+            if (!template) {{
+                return false;
+            }}
+            const code = document.createElement("code");
+            code.className = "language-" + block.dataset.language;
+            code.textContent = template.content.textContent;
+            template.remove();
+            block.querySelector("pre").appendChild(code);
+            if (highlight && window.hljs) {{
+                hljs.highlightBlock(code);
+            }}
+            return true;
+        }}
+
+        function blockText(block) {{
+            let text = "";
+            block.querySelectorAll("pre code").forEach(code => {{ text += code.textContent; }});
+            block.querySelectorAll("template.code-chunk").forEach(template => {{
+                text += template.content.textContent;
+            }});
+            return text;
+        }}
+
+        function setupLargeCodeBlocks(root) {{
+            const observer = new IntersectionObserver(entries => {{
+                entries.forEach(entry => {{
+                    if (!entry.isIntersecting) {{
+                        return;
+                    }}
+                    const block = entry.target.parentElement;
+                    observer.unobserve(entry.target);
+                    if (hydrateChunk(block, true)) {{
+                        // Observing again re-checks whether the sentinel is still in view
+                        observer.observe(entry.target);
                     }}
                 }});
+            }}, {{rootMargin: "1000px 0px"}});
 
-                document.querySelectorAll("mjx-container.display").forEach(container => {{
-                    const parent = container.parentElement;
-                    if (parent && parent.tagName === "DIV" && parent.classList.contains("content-preserve")) {{
-                        let indentLevel = 0;
-                        let currentClass = parent.className;
-                        while (currentClass.includes(`indent-h${{parseInt(currentClass.split('-')[1]) + 1}}`)) {{
-                            indentLevel++;
-                            currentClass = currentClass.replace(`indent-h${{parseInt(currentClass.split('-')[1]) + 1}}`, '');
-                        }}
-                        container.style.marginLeft = `${{indentLevel * 20}}px`;
-                    }}
+            (root || document).querySelectorAll(".code-virtual").forEach(block => {{
+                observer.observe(block.querySelector(".code-sentinel"));
+                block.querySelector(".code-show-all").addEventListener("click", event => {{
+                    // Unhighlighted, so even huge blocks become searchable at once
+                    while (hydrateChunk(block, false)) {{}}
+                    event.target.disabled = true;
+                }});
+                block.querySelector(".code-copy").addEventListener("click", event => {{
+                    navigator.clipboard.writeText(blockText(block)).then(() => {{
+                        event.target.textContent = "Copied";
+                    }});
                 }});
-            }}).catch(function (err) {{
-                console.error(err.message);
             }});
         }}
 
+        // Code first: neither step may wait for, or fail with, MathJax
         document.addEventListener("DOMContentLoaded", function() {{
-            renderMath();
             // Process any code blocks for syntax highlighting
-            document.querySelectorAll('pre code').forEach((block) => {{
-                hljs.highlightBlock(block);
-            }});
+            if (window.hljs) {{
+                document.querySelectorAll('pre code').forEach((block) => {{
+                    hljs.highlightBlock(block);
+                }});
+            }}
+            setupLargeCodeBlocks();
+            renderMath();
         }});
     </script>
 </body>
@@ -196,11 +374,49 @@ class HTMLGenerator:
 
     def generate(self, template_data: HTMLTemplate) -> str:
         """Generate HTML from template and data."""
+        html = self._format(template_data, template_data.content)
+        self.metrics.documents.inc()
+        if self.metrics.enabled:
+            self.metrics.bytes_out.inc(amount=len(html.encode('utf-8')))
+        return html
+
+    def write(self, template_data: HTMLTemplate, content_lines: Iterable[str],
+              stream: TextIO, custom_styles: Optional[Dict] = None) -> None:
+        """
+        Write a document to a stream, consuming content lines incrementally.
+
+        Produces the same output as ``generate`` with ``content`` set to
+        the newline-joined lines, without building the document in memory.
+        """
+        head, tail = self._format(template_data, _CONTENT_MARKER).split(
+            _CONTENT_MARKER)
+        if custom_styles:
+            head = self.apply_custom_styles(head, custom_styles)
+
+        count_bytes = self.metrics.enabled
+        written = 0
+
+        stream.write(head)
+        separator = ''
+        for line in content_lines:
+            stream.write(separator)
+            stream.write(line)
+            if count_bytes:
+                written += len(separator) + len(line.encode('utf-8'))
+            separator = '\n'
+        stream.write(tail)
+
+        self.metrics.documents.inc()
+        if count_bytes:
+            written += len(head.encode('utf-8')) + len(tail.encode('utf-8'))
+            self.metrics.bytes_out.inc(amount=written)
+
+    def _format(self, template_data: HTMLTemplate, content: str) -> str:
         return self.template.format(
             version=template_data.version,
             timestamp=template_data.timestamp,
-            title=template_data.title,
-            content=template_data.content,
+            title=escape_text(template_data.title),
+            content=content,
             highlightjs_version=config.HIGHLIGHT_JS_VERSION,
             mathjax_version=config.MATHJAX_VERSION,
             main_font=template_data.fonts['main_font'],
@@ -210,9 +426,18 @@ class HTMLGenerator:
             code_font_size=template_data.fonts['code_font_size']
         )
 
-    def save(self, html: str, output_path: Path) -> None:
-        """Save HTML content to file."""
+    def save(self, html: str, output_path: Path) -> bool:
+        """
+        Save HTML content to file.
+
+        Returns:
+            bool: False if ``skip_unchanged`` left an identical file alone
+        """
+        if self.skip_unchanged:
+            from .fileutil import write_if_changed
+            return write_if_changed(output_path, html)
         output_path.write_text(html, encoding='utf-8')
+        return True
 
     def apply_custom_styles(self, html: str, custom_styles: Dict) -> str:
         """Apply custom CSS styles to the HTML."""
@@ -222,16 +447,26 @@ class HTMLGenerator:
 
     def wrap_content(self, content: str) -> str:
         """Wrap content in appropriate div structure."""
-        lines = content.split('\n')
-        wrapped_lines = []
-        indent_class = "indent-h1"
-
-        for line in lines:
-            if line.startswith(('<h1', '<h2', '<h3', '<h4')):
-                wrapped_lines.append(line)
-            else:
-                wrapped_lines.append(
-                    f'<div class="{indent_class} content-preserve">{line}</div>'
-                )
-
-        return '\n'.join(wrapped_lines)
\ No newline at end of file
+        return '\n'.join(self.iter_wrap(Document(content)))
+
+    def iter_wrap(self, chunks: Iterable[str], level: int = 1) -> Iterator[str]:
+        """
+        Lazily wrap content; chunks may themselves span several lines.
+
+        Content is indented to the level of the header above it, starting
+        at ``level``, so pages need no layout pass once loaded.
+        """
+        indent_class = f"indent-h{level}"
+
+        empty = True
+        for chunk in chunks:
+            empty = False
+            for line in chunk.split('\n') if '\n' in chunk else (chunk,):
+                if line.startswith(SECTION_HEADERS):
+                    indent_class = _INDENT_CLASSES[line[2]]
+                    yield line
+                else:
+                    yield f'<div class="{indent_class} content-preserve">{line}</div>'
+        if empty:
+            # Wrapping '' gives one empty line, like wrap_content
+            yield f'<div class="{indent_class} content-preserve"></div>'
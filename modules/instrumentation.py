@@ -0,0 +1,98 @@
+"""Pipeline instrumentation points and their no-op defaults.
+
+Every conversion imports this module, so it depends on nothing beyond
+``typing``; the registries that record and export measurements load only
+when they are enabled.
+"""
+
+from typing import Sequence
+
+
+class _NullMetric:
+    """Counter/histogram stand-in that records nothing."""
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        pass
+
+    def observe(self, value: float, *labelvalues) -> None:
+        pass
+
+
+class NullRegistry:
+    """Registry that hands out no-op metrics; the default when disabled."""
+
+    enabled = False
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> _NullMetric:
+        return _NULL_METRIC
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = ()) -> _NullMetric:
+        return _NULL_METRIC
+
+
+_NULL_METRIC = _NullMetric()
+
+
+class PipelineMetrics:
+    """The metrics recorded by the conversion pipeline.
+
+    Without a registry, a ``metrics.MetricsRegistry`` is created.
+    """
+
+    def __init__(self, registry=None):
+        if registry is None:
+            from .metrics import MetricsRegistry
+            registry = MetricsRegistry()
+        self.registry = registry
+        self.enabled = self.registry.enabled
+
+        self.documents = self.registry.counter(
+            'htmlclip_documents_total', 'Documents converted')
+        self.bytes_in = self.registry.counter(
+            'htmlclip_input_bytes_total', 'UTF-8 bytes of input text')
+        self.bytes_out = self.registry.counter(
+            'htmlclip_output_bytes_total', 'UTF-8 bytes of generated HTML')
+        self.blocks = self.registry.counter(
+            'htmlclip_markdown_blocks_total', 'Markdown blocks by type',
+            ['type'])
+        self.math_spans = self.registry.counter(
+            'htmlclip_math_spans_total', 'Math spans by kind', ['kind'])
+        self.code_blocks = self.registry.counter(
+            'htmlclip_code_blocks_total', 'Fenced code blocks by language',
+            ['language'])
+        self.stage_seconds = self.registry.histogram(
+            'htmlclip_stage_seconds', 'Pipeline stage latency', ['stage'])
+
+
+NULL_METRICS = PipelineMetrics(NullRegistry())
+
+
+class _NullStage:
+    """Memory accounting context that records nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullMemoryProfiler:
+    """Profiler that records nothing; the default when reporting is off."""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        """Return a context manager that does nothing."""
+        return _NULL_STAGE
+
+
+NULL_MEMORY = NullMemoryProfiler()
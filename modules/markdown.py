@@ -0,0 +1,318 @@
+"""Markdown processing module."""
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+import re
+
+from . import config
+from .document import Document
+from .escape import escape_text
+from .instrumentation import NULL_METRICS
+from .tracing import NULL_TRACER
+
+
+@dataclass
+class MarkdownBlock:
+    """Represents a block-level markdown element."""
+    type: str  # 'header', 'list', 'code', 'blockquote', 'paragraph'
+    content: str
+    level: int = 0  # For headers (1-6) or list nesting level
+    language: str = ''  # For code blocks
+
+
+class MarkdownProcessor:
+    """Processes markdown formatting while preserving math blocks."""
+
+    # Every line renders on its own except fenced code, so previews can
+    # re-render single blocks
+    line_oriented = True
+
+    def __init__(self):
+        # Block-level patterns
+        self.header_pattern = re.compile(r'^(#{1,4})\s+(.+)$')
+        self.blockquote_pattern = re.compile(r'^>\s*(.*)$')
+        self.list_pattern = re.compile(r'^(\s*)([-*]|\d+\.)\s+(.+)$')
+        self.code_block_pattern = re.compile(r'^```(\w*)$')
+
+        # Inline patterns
+        self.bold_italic_pattern = re.compile(r'\*\*\*([^*]+)\*\*\*')
+        self.bold_pattern = re.compile(r'\*\*([^*]+)\*\*')
+        self.italic_pattern = re.compile(r'\*([^*]+)\*')
+        self.inline_code_pattern = re.compile(r'`([^`]+)`')
+        self.strikethrough_pattern = re.compile(r'~~([^~]+)~~')
+        # Link text and targets exclude their own delimiters so an unmatched
+        # '[' or '](' fails at the next bracket instead of rescanning the line
+        self.link_pattern = re.compile(r'\[([^\[\]]+)\]\(([^()]+)\)')
+        # Bare URLs, but not the target or text of a link made above; the
+        # text is escaped by then, so they end at an escaped '<' or '>'
+        self.url_pattern = re.compile(
+            r'(?<!href=")(?<!">)(https?://(?:[^\s<&]|&(?!lt;|gt;))+)')
+        # Math spans in every delimiter MathJax reads, kept out of markup
+        self.math_pattern = re.compile(
+            r'\$\$.+?\$\$|\\\[.+?\\\]|\\\(.+?\\\)|\$[^$]+\$')
+        self.placeholder_pattern = re.compile(r'\x00(\d+)\x00')
+
+        # Characters that can start a block, and markup an inline pass can
+        # act on; lines without them skip the corresponding regexes
+        self.block_start_chars = frozenset('#>`-*0123456789')
+        self.inline_markup_pattern = re.compile(r'[*`~\[]|https?://')
+
+        # Code blocks above this many lines are emitted in lazy chunks
+        self.large_code_lines = config.LARGE_CODE_BLOCK_LINES
+        self.code_chunk_lines = config.CODE_CHUNK_LINES
+
+        # Per-block timing spans and counters; replaced when enabled
+        self.tracer = NULL_TRACER
+        self.metrics = NULL_METRICS
+
+    def process(self, content: str) -> str:
+        """Process markdown content while preserving math blocks."""
+        if not isinstance(content, str):
+            # The error process() raised before it used Document
+            raise AttributeError(f"Markdown content must be a string, "
+                                 f"not {type(content).__name__}")
+        return '\n'.join(self.iter_process(Document(content)))
+
+    def iter_process(self, lines: Iterable[str]) -> Iterator[str]:
+        """Lazily process markdown lines, yielding HTML as blocks complete."""
+        tracer = self.tracer
+        blocks = self.metrics.blocks
+        current_block = None
+        block_content = []
+
+        for line in lines:
+            if current_block is None:
+                # Check for new block start
+                block = self._identify_block(line)
+                if block:
+                    if block.type == 'code':
+                        # Start collecting code block content
+                        current_block = block
+                        continue
+                    # Other blocks are single-line
+                    blocks.inc(block.type)
+                    with tracer.span(block.type, 'markdown'):
+                        html = self._process_block(block)
+                    yield html
+                else:
+                    # Process as regular line
+                    blocks.inc('paragraph')
+                    with tracer.span('paragraph', 'markdown'):
+                        html = self._process_inline(line)
+                    yield html
+            else:
+                # Handle continuing blocks
+                if current_block.type == 'code':
+                    if line.strip() == '```':
+                        # End of code block
+                        blocks.inc('code')
+                        self.metrics.code_blocks.inc(
+                            current_block.language or 'plaintext')
+                        with tracer.span('code', 'markdown'):
+                            html = self._format_code_block(
+                                block_content,
+                                current_block.language
+                            )
+                        yield html
+                        current_block = None
+                        block_content = []
+                    else:
+                        block_content.append(line)
+                    continue
+
+            # Add empty line for readability
+            if not line.strip():
+                yield '<br>'
+
+    def iter_plain(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Pass through lines known to contain no markup.
+
+        Produces exactly what ``iter_process`` would for such lines: each
+        line unchanged, with a '<br>' after blank lines.
+        """
+        blocks = self.metrics.blocks
+        for line in lines:
+            blocks.inc('paragraph')
+            yield line
+            if not line.strip():
+                yield '<br>'
+
+    def _identify_block(self, line: str) -> Optional[MarkdownBlock]:
+        """Identify the type of markdown block."""
+        first = line[:1]
+        if first not in self.block_start_chars and not first.isspace():
+            return None
+
+        # Check for headers
+        header_match = self.header_pattern.match(line)
+        if header_match:
+            level = len(header_match.group(1))
+            return MarkdownBlock('header', header_match.group(2), level)
+
+        # Check for blockquotes
+        blockquote_match = self.blockquote_pattern.match(line)
+        if blockquote_match:
+            return MarkdownBlock('blockquote', blockquote_match.group(1))
+
+        # Check for code blocks
+        code_match = self.code_block_pattern.match(line)
+        if code_match:
+            return MarkdownBlock('code', '', language=code_match.group(1))
+
+        # Check for lists
+        list_match = self.list_pattern.match(line)
+        if list_match:
+            indent_level = len(list_match.group(1)) // 2
+            return MarkdownBlock('list', list_match.group(3), indent_level)
+
+        return None
+
+    def _process_block(self, block: MarkdownBlock) -> str:
+        """Process a markdown block into HTML."""
+        if block.type == 'header':
+            return f'<h{block.level}>{self._process_inline(block.content)}</h{block.level}>'
+
+        if block.type == 'blockquote':
+            return f'<blockquote>{self._process_inline(block.content)}</blockquote>'
+
+        if block.type == 'list':
+            # Handle both ordered and unordered lists
+            is_ordered = bool(re.match(r'\d+\.', block.content))
+            list_type = 'ol' if is_ordered else 'ul'
+            content = self._process_inline(block.content)
+            return f'<{list_type}><li>{content}</li></{list_type}>'
+
+        return self._process_inline(block.content)
+
+    def process_inline(self, text: str) -> str:
+        """Render inline markup in one line of text."""
+        return self._process_inline(text)
+
+    def _process_inline(self, text: str) -> str:
+        """Process inline markdown elements while preserving math."""
+        if '&' in text or '<' in text or '>' in text:
+            # Math included: the browser decodes the entities, so MathJax
+            # still reads the same TeX. The patterns below neither match
+            # nor produce these characters, so only their tags stay raw.
+            text = escape_text(text)
+        elif not self.inline_markup_pattern.search(text):
+            # Math stashing alone would leave the text unchanged
+            return text
+
+        # Store math blocks temporarily
+        math_blocks = []
+
+        def store_math(match) -> str:
+            math_blocks.append(match.group(0))
+            # NUL-delimited so no inline pattern can match or split it
+            return f'\x00{len(math_blocks) - 1}\x00'
+
+        def restore_math(match) -> str:
+            index = int(match.group(1))
+            return math_blocks[index] if index < len(math_blocks) else match.group(0)
+
+        # Temporarily replace math blocks
+        text = self.math_pattern.sub(store_math, text)
+
+        # Process markdown
+        text = self.bold_italic_pattern.sub(r'<strong><em>\1</em></strong>', text)
+        text = self.bold_pattern.sub(r'<strong>\1</strong>', text)
+        text = self.italic_pattern.sub(r'<em>\1</em>', text)
+        text = self.inline_code_pattern.sub(r'<code>\1</code>', text)
+        text = self.strikethrough_pattern.sub(r'<del>\1</del>', text)
+        text = self.link_pattern.sub(self._link, text)
+        text = self.url_pattern.sub(self._bare_url, text)
+
+        # Restore math blocks in one pass
+        if math_blocks:
+            text = self.placeholder_pattern.sub(restore_math, text)
+
+        return text
+
+    @staticmethod
+    def _link(match) -> str:
+        # Already text-escaped; only quotes could still end the attribute
+        target = match.group(2).replace('"', '&quot;')
+        return f'<a href="{target}">{match.group(1)}</a>'
+
+    @staticmethod
+    def _bare_url(match) -> str:
+        url = match.group(1)
+        target = url.replace('"', '&quot;')
+        return f'<a href="{target}">{url}</a>'
+
+    def _format_code_block(self, lines: List[str], language: str) -> str:
+        """Format a code block with syntax highlighting."""
+        if not language:
+            language = 'plaintext'
+        if len(lines) > self.large_code_lines:
+            return self._format_large_code_block(lines, language)
+        code_content = escape_text('\n'.join(lines))
+        return f'<pre><code class="language-{language}">{code_content}</code></pre>'
+
+    def _format_large_code_block(self, lines: List[str], language: str) -> str:
+        """
+        Format a very large code block as lazily hydrated chunks.
+
+        Only the first chunk is live markup; the rest sit in inert
+        ``<template>`` elements that the page moves into the block (and
+        highlights) as the reader scrolls, or all at once for search and
+        copy. The block is emitted on a single line, with newlines as
+        character references, so wrapping keeps it in one element.
+        """
+        size = self.code_chunk_lines
+        chunks = []
+        for start in range(0, len(lines), size):
+            # Every chunk but the last carries the newline before the next
+            text = '\n'.join(lines[start:start + size])
+            if start + size < len(lines):
+                text += '\n'
+            chunks.append(escape_text(text).replace('\n', '&#10;'))
+        templates = ''.join(f'<template class="code-chunk">{chunk}</template>'
+                            for chunk in chunks[1:])
+        return (f'<div class="code-virtual" data-language="{language}">'
+                f'<div class="code-toolbar">'
+                f'<button type="button" class="code-show-all">'
+                f'Show all {len(lines)} lines</button>'
+                f'<button type="button" class="code-copy">Copy</button></div>'
+                f'<pre><code class="language-{language}">{chunks[0]}</code></pre>'
+                f'{templates}<div class="code-sentinel"></div></div>')
+
+    def process_lists(self, lines: List[str]) -> List[str]:
+        """Process lists while maintaining nested structure."""
+        processed_lines = []
+        current_list_type = None
+        list_stack = []
+
+        for line in lines:
+            list_match = self.list_pattern.match(line)
+            if list_match:
+                indent, marker, content = list_match.groups()
+                level = len(indent) // 2
+                is_ordered = bool(re.match(r'\d+\.', marker))
+
+                # Handle list nesting
+                while list_stack and list_stack[-1][0] >= level:
+                    _, list_type = list_stack.pop()
+                    processed_lines.append(f'</{list_type}>')
+
+                if not list_stack or level > list_stack[-1][0]:
+                    list_type = 'ol' if is_ordered else 'ul'
+                    list_stack.append((level, list_type))
+                    processed_lines.append(f'<{list_type}>')
+
+                processed_lines.append(f'<li>{self._process_inline(content)}</li>')
+            else:
+                # Close any open lists
+                while list_stack:
+                    _, list_type = list_stack.pop()
+                    processed_lines.append(f'</{list_type}>')
+                processed_lines.append(line)
+
+        # Close any remaining lists
+        while list_stack:
+            _, list_type = list_stack.pop()
+            processed_lines.append(f'</{list_type}>')
+
+        return processed_lines
\ No newline at end of file
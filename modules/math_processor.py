@@ -1,9 +1,13 @@
 """Math notation processing module."""
 
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, Tuple, Optional
 import re
 
+from .document import Document, LineReplacement
+from .instrumentation import NULL_METRICS
+from .tracing import NULL_TRACER
+
 
 @dataclass
 class MathBlock:
@@ -23,9 +27,18 @@ class MathProcessor:
         self.display_math_start = re.compile(r'^(\s*)((?:\$\$)|(?:\\\[))\s*$')
         self.display_math_end = re.compile(r'^(\s*)((?:\$\$)|(?:\\\]))\s*$')
 
+        # Per-block timing spans and counters; replaced when enabled
+        self.tracer = NULL_TRACER
+        self.metrics = NULL_METRICS
+
     def process_math_blocks(self, lines: List[str]) -> List[str]:
         """Process math blocks in text while preserving indentation."""
-        processed_lines = []
+        return list(self.iter_math_blocks(lines))
+
+    def iter_math_blocks(self, lines: Iterable[str]) -> Iterator[str]:
+        """Lazily process math blocks, yielding one output line at a time."""
+        tracer = self.tracer
+        metrics = self.metrics
         current_block: Optional[MathBlock] = None
         math_content: List[str] = []
 
@@ -42,18 +55,25 @@ class MathProcessor:
                     )
                 else:
                     # Process any inline math in the line
-                    processed_lines.append(self._process_inline_math(line))
+                    with tracer.span('inline', 'math'):
+                        processed = self._process_inline_math(line)
+                    if metrics.enabled and '$' in line:
+                        metrics.math_spans.inc('inline', amount=len(
+                            re.findall(self.inline_math_pattern, line)))
+                    yield processed
             else:
                 # Check for end of math block
                 end_match = self.display_math_end.match(line)
                 if end_match:
                     # Process the collected math content
-                    processed_math = self._process_math_content(
-                        math_content,
-                        current_block.delimiter_type,
-                        current_block.indentation
-                    )
-                    processed_lines.append(processed_math)
+                    metrics.math_spans.inc('display')
+                    with tracer.span('display', 'math'):
+                        processed_math = self._process_math_content(
+                            math_content,
+                            current_block.delimiter_type,
+                            current_block.indentation
+                        )
+                    yield processed_math
                     current_block = None
                     math_content = []
                 else:
@@ -62,14 +82,85 @@ class MathProcessor:
 
         # Handle any unclosed math block
         if current_block is not None:
-            processed_math = self._process_math_content(
-                math_content,
-                current_block.delimiter_type,
-                current_block.indentation
+            metrics.math_spans.inc('display')
+            with tracer.span('display', 'math'):
+                processed_math = self._process_math_content(
+                    math_content,
+                    current_block.delimiter_type,
+                    current_block.indentation
+                )
+            yield processed_math
+
+    def annotate_math_blocks(self, document: Document,
+                             first: int = 0) -> List[LineReplacement]:
+        """
+        Find display math blocks in a document without copying its text.
+
+        Gives the same result as ``process_math_blocks`` on the document's
+        lines from ``first`` on, as replacements for each block's lines.
+        Only lines containing a delimiter are read, since no other line
+        can open or close a block.
+        """
+        text = document.text
+        candidates = set()
+        for delimiter in ('$$', '\\[', '\\]'):
+            position = text.find(delimiter, document.start, document.end)
+            while position != -1:
+                candidates.add(document.line_at(position))
+                position = text.find(delimiter, position + 1, document.end)
+
+        replacements = []
+        current_block: Optional[MathBlock] = None
+        block_first = 0
+        for index in sorted(candidates):
+            if index < first:
+                continue
+            line = document.line(index)
+            if current_block is None:
+                start_match = self.display_math_start.match(line)
+                if start_match:
+                    indentation, delimiter = start_match.groups()
+                    current_block = MathBlock(
+                        content="",
+                        delimiter_type='$$' if '$$' in delimiter else '\\[',
+                        indentation=indentation
+                    )
+                    block_first = index
+            elif self.display_math_end.match(line):
+                replacements.append(LineReplacement(
+                    block_first, index + 1,
+                    self._annotate_block(document, block_first, index,
+                                         current_block)))
+                current_block = None
+
+        # Handle any unclosed math block
+        if current_block is not None:
+            replacements.append(LineReplacement(
+                block_first, len(document),
+                self._annotate_block(document, block_first, len(document),
+                                     current_block)))
+
+        if self.metrics.enabled:
+            self.count_inline_math(document.iter_lines(first, [
+                LineReplacement(r.first, r.stop, '') for r in replacements]))
+        return replacements
+
+    def _annotate_block(self, document: Document, block_first: int,
+                        block_stop: int, block: MathBlock) -> str:
+        self.metrics.math_spans.inc('display')
+        with self.tracer.span('display', 'math'):
+            return self._process_math_content(
+                [document.line(i) for i in range(block_first + 1, block_stop)],
+                block.delimiter_type,
+                block.indentation
             )
-            processed_lines.append(processed_math)
 
-        return processed_lines
+    def count_inline_math(self, lines: Iterable[str]) -> None:
+        """Record inline math spans for lines that skip block processing."""
+        if self.metrics.enabled:
+            pattern = re.compile(self.inline_math_pattern)
+            self.metrics.math_spans.inc('inline', amount=sum(
+                len(pattern.findall(line)) for line in lines if '$' in line))
 
     def _process_math_content(self, content_lines: List[str],
                               delimiter_type: str,
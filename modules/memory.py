@@ -0,0 +1,180 @@
+"""Per-stage peak and retained memory accounting with tracemalloc."""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+@dataclass
+class StageMemory:
+    """Memory use of one run of a pipeline stage."""
+    name: str
+    start: int                 # Traced bytes when the stage began
+    peak: int = 0              # Highest traced bytes above start
+    retained: int = 0          # Traced bytes above start when it ended
+    # (file:line, bytes, blocks) still allocated at the end of the stage
+    top: List[Tuple[str, int, int]] = field(default_factory=list)
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count as B/KiB/MiB/GiB."""
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class MemoryProfiler:
+    """Records peak and retained traced memory around pipeline stages.
+
+    Stages are entered through ``stage()``, which ``HTMLClipMaker.stage``
+    calls for every stage. Peaks are measured with ``tracemalloc.reset_peak``
+    so each stage reports only its own high-water mark; a nested stage's
+    peak is folded back into its parent.
+    """
+
+    enabled = True
+
+    def __init__(self, top: int = 5, frames: int = 1):
+        """
+        Args:
+            top: Number of allocation sites reported per stage
+            frames: Traceback depth recorded for each allocation
+        """
+        self.top = top
+        self.frames = frames
+        self.stages: List[StageMemory] = []
+        self.input_bytes = 0
+        self.peak = 0
+        self._origin = 0
+        self._stack: List[Tuple[StageMemory, int]] = []
+
+    def start(self) -> None:
+        """Start tracing allocations."""
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._origin = tracemalloc.get_traced_memory()[0]
+
+    def stop(self) -> None:
+        """Stop tracing and record the overall peak."""
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            self._update_peak()
+            tracemalloc.stop()
+
+    def _update_peak(self) -> int:
+        import tracemalloc
+
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak - self._origin)
+        return peak
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the memory used while the enclosed code runs."""
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        # Fold the parent's peak so far into its record before resetting
+        peak = self._update_peak()
+        if self._stack:
+            parent, parent_peak = self._stack[-1]
+            self._stack[-1] = (parent, max(parent_peak, peak))
+
+        before = self._snapshot()
+        start = tracemalloc.get_traced_memory()[0]
+        record = StageMemory(name, start)
+        self._stack.append((record, start))
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current = tracemalloc.get_traced_memory()[0]
+            peak = max(self._update_peak(), self._stack.pop()[1])
+            if self._stack:
+                parent, parent_peak = self._stack[-1]
+                self._stack[-1] = (parent, max(parent_peak, peak))
+            record.peak = peak - start
+            record.retained = current - start
+            record.top = self._top_sites(before, self._snapshot())
+            self.stages.append(record)
+
+    def _snapshot(self):
+        import tracemalloc
+
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+
+    def _top_sites(self, before, after) -> List[Tuple[str, int, int]]:
+        sites = []
+        for stat in after.compare_to(before, 'lineno')[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            sites.append((f"{frame.filename}:{frame.lineno}",
+                          stat.size_diff, stat.count_diff))
+        return sites
+
+    def to_dict(self) -> Dict:
+        """Return the report as a JSON-serializable dict."""
+        ratio = self.peak / self.input_bytes if self.input_bytes else None
+        return {
+            'input_bytes': self.input_bytes,
+            'peak_bytes': self.peak,
+            'peak_to_input': ratio,
+            'stages': [{
+                'name': record.name,
+                'peak_bytes': record.peak,
+                'retained_bytes': record.retained,
+                'peak_to_input': (record.peak / self.input_bytes
+                                  if self.input_bytes else None),
+                'top': [{'site': site, 'bytes': size, 'blocks': count}
+                        for site, size, count in record.top],
+            } for record in self.stages],
+        }
+
+    def format_report(self) -> str:
+        """Return a human-readable report."""
+        def ratio(size):
+            return f"{size / self.input_bytes:.1f}x" if self.input_bytes else '-'
+
+        lines = [
+            f"Input: {format_bytes(self.input_bytes)}, "
+            f"peak: {format_bytes(self.peak)} ({ratio(self.peak)} input)",
+            '',
+            f"{'stage':<16}{'peak':>12}{'retained':>12}{'peak/input':>12}",
+        ]
+        for record in self.stages:
+            lines.append(f"{record.name:<16}{format_bytes(record.peak):>12}"
+                         f"{format_bytes(record.retained):>12}"
+                         f"{ratio(record.peak):>12}")
+        for record in self.stages:
+            if not record.top:
+                continue
+            lines.append('')
+            lines.append(f"Top allocations retained by {record.name}:")
+            for site, size, count in record.top:
+                lines.append(f"  {format_bytes(size):>10} {count:>8} blocks  {site}")
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path: Path) -> None:
+        """Write the report as JSON for .json paths, otherwise as text."""
+        path = Path(path)
+        if path.suffix == '.json':
+            import json
+
+            text = json.dumps(self.to_dict(), indent=2) + '\n'
+        else:
+            text = self.format_report()
+        path.write_text(text, encoding='utf-8')
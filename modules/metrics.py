@@ -0,0 +1,200 @@
+"""In-process metrics with Prometheus textfile and JSON export.
+
+The metrics the pipeline records are declared in ``instrumentation``;
+this module loads only when they are enabled.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond clips to huge pastes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value: str) -> str:
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def _format_labels(names: Sequence[str], values: Tuple,
+                   extra: str = '') -> str:
+    pairs = [f'{name}="{_escape_label(value)}"'
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        """Increase the count for the given label values."""
+        with self._lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues) -> float:
+        """Return the current count for the given label values."""
+        return self.values.get(labelvalues, 0)
+
+    def samples(self) -> List[str]:
+        """Return Prometheus exposition lines for this counter."""
+        return [f"{self.name}{_format_labels(self.labelnames, key)} "
+                f"{_format_value(value)}"
+                for key, value in sorted(self.values.items())]
+
+    def to_dict(self) -> Dict:
+        return {
+            'type': self.kind,
+            'help': self.documentation,
+            'values': [{'labels': dict(zip(self.labelnames, key)),
+                        'value': value}
+                       for key, value in sorted(self.values.items())],
+        }
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, optionally by labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts (last is +Inf), sum, count]
+        self.values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        """Record one observation for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self.values.get(labelvalues)
+            if state is None:
+                state = self.values[labelvalues] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        """Return Prometheus exposition lines for this histogram."""
+        lines = []
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def to_dict(self) -> Dict:
+        values = []
+        for key, (counts, total, count) in sorted(self.values.items()):
+            values.append({
+                'labels': dict(zip(self.labelnames, key)),
+                'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'],
+                                    counts)),
+                'sum': total,
+                'count': count,
+            })
+        return {'type': self.kind, 'help': self.documentation,
+                'values': values}
+
+
+class MetricsRegistry:
+    """Holds metrics and exports them on demand."""
+
+    enabled = True
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        """Create or return the counter with this name."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Create or return the histogram with this name."""
+        return self._register(Histogram, name, documentation, labelnames,
+                              buckets)
+
+    def _register(self, metric_class, name, *args):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = metric_class(name, *args)
+        elif not isinstance(metric, metric_class):
+            raise ValueError(f"Metric {name} is already registered as a "
+                             f"{metric.kind}")
+        return metric
+
+    def to_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> Dict:
+        """Return all metrics as a JSON-serializable dict."""
+        return {name: metric.to_dict()
+                for name, metric in sorted(self.metrics.items())}
+
+    def write_textfile(self, path: Path) -> None:
+        """
+        Write metrics for the node-exporter textfile collector.
+
+        The file is written to a temporary name and renamed into place so
+        the collector never reads a partial file.
+        """
+        import tempfile
+
+        path = Path(path)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-',
+                                        suffix='.prom')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def write_json(self, path: Path) -> None:
+        """Write metrics as JSON."""
+        import json
+
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2) + '\n',
+                              encoding='utf-8')
@@ -0,0 +1,292 @@
+"""Paginated output module.
+
+Splits a document at its top-level headers and renders each section to its
+own page, so the page a reader opens only carries (and typesets) one
+section. Pages share one stylesheet and link to an index page and to their
+neighbours.
+"""
+
+import concurrent.futures
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .escape import escape_attribute
+from .markdown import MarkdownProcessor
+from .math_processor import MathProcessor
+
+SPLIT_LEVELS = {'h1': 1, 'h2': 2}
+INDEX_NAME = 'index.html'
+STYLESHEET_NAME = 'style.css'
+
+PAGER_CSS = '''
+.pager {
+    display: flex;
+    justify-content: space-between;
+    gap: 1em;
+    margin: 1em 0;
+    text-indent: 0;
+}
+.pager a {
+    color: #2c3e50;
+}
+.toc {
+    text-indent: 0;
+}
+'''
+
+
+@dataclass
+class Section:
+    """A run of source lines starting at a split header."""
+    title: str
+    lines: List[str] = field(default_factory=list)
+    number: int = 0
+
+    @property
+    def filename(self) -> str:
+        slug = re.sub(r'[^a-z0-9]+', '-', self.title.lower()).strip('-')[:40]
+        return f"{self.number:03d}-{slug or 'section'}.html"
+
+
+@dataclass
+class Page:
+    """A section together with the links rendered around it."""
+    section: Section
+    previous: Optional[Section] = None
+    next: Optional[Section] = None
+
+
+class SectionSplitter:
+    """Splits document lines at headers up to a given level.
+
+    Headers are recognized exactly as ``MarkdownProcessor`` recognizes
+    them, and lines inside fenced code or display math never split.
+    """
+
+    def __init__(self, split_at: str = 'h1'):
+        if split_at not in SPLIT_LEVELS:
+            raise ValueError(f"Unknown split level: {split_at}")
+        self.max_level = SPLIT_LEVELS[split_at]
+        markdown = MarkdownProcessor()
+        math = MathProcessor()
+        self.header_pattern = markdown.header_pattern
+        self.code_block_pattern = markdown.code_block_pattern
+        self.display_math_start = math.display_math_start
+        self.display_math_end = math.display_math_end
+
+    def split(self, lines: Iterable[str]) -> Iterator[Section]:
+        """
+        Lazily split lines into sections.
+
+        The first section holds any lines before the first split header
+        and has an empty title; it is yielded even when empty.
+        """
+        section = Section('')
+        in_code = in_math = False
+
+        for line in lines:
+            if in_code:
+                in_code = line.strip() != '```'
+            elif in_math:
+                in_math = not self.display_math_end.match(line)
+            elif self.code_block_pattern.match(line):
+                in_code = True
+            elif self.display_math_start.match(line):
+                in_math = True
+            else:
+                match = self.header_pattern.match(line)
+                if match and len(match.group(1)) <= self.max_level:
+                    yield section
+                    section = Section(match.group(2).strip(), [],
+                                      section.number + 1)
+            section.lines.append(line)
+
+        yield section
+
+
+def iter_pages(sections: Iterable[Section]) -> Iterator[Page]:
+    """Pair each section with its neighbours, looking ahead one section."""
+    previous = current = None
+    for section in sections:
+        if current is not None:
+            yield Page(current, previous, section)
+        previous, current = current, section
+    if current is not None:
+        yield Page(current, previous, None)
+
+
+def extract_stylesheet(page: str, href: str) -> Tuple[str, str]:
+    """
+    Move a page's inline stylesheet into a separate file.
+
+    Returns:
+        tuple: (page linking to ``href``, stylesheet text)
+    """
+    start = page.index('<style>')
+    end = page.index('</style>', start)
+    css = '\n'.join(line[8:] if line.startswith(' ' * 8) else line.strip()
+                    for line in page[start + len('<style>'):end].split('\n'))
+    link = f'<link rel="stylesheet" href="{href}">'
+    return page[:start] + link + page[end + len('</style>'):], css.strip() + '\n'
+
+
+def _link(markdown: MarkdownProcessor, section: Section) -> str:
+    return (f'<a href="{escape_attribute(section.filename)}">'
+            f'{markdown.process_inline(section.title)}</a>')
+
+
+def _insert_navigation(page: str, navigation: str) -> str:
+    """Put the navigation bar above and below the page content."""
+    page = page.replace('<div id="content">',
+                        f'{navigation}\n    <div id="content">', 1)
+    return page.replace('<div class="footer">',
+                        f'{navigation}\n\n    <div class="footer">', 1)
+
+
+def render_page(app, page: Page, custom_styles: Optional[Dict] = None) -> str:
+    """Render one section page with prev/index/next links."""
+    section = page.section
+    math_processed = app.math.process_math_blocks(section.lines)
+    content = app.markdown.process('\n'.join(math_processed))
+    document = app.generate_html(section.title, content, custom_styles)
+    document, _ = extract_stylesheet(document, STYLESHEET_NAME)
+
+    markdown = app.markdown
+    previous = (f'<span>&larr; {_link(markdown, page.previous)}</span>'
+                if page.previous else '<span></span>')
+    following = (f'<span>{_link(markdown, page.next)} &rarr;</span>'
+                 if page.next else '<span></span>')
+    navigation = (f'<nav class="pager">{previous}'
+                  f'<a href="{INDEX_NAME}">Contents</a>{following}</nav>')
+    return _insert_navigation(document, navigation)
+
+
+def write_page(app, page: Page, output_dir: Path,
+               custom_styles: Optional[Dict] = None) -> str:
+    """Render a page into ``output_dir`` and return its file name."""
+    document = render_page(app, page, custom_styles)
+    app.html_gen.save(document, output_dir / page.section.filename)
+    return page.section.filename
+
+
+# Warm application instance for the current worker process
+_app = None
+
+
+def _init_worker(app_factory: Callable) -> None:
+    global _app
+    _app = app_factory()
+
+
+def _write_page(page: Page, output_dir: Path,
+                custom_styles: Optional[Dict]) -> str:
+    return write_page(_app, page, output_dir, custom_styles)
+
+
+def _available_cpus() -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class Paginator:
+    """Renders a document as an index page plus one page per section."""
+
+    def __init__(self, app, split_at: str = 'h1', workers: Optional[int] = None):
+        """
+        Args:
+            app: HTMLClipMaker used for the index page and serial rendering;
+                worker processes construct their own instance of its class
+                with the same timestamp, backend and template
+            split_at: Highest header level that starts a new page
+            workers: Worker processes rendering sections (default: CPU count);
+                1 renders in this process
+        """
+        self.app = app
+        self.splitter = SectionSplitter(split_at)
+        self.workers = workers or _available_cpus()
+
+    def render(self, lines: Iterable[str], output_dir: Path,
+               custom_styles: Optional[Dict] = None) -> List[Path]:
+        """
+        Render stripped document lines into ``output_dir``.
+
+        The first line is the document title, as in ``process_content``.
+        Sections are read lazily and only a bounded number are in flight
+        at once, so memory stays proportional to the largest section.
+
+        Returns:
+            list: Paths written, index page first
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        lines = iter(lines)
+        title = next(lines, '').lstrip('#').strip()
+        sections = self.splitter.split(lines)
+        preamble = next(sections)
+
+        with self.app.stage('sections'):
+            contents = list(self._render_sections(iter_pages(sections),
+                                                  output_dir, custom_styles))
+
+        with self.app.stage('index'):
+            index = self._render_index(title, preamble, contents, custom_styles)
+            document, css = extract_stylesheet(index, STYLESHEET_NAME)
+            self.app.html_gen.save(css + PAGER_CSS, output_dir / STYLESHEET_NAME)
+            self.app.html_gen.save(document, output_dir / INDEX_NAME)
+
+        return ([output_dir / INDEX_NAME] +
+                [output_dir / section.filename for section in contents])
+
+    def _render_sections(self, pages: Iterator[Page], output_dir: Path,
+                         custom_styles: Optional[Dict]) -> Iterator[Section]:
+        """Render pages, yielding each section with its lines released."""
+        def done(page: Page) -> Section:
+            return Section(page.section.title, number=page.section.number)
+
+        if self.workers <= 1:
+            for page in pages:
+                write_page(self.app, page, output_dir, custom_styles)
+                yield done(page)
+            return
+
+        # Workers build their own warm instance of the same application,
+        # with the same backend, template and page timestamp
+        app_factory = partial(type(self.app), timestamp=self.app.timestamp,
+                              backend=self.app.backend,
+                              template=self.app.template)
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(app_factory,)) as executor:
+            in_flight = deque()
+            for page in pages:
+                in_flight.append((done(page), executor.submit(
+                    _write_page, page, output_dir, custom_styles)))
+                if len(in_flight) > self.workers * 2:
+                    section, future = in_flight.popleft()
+                    future.result()
+                    yield section
+            for section, future in in_flight:
+                future.result()
+                yield section
+
+    def _render_index(self, title: str, preamble: Section,
+                      sections: List[Section],
+                      custom_styles: Optional[Dict]) -> str:
+        app = self.app
+        math_processed = app.math.process_math_blocks(preamble.lines or [''])
+        content = app.markdown.process('\n'.join(math_processed))
+        document = app.generate_html(title, content, custom_styles)
+
+        items = ''.join(f'\n            <li>{_link(app.markdown, section)}</li>'
+                        for section in sections)
+        toc = f'<ol class="toc">{items}\n        </ol>'
+        return document.replace('<div class="footer">',
+                                f'<nav>\n        {toc}\n    </nav>\n\n'
+                                f'    <div class="footer">', 1)
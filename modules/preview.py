@@ -0,0 +1,425 @@
+"""Incremental live preview module.
+
+An editor sends text edits instead of whole documents. The renderer maps
+each edit onto the block boundaries the math and markdown passes use,
+re-renders only the blocks the edit can affect, and answers with
+block-level DOM patches that ``PREVIEW_SCRIPT`` applies in the page,
+re-typesetting only the math that changed.
+
+Blocks are the units both passes start in their neutral state: a display
+math block, a fenced code block (with any math blocks inside it), or a
+single line. A block's HTML depends only on its own lines and the header
+level it is indented to, so blocks before an edit keep their HTML, and
+re-segmenting after the edit stops as soon as it reaches a block start
+that existed before the edit at the same header level.
+"""
+
+import itertools
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import VERSION
+from .html_generator import SECTION_HEADERS
+
+PREVIEW_CSS = '''<style>
+    .preview-block {
+        display: contents;
+    }
+</style>
+'''
+
+PREVIEW_SCRIPT = '''<script>
+    (function () {{
+        const content = document.getElementById("content");
+
+        function blockElement(id) {{
+            return document.getElementById("b" + id);
+        }}
+
+        function applyPatch(patch, typeset) {{
+            if (patch.op === "title") {{
+                document.title = patch.title;
+                return;
+            }}
+            const removed = patch.remove.map(blockElement).filter(Boolean);
+            if (window.MathJax && MathJax.typesetClear) {{
+                MathJax.typesetClear(removed);
+            }}
+            removed.forEach(element => element.remove());
+
+            const template = document.createElement("template");
+            template.innerHTML = patch.insert.map(block => block.html).join("");
+            const added = Array.from(template.content.children);
+            const anchor = patch.after === null ? null : blockElement(patch.after);
+            if (anchor) {{
+                anchor.after(...added);
+            }} else {{
+                content.prepend(...added);
+            }}
+
+            added.forEach((element, index) => {{
+                element.querySelectorAll("pre code").forEach(code => hljs.highlightBlock(code));
+                setupLargeCodeBlocks(element);
+                if (patch.insert[index].math) {{
+                    typeset.push(element);
+                }}
+            }});
+        }}
+
+        const source = new EventSource({events});
+        source.addEventListener("patch", function (event) {{
+            const typeset = [];
+            JSON.parse(event.data).patches.forEach(patch => applyPatch(patch, typeset));
+            if (typeset.length && window.MathJax && MathJax.typesetPromise) {{
+                renderMath(typeset);
+            }}
+        }});
+    }})();
+</script>
+'''
+
+# Substrings of rendered HTML that MathJax may typeset
+_MATH_MARKERS = ('$', '\\[', '\\(')
+
+_ids = itertools.count(1)
+
+
+@dataclass
+class TextEdit:
+    """Replace the text between two (line, column) positions.
+
+    Columns count Unicode code points. An edit without a range replaces
+    the whole document.
+    """
+    text: str
+    start: Optional[Tuple[int, int]] = None
+    end: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TextEdit':
+        """Build an edit from its JSON form: ``{"start": [line, column],
+        "end": [line, column], "text": ...}``."""
+        try:
+            text = data['text']
+            start = data.get('start')
+            end = data.get('end')
+            if not isinstance(text, str):
+                raise TypeError
+            if (start is None) != (end is None):
+                raise ValueError("start and end must be given together")
+            if start is not None:
+                start = (int(start[0]), int(start[1]))
+                end = (int(end[0]), int(end[1]))
+        except (KeyError, IndexError, TypeError):
+            raise ValueError(f"Malformed edit: {data!r}") from None
+        return cls(text, start, end)
+
+
+@dataclass
+class Block:
+    """A run of content lines rendered together, and its DOM id.
+
+    ``level`` is the header level the block starts in and ``next_level``
+    the one it leaves for the block after it.
+    """
+    id: int
+    first: int
+    stop: int
+    html: str
+    level: int = 1
+    next_level: int = 1
+
+    @property
+    def math(self) -> bool:
+        return any(marker in self.html for marker in _MATH_MARKERS)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'html': f'<div class="preview-block" id="b{self.id}">{self.html}</div>',
+            'math': self.math,
+        }
+
+
+def splice_lines(lines: List[str], edit: TextEdit) -> Tuple[int, int, int]:
+    """
+    Apply a ranged edit to a list of lines in place.
+
+    Returns:
+        tuple: (first line replaced, last old line replaced, last new line)
+    """
+    (first, start_column), (last, end_column) = edit.start, edit.end
+    if not (0 <= first <= last < len(lines) and
+            0 <= start_column <= len(lines[first]) and
+            0 <= end_column <= len(lines[last]) and
+            (first, start_column) <= (last, end_column)):
+        raise ValueError(f"Edit range out of bounds: {edit.start}-{edit.end}")
+
+    replacement = (lines[first][:start_column] + edit.text +
+                   lines[last][end_column:]).split('\n')
+    lines[first:last + 1] = replacement
+    return first, last, first + len(replacement) - 1
+
+
+class IncrementalRenderer:
+    """Keeps a document's rendered blocks and patches them on each edit."""
+
+    def __init__(self, app, text: str = '',
+                 custom_styles: Optional[Dict] = None):
+        """
+        Args:
+            app: HTMLClipMaker whose processors render the blocks
+            text: Initial document text
+            custom_styles: Custom styles applied to the preview page
+        """
+        self.app = app
+        self.custom_styles = custom_styles
+        self.version = 0
+        self.lines = text.split('\n')
+        self.title = ''
+        self.blocks: List[Block] = []
+        self._lead = self._end = 0
+        self._rebuild()
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+    # The document is rendered as if stripped first: ``_lead`` is the raw
+    # index of the title line and ``_end`` one past the last non-blank line.
+
+    def _bounds(self) -> Tuple[int, int]:
+        lines = self.lines
+        lead = 0
+        while lead < len(lines) and not lines[lead].strip():
+            lead += 1
+        end = len(lines)
+        while end > lead and not lines[end - 1].strip():
+            end -= 1
+        return lead, end
+
+    def _content_count(self) -> int:
+        # A title-only document renders one empty content line
+        return max(self._end - self._lead - 1, 1)
+
+    def _line(self, index: int) -> str:
+        """Return content line ``index`` as the stripped document has it."""
+        raw = self._lead + 1 + index
+        if raw >= self._end:
+            return ''
+        if raw == self._end - 1:
+            return self.lines[raw].rstrip()
+        return self.lines[raw]
+
+    def _read_title(self) -> str:
+        if self._lead >= len(self.lines):
+            return ''
+        return self.lines[self._lead].strip().lstrip('#').strip()
+
+    def _block_stop(self, first: int, count: int) -> int:
+        """Return the line after the block starting at ``first``."""
+        if not self.app.markdown.line_oriented:
+            # Blocks depend on each other; the document is one block
+            return count
+        math = self.app.math
+        line = self._line(first)
+        if math.display_math_start.match(line):
+            return self._math_stop(first, count)
+        if self.app.markdown.code_block_pattern.match(line):
+            # The math pass runs first, so math blocks inside the fence are
+            # consumed whole and cannot close it
+            index = first + 1
+            while index < count:
+                line = self._line(index)
+                if math.display_math_start.match(line):
+                    index = self._math_stop(index, count)
+                elif line.strip() == '```':
+                    return index + 1
+                else:
+                    index += 1
+            return count
+        return first + 1
+
+    def _math_stop(self, first: int, count: int) -> int:
+        end_pattern = self.app.math.display_math_end
+        for index in range(first + 1, count):
+            if end_pattern.match(self._line(index)):
+                return index + 1
+        return count
+
+    def _render_block(self, first: int, stop: int, level: int) -> Block:
+        lines = [self._line(i) for i in range(first, stop)]
+        app = self.app
+        chunks = list(app.markdown.iter_process(
+            app.math.iter_math_blocks(lines)))
+        # iter_wrap gives an empty document one empty line; a block that
+        # renders to nothing (such as an unclosed fence) adds no lines
+        wrapped = list(app.html_gen.iter_wrap(chunks, level)) if chunks else []
+        next_level = level
+        for line in wrapped:
+            if line.startswith(SECTION_HEADERS):
+                next_level = int(line[2])
+        return Block(next(_ids), first, stop, '\n'.join(wrapped),
+                     level, next_level)
+
+    def _segment(self, first: int, count: int, level: int = 1,
+                 resync=None) -> Tuple[List[Block], int]:
+        """
+        Render blocks from ``first`` on, starting at header ``level``,
+        until ``resync(position, level)`` returns an old block index to
+        continue with, or the content ends.
+
+        Returns:
+            tuple: (new blocks, index of the first old block kept)
+        """
+        blocks = []
+        position = first
+        while position < count:
+            if resync is not None:
+                kept = resync(position, level)
+                if kept is not None:
+                    return blocks, kept
+            stop = self._block_stop(position, count)
+            block = self._render_block(position, stop, level)
+            blocks.append(block)
+            position, level = stop, block.next_level
+        return blocks, len(self.blocks)
+
+    def _rebuild(self) -> None:
+        self._lead, self._end = self._bounds()
+        self.title = self._read_title()
+        self.blocks, _ = self._segment(0, self._content_count())
+
+    def _block_index(self, position: int) -> int:
+        """Return the index of the block containing a content line."""
+        low, high = 0, len(self.blocks)
+        while low < high:
+            middle = (low + high) // 2
+            if self.blocks[middle].first <= position:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def content(self) -> str:
+        """Return the wrapped content, as ``wrap_content`` would give it."""
+        content = '\n'.join(block.html for block in self.blocks if block.html)
+        # Even empty content wraps to one (empty) line
+        return content or next(self.app.html_gen.iter_wrap(['']))
+
+    def page(self, events_url: str) -> str:
+        """Render the full preview page, patched live from ``events_url``."""
+        from .html_generator import HTMLTemplate, current_timestamp
+
+        content = '\n'.join(block.to_dict()['html'] for block in self.blocks)
+        html = self.app.html_gen.generate(HTMLTemplate(
+            title=self.title,
+            content=content,
+            version=VERSION,
+            timestamp=self.app.timestamp or current_timestamp(),
+        ))
+        if self.custom_styles:
+            html = self.app.html_gen.apply_custom_styles(html, self.custom_styles)
+        script = PREVIEW_SCRIPT.format(events=json.dumps(events_url))
+        return html.replace('</body>', f'{PREVIEW_CSS}{script}</body>', 1)
+
+    def apply(self, edits: Iterable[TextEdit]) -> List[Dict]:
+        """
+        Apply edits in order and return the DOM patches they produce.
+
+        Patches are ``{"op": "title", "title": ...}`` or ``{"op":
+        "splice", "after": id or None, "remove": [ids], "insert": [{"id",
+        "html", "math"}]}``, to be applied in order.
+
+        Raises:
+            ValueError: An edit range is out of bounds; nothing is applied
+        """
+        edits = list(edits)
+        # Check every range first, so a bad edit leaves the document as is
+        lines = list(self.lines)
+        for edit in edits:
+            if edit.start is None:
+                lines = edit.text.split('\n')
+            else:
+                splice_lines(lines, edit)
+
+        patches = []
+        with self.app.stage('preview'):
+            for edit in edits:
+                patches.extend(self._apply(edit))
+        self.version += 1
+        return patches
+
+    def _apply(self, edit: TextEdit) -> List[Dict]:
+        old_lead, old_end = self._lead, self._end
+        old_count = self._content_count()
+        old_title = self.title
+
+        if edit.start is None:
+            first, last = 0, len(self.lines) - 1
+            self.lines = edit.text.split('\n')
+            new_last = len(self.lines) - 1
+        else:
+            first, last, new_last = splice_lines(self.lines, edit)
+
+        self._lead, self._end = self._bounds()
+        self.title = self._read_title()
+        patches = []
+        if self.title != old_title:
+            patches.append({'op': 'title', 'title': self.title})
+
+        # Map the raw line range onto content lines: lines before the edit
+        # keep their index, lines after it shift by the same amount
+        count = self._content_count()
+        start = max(first - old_lead - 1, 0)
+        old_stop = last - old_lead
+        new_stop = new_last - self._lead
+        if (old_stop < start or new_stop < start or
+                old_end - old_lead <= 1 or self._end - self._lead <= 1):
+            # A line moved into or out of the title, or a side is
+            # title-only: the content lines do not line up
+            start, old_stop, new_stop = 0, old_count, count
+        elif last >= old_end - 1 or new_last >= self._end - 1:
+            # The last line is stripped, so edits near the end affect
+            # everything from the old last line on
+            start = min(start, old_count - 1, count - 1)
+            old_stop, new_stop = old_count, count
+        shift = new_stop - old_stop
+
+        index = max(self._block_index(start), 0)
+        resume = self.blocks[index].first if index < len(self.blocks) else start
+        level = self.blocks[index - 1].next_level if index > 0 else 1
+
+        def resync(position: int, level: int) -> Optional[int]:
+            if position < new_stop:
+                return None
+            kept = self._block_index(position - shift)
+            if (kept >= 0 and self.blocks[kept].first == position - shift and
+                    self.blocks[kept].level == level):
+                return kept
+            return None
+
+        added, kept = self._segment(resume, count, level, resync)
+        removed = self.blocks[index:kept]
+
+        if shift:
+            for block in self.blocks[kept:]:
+                block.first += shift
+                block.stop += shift
+
+        if [block.html for block in added] == [block.html for block in removed]:
+            # Same output: keep the elements already on the page
+            for block, new in zip(removed, added):
+                block.first, block.stop = new.first, new.stop
+                block.level, block.next_level = new.level, new.next_level
+            return patches
+
+        self.blocks[index:kept] = added
+        patches.append({
+            'op': 'splice',
+            'after': self.blocks[index - 1].id if index > 0 else None,
+            'remove': [block.id for block in removed],
+            'insert': [block.to_dict() for block in added],
+        })
+        return patches
@@ -0,0 +1,164 @@
+"""python-markdown backend module.
+
+Renders markdown with the python-markdown package and its ``extra``
+extensions: the most complete syntax, at the cost of converting the whole
+document at once. ``MathProtectExtension`` stashes the display and inline
+math spans ``MathProcessor`` recognizes before python-markdown parses
+them, so emphasis, escapes and entities never touch the TeX.
+"""
+
+import html
+import re
+from typing import Iterable, Iterator, List, Sequence
+
+import markdown
+from markdown.extensions import Extension
+from markdown.inlinepatterns import InlineProcessor
+from markdown.preprocessors import Preprocessor
+from markdown.treeprocessors import Treeprocessor
+
+from .math_processor import MathProcessor
+from .instrumentation import NULL_METRICS
+from .tracing import NULL_TRACER
+
+DEFAULT_EXTENSIONS = ('extra', 'sane_lists')
+
+# A whole line of display math, as MathProcessor emits it
+DISPLAY_LINE_PATTERN = re.compile(r'^\s*(?:\$\$.*\$\$|\\\[.*\\\])\s*$')
+DISPLAY_SPAN_PATTERN = r'\$\$.+?\$\$|\\\[.+?\\\]'
+
+# Marks the end of each top-level element in the serialized output
+_BLOCK_SEPARATOR = '\x1e'
+_PRE_PATTERN = re.compile(r'(<pre\b.*?</pre>)', re.S)
+_TAG_PATTERN = re.compile(r'<(\w+)')
+
+# Top-level tags counted under the builtin processor's block types
+_BLOCK_TYPES = {
+    'p': 'paragraph',
+    'h1': 'header', 'h2': 'header', 'h3': 'header',
+    'h4': 'header', 'h5': 'header', 'h6': 'header',
+    'ul': 'list', 'ol': 'list',
+    'pre': 'code',
+    'blockquote': 'blockquote',
+}
+
+
+def _stash_math(md: markdown.Markdown, tex: str) -> str:
+    return md.htmlStash.store(html.escape(tex, quote=False))
+
+
+class DisplayMathPreprocessor(Preprocessor):
+    """Stashes display math lines as raw HTML blocks."""
+
+    def run(self, lines: List[str]) -> List[str]:
+        result = []
+        for line in lines:
+            if DISPLAY_LINE_PATTERN.match(line):
+                # Blank lines around keep the placeholder a block of its own
+                result.extend(['', _stash_math(self.md, line.strip()), ''])
+            else:
+                result.append(line)
+        return result
+
+
+class MathSpanProcessor(InlineProcessor):
+    """Stashes a math span found inside a line as raw HTML."""
+
+    def handleMatch(self, m, data):
+        return _stash_math(self.md, m.group(0)), m.start(0), m.end(0)
+
+
+class BlockSeparatorTreeprocessor(Treeprocessor):
+    """Ends every top-level element with a separator, replacing the
+    newline the prettifier put there."""
+
+    def run(self, root) -> None:
+        for child in root:
+            child.tail = _BLOCK_SEPARATOR
+
+
+class MathProtectExtension(Extension):
+    """Keeps math spans away from python-markdown's inline syntax."""
+
+    def extendMarkdown(self, md: markdown.Markdown) -> None:
+        # After fenced code is stashed, so code keeps its dollar signs
+        md.preprocessors.register(DisplayMathPreprocessor(md), 'display_math', 15)
+        # Before backslash escapes (180), which would eat '\[', but after
+        # code spans (190), so math inside backticks stays code
+        md.inlinePatterns.register(
+            MathSpanProcessor(DISPLAY_SPAN_PATTERN, md), 'display_math', 186)
+        md.inlinePatterns.register(
+            MathSpanProcessor(MathProcessor().inline_math_pattern, md),
+            'inline_math', 185)
+        # After the prettifier (10)
+        md.treeprocessors.register(BlockSeparatorTreeprocessor(md),
+                                   'block_separator', 5)
+
+
+def _single_line(block: str) -> str:
+    """
+    Put a top-level element on one line, so wrapping keeps it in one div.
+
+    Newlines between tags are dropped; others become character references,
+    which ``white-space: pre-wrap`` still shows as line breaks.
+    """
+    parts = _PRE_PATTERN.split(block)
+    for index, part in enumerate(parts):
+        if index % 2 == 0:
+            part = part.replace('>\n<', '><')
+        parts[index] = part.replace('\n', '&#10;')
+    return ''.join(parts)
+
+
+class PythonMarkdownProcessor:
+    """Markdown backend built on python-markdown.
+
+    Emits one chunk per top-level element. Unlike ``MarkdownProcessor``
+    it is not line-oriented: paragraphs and lists span lines, so the whole
+    input is read before the first chunk is produced.
+    """
+
+    # Blocks depend on their neighbours, so previews re-render everything
+    line_oriented = False
+
+    def __init__(self, extensions: Sequence = DEFAULT_EXTENSIONS):
+        self.md = markdown.Markdown(
+            extensions=[*extensions, MathProtectExtension()])
+        # Raw HTML in the input is text like any other, escaped as the
+        # builtin processor escapes it
+        self.md.preprocessors.deregister('html_block')
+        self.md.inlinePatterns.deregister('html')
+
+        # Timing spans and counters; replaced when enabled
+        self.tracer = NULL_TRACER
+        self.metrics = NULL_METRICS
+
+    def process(self, content: str) -> str:
+        """Convert markdown content to HTML."""
+        return '\n'.join(self.iter_process(content.split('\n')))
+
+    def iter_process(self, lines: Iterable[str]) -> Iterator[str]:
+        """Convert markdown lines, yielding one chunk per top-level element."""
+        with self.tracer.span('convert', 'markdown'):
+            output = self.md.reset().convert('\n'.join(lines))
+
+        blocks = self.metrics.blocks
+        for block in output.split(_BLOCK_SEPARATOR):
+            block = block.strip('\n')
+            if not block:
+                continue
+            tag = _TAG_PATTERN.match(block)
+            blocks.inc(_BLOCK_TYPES.get(tag.group(1) if tag else '', 'html'))
+            yield _single_line(block)
+
+    def iter_plain(self, lines: Iterable[str]) -> Iterator[str]:
+        """Convert lines known to contain no markup; they still form
+        paragraphs, so this is the full conversion."""
+        return self.iter_process(lines)
+
+    def process_inline(self, text: str) -> str:
+        """Render inline markup in one line of text."""
+        output = self.md.reset().convert(text).replace(_BLOCK_SEPARATOR, '')
+        if output.startswith('<p>') and output.endswith('</p>'):
+            return output[len('<p>'):-len('</p>')]
+        return output
@@ -0,0 +1,266 @@
+"""Client-side search index module.
+
+Batch builds write an inverted index of the notes' titles, headers and
+body text next to the pages, with a small script that queries it in the
+browser. Terms come from the markdown processor's output, so indexing
+costs no second parse; code and math are left out.
+
+The index is a directory of JSON files: ``index.json`` lists the documents
+and the number of term shards, and ``terms-<k>.json`` holds the postings
+of the terms that hash to shard ``k``. A query loads the document list and
+then only the shards of its own terms. Postings are flat ``[doc delta,
+score, ...]`` arrays in document order, which gzip compresses well.
+"""
+
+import html
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .fileutil import write_if_changed
+
+INDEX_DIR = 'search'
+INDEX_VERSION = 1
+# Distinct terms per shard file; a few tens of KiB once gzipped
+TERMS_PER_SHARD = 2048
+
+TITLE_WEIGHT = 8
+HEADER_WEIGHT = 3
+BODY_WEIGHT = 1
+
+_CODE_PATTERN = re.compile(r'<pre\b.*?</pre>|<code\b.*?</code>', re.DOTALL)
+# The delimiters MarkdownProcessor leaves math in
+_MATH_PATTERN = re.compile(r'\$\$.+?\$\$|\\\[.+?\\\]|\\\(.+?\\\)|\$[^$]+\$')
+_HEADER_PATTERN = re.compile(r'<h[1-6]\b[^>]*>(.*?)</h[1-6]>', re.DOTALL)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+# Letters and digits; search.js splits queries with the same rule
+_WORD_PATTERN = re.compile(r'[^\W_]{2,}')
+
+
+def terms(text: str) -> List[str]:
+    """Split plain text into lowercase search terms."""
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def _text(markup: str) -> str:
+    return html.unescape(_TAG_PATTERN.sub(' ', markup))
+
+
+def document_terms(title: str, content: str) -> Dict[str, int]:
+    """
+    Score the terms of a converted document.
+
+    Args:
+        title: Document title
+        content: Processed content, as ``HTMLClipMaker.process_content``
+            returns it
+
+    Returns:
+        dict: Term -> weighted number of occurrences
+    """
+    scores = Counter()
+    for term in terms(title):
+        scores[term] += TITLE_WEIGHT
+
+    content = _CODE_PATTERN.sub(' ', content)
+    content = _MATH_PATTERN.sub(' ', content)
+    for header in _HEADER_PATTERN.findall(content):
+        for term in terms(_text(header)):
+            scores[term] += HEADER_WEIGHT
+    for term in terms(_text(_HEADER_PATTERN.sub(' ', content))):
+        scores[term] += BODY_WEIGHT
+    return dict(scores)
+
+
+def term_shard(term: str, shards: int) -> int:
+    """Return the shard of a term: 32-bit FNV-1a over its code points,
+    as search.js computes it."""
+    h = 0x811c9dc5
+    for char in term:
+        h = ((h ^ ord(char)) * 0x01000193) & 0xffffffff
+    return h % shards
+
+
+class SearchIndexBuilder:
+    """Accumulates documents' terms, then writes the index directory."""
+
+    def __init__(self):
+        self.documents: List[Tuple[str, str]] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    def add(self, url: str, title: str, scores: Dict[str, int]) -> None:
+        """Add a document; ``url`` is relative to the site's root."""
+        doc = len(self.documents)
+        self.documents.append((url, title))
+        for term, score in scores.items():
+            self.postings[term].append((doc, score))
+
+    @property
+    def shards(self) -> int:
+        return max(1, math.ceil(len(self.postings) / TERMS_PER_SHARD))
+
+    def write(self, directory: Path) -> List[Path]:
+        """
+        Write the index and search.js into ``directory``.
+
+        Files whose content is unchanged are left alone, and shard files
+        left over from a larger index are removed.
+
+        Returns:
+            list: Paths of the files written
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        shards = self.shards
+
+        files = {
+            'index.json': {
+                'version': INDEX_VERSION,
+                'shards': shards,
+                'docs': [list(document) for document in self.documents],
+            },
+        }
+        shard_terms = [{} for _ in range(shards)]
+        for term in sorted(self.postings):
+            flat = []
+            previous = 0
+            for doc, score in self.postings[term]:
+                flat += (doc - previous, score)
+                previous = doc
+            shard_terms[term_shard(term, shards)][term] = flat
+        for shard, postings in enumerate(shard_terms):
+            files[f'terms-{shard}.json'] = postings
+
+        written = []
+        for name, data in files.items():
+            path = directory / name
+            text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+            if write_if_changed(path, text + '\n'):
+                written.append(path)
+        if write_if_changed(directory / 'search.js', SEARCH_SCRIPT):
+            written.append(directory / 'search.js')
+
+        for stale in directory.glob('terms-*.json'):
+            if stale.name not in files:
+                stale.unlink()
+        return written
+
+
+def search_index(directory: Path, query: str,
+                 limit: Optional[int] = 20) -> List[Tuple[str, str, int]]:
+    """
+    Query a written index the way search.js does.
+
+    Every query term must occur in a document; documents are ranked by
+    their summed term scores.
+
+    Returns:
+        list: (url, title, score) tuples, best first
+    """
+    directory = Path(directory)
+    query_terms = sorted(set(terms(query)))
+    if not query_terms:
+        return []
+    index = json.loads((directory / 'index.json').read_text(encoding='utf-8'))
+
+    scores: Optional[Dict[int, int]] = None
+    for term in query_terms:
+        shard = term_shard(term, index['shards'])
+        postings = json.loads(
+            (directory / f'terms-{shard}.json').read_text(encoding='utf-8'))
+        flat = postings.get(term, [])
+        found = {}
+        doc = 0
+        for i in range(0, len(flat), 2):
+            doc += flat[i]
+            if scores is None or doc in scores:
+                found[doc] = (scores or {}).get(doc, 0) + flat[i + 1]
+        scores = found
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(*index['docs'][doc], score) for doc, score in ranked[:limit]]
+
+
+SEARCH_SCRIPT = '''\
+// Search over the index in this directory, written by HTML Clip Maker.
+//
+//   <script src="search/search.js"></script>
+//   const search = createSearch('search/');
+//   search('fourier transform').then(results => ...);
+//
+// Results are {url, title, score} objects, best first. The document list
+// loads on the first query and each term shard when a query needs it.
+(function (global) {
+  'use strict';
+
+  function terms(text) {
+    return text.toLowerCase().match(/[\\p{L}\\p{N}]{2,}/gu) || [];
+  }
+
+  // 32-bit FNV-1a over code points, as the index builder computes it
+  function termShard(term, shards) {
+    let h = 0x811c9dc5;
+    for (const char of term) {
+      h = Math.imul(h ^ char.codePointAt(0), 0x01000193) >>> 0;
+    }
+    return h % shards;
+  }
+
+  function createSearch(base) {
+    const root = new URL(base, document.baseURI);
+    const site = new URL('..', root);
+    const cache = new Map();
+
+    function load(name) {
+      if (!cache.has(name)) {
+        cache.set(name, fetch(new URL(name, root)).then(response => {
+          if (!response.ok) {
+            throw new Error(`${name}: ${response.status}`);
+          }
+          return response.json();
+        }));
+      }
+      return cache.get(name);
+    }
+
+    return async function search(query, limit = 20) {
+      const queryTerms = [...new Set(terms(query))];
+      if (!queryTerms.length) {
+        return [];
+      }
+      const index = await load('index.json');
+      const lists = await Promise.all(queryTerms.map(term =>
+        load(`terms-${termShard(term, index.shards)}.json`)
+          .then(postings => postings[term] || [])));
+
+      // Documents that contain every term, with summed scores
+      let scores = null;
+      for (const flat of lists) {
+        const found = new Map();
+        let doc = 0;
+        for (let i = 0; i < flat.length; i += 2) {
+          doc += flat[i];
+          if (scores === null || scores.has(doc)) {
+            found.set(doc, (scores ? scores.get(doc) : 0) + flat[i + 1]);
+          }
+        }
+        scores = found;
+      }
+
+      return [...scores]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, limit)
+        .map(([doc, score]) => ({
+          url: new URL(index.docs[doc][0], site).href,
+          title: index.docs[doc][1],
+          score,
+        }));
+    };
+  }
+
+  global.createSearch = createSearch;
+})(globalThis);
+'''
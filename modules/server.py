@@ -0,0 +1,414 @@
+"""Local HTTP render service module."""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from .preview import IncrementalRenderer, TextEdit
+from .watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+SSE_HEARTBEAT = 15.0
+# Open incremental previews; the least recently used is dropped beyond this
+MAX_PREVIEW_SESSIONS = 32
+
+RELOAD_SCRIPT = '''<script>
+    (function () {{
+        const source = new EventSource("/events");
+        source.addEventListener("change", function (event) {{
+            if (JSON.parse(event.data).path === {path}) {{
+                location.reload();
+            }}
+        }});
+    }})();
+</script>
+'''
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+# Warm application instance for the current executor worker
+_factory: Optional[Callable] = None
+_local = threading.local()
+
+
+def _init_worker(factory: Callable) -> None:
+    """Build the warm application instance for an executor worker."""
+    global _factory
+    _factory = factory
+    _local.app = factory()
+
+
+def _render(content: str, custom_styles: Optional[Dict]) -> str:
+    """Render content with the worker's warm application instance."""
+    app = getattr(_local, 'app', None)
+    if app is None:
+        app = _local.app = _factory()
+    return app.render(content, custom_styles)
+
+
+def _render_file(path: Path, custom_styles: Optional[Dict]) -> str:
+    """Render a source file with the worker's warm application instance."""
+    return _render(path.read_text(encoding='utf-8'), custom_styles)
+
+
+class HTTPError(Exception):
+    """An error that maps directly onto an HTTP status code."""
+
+    def __init__(self, status: int, message: str = ''):
+        super().__init__(message or _REASONS.get(status, ''))
+        self.status = status
+
+
+def _decode_text(body: bytes) -> str:
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        raise HTTPError(400, "Body must be UTF-8 text") from None
+
+
+@dataclass
+class PreviewSession:
+    """An incremental preview and the pages subscribed to its patches."""
+    renderer: IncrementalRenderer
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+
+
+class RenderServer:
+    """Serves rendered HTML and live-reload events over HTTP."""
+
+    def __init__(self, app_factory: Callable,
+                 workers: int = 2,
+                 executor: str = 'thread',
+                 watch_dir: Optional[Path] = None,
+                 custom_styles: Optional[Dict] = None,
+                 metrics=None):
+        """
+        Args:
+            app_factory: Callable returning an object with a ``render`` method
+            workers: Number of executor workers holding warm instances
+            executor: 'thread' or 'process'
+            watch_dir: Directory whose sources are served and live-reloaded
+            custom_styles: Custom styles applied to every render
+            metrics: PipelineMetrics shared with the workers, served at
+                /metrics (Prometheus text) and /metrics.json
+        """
+        if executor == 'thread':
+            pool_class = concurrent.futures.ThreadPoolExecutor
+        elif executor == 'process':
+            pool_class = concurrent.futures.ProcessPoolExecutor
+        else:
+            raise ValueError(f"Unknown executor: {executor}")
+
+        self.executor = pool_class(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(app_factory,)
+        )
+        self.app_factory = app_factory
+        self.watch_dir = Path(watch_dir).resolve() if watch_dir else None
+        self.custom_styles = custom_styles
+        self.metrics = metrics
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._previews: 'OrderedDict[str, PreviewSession]' = OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._watch_stop = threading.Event()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765,
+                    unix_path: Optional[Path] = None) -> asyncio.AbstractServer:
+        """Start listening on a TCP port or a Unix socket."""
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=str(unix_path))
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, host, port)
+
+        if self.watch_dir is not None:
+            self._watch_task = asyncio.ensure_future(self._watch())
+        return self._server
+
+    async def close(self) -> None:
+        """Stop listening and release the executor."""
+        self._watch_stop.set()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=False)
+
+    async def serve_forever(self, **kwargs) -> None:
+        """Start the server and run until cancelled."""
+        server = await self.start(**kwargs)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def render(self, content: str) -> str:
+        """Render content in the executor without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, _render, content, self.custom_styles)
+
+    def publish(self, path: str) -> None:
+        """Send a change event to all connected SSE clients."""
+        data = json.dumps({'path': path})
+        for queue in self._subscribers:
+            queue.put_nowait(('change', data))
+
+    async def open_preview(self, text: str) -> str:
+        """Start an incremental preview of text and return its session id."""
+        loop = asyncio.get_running_loop()
+        renderer = await loop.run_in_executor(
+            None, IncrementalRenderer, self.app_factory(), text,
+            self.custom_styles)
+        session_id = secrets.token_urlsafe(9)
+        self._previews[session_id] = PreviewSession(renderer)
+        while len(self._previews) > MAX_PREVIEW_SESSIONS:
+            self._previews.popitem(last=False)
+        return session_id
+
+    def _preview(self, session_id: str) -> PreviewSession:
+        try:
+            session = self._previews[session_id]
+        except KeyError:
+            raise HTTPError(404, "Unknown preview session") from None
+        self._previews.move_to_end(session_id)
+        return session
+
+    async def edit_preview(self, session_id: str, version: int,
+                           edits) -> Dict:
+        """
+        Apply edits made against ``version`` of a preview, push the
+        resulting patches to its pages, and return them.
+        """
+        session = self._preview(session_id)
+        async with session.lock:
+            renderer = session.renderer
+            if version != renderer.version:
+                raise HTTPError(409, f"Preview is at version {renderer.version}")
+            loop = asyncio.get_running_loop()
+            try:
+                patches = await loop.run_in_executor(
+                    None, renderer.apply, edits)
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+            reply = {'version': renderer.version, 'patches': patches}
+
+        if patches:
+            data = json.dumps(reply)
+            for queue in session.subscribers:
+                queue.put_nowait(('patch', data))
+        return reply
+
+    async def _watch(self) -> None:
+        """Forward filesystem changes to SSE subscribers."""
+        loop = asyncio.get_running_loop()
+        with FileWatcher(self.watch_dir) as watcher:
+            while not self._watch_stop.is_set():
+                changed = await loop.run_in_executor(None, watcher.poll, 0.5)
+                for path in sorted(changed):
+                    relative = path.relative_to(self.watch_dir).as_posix()
+                    logger.debug(f"Source changed: {relative}")
+                    self.publish(relative)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                method, target, headers = await self._read_head(reader)
+                body = await self._read_body(reader, headers)
+                if method == 'GET' and target == '/events':
+                    await self._stream_events(writer, self._subscribers)
+                    return
+                if (method == 'GET' and target.startswith('/preview/') and
+                        target.endswith('/events')):
+                    session_id = target[len('/preview/'):-len('/events')]
+                    await self._stream_events(
+                        writer, self._preview(session_id).subscribers)
+                    return
+                status, content_type, payload = await self._dispatch(
+                    method, target, body)
+            except HTTPError as e:
+                status, content_type = e.status, 'text/plain; charset=utf-8'
+                payload = f"{e}\n".encode('utf-8')
+            except Exception as e:
+                logger.error(f"Error handling request: {e}")
+                status, content_type = 500, 'text/plain; charset=utf-8'
+                payload = f"{e}\n".encode('utf-8')
+            await self._send(writer, status, content_type, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_head(self, reader: asyncio.StreamReader
+                         ) -> Tuple[str, str, Dict[str, str]]:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Malformed request line")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    async def _read_body(self, reader: asyncio.StreamReader,
+                         headers: Dict[str, str]) -> bytes:
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413)
+        return await reader.readexactly(length) if length else b''
+
+    async def _dispatch(self, method: str, target: str,
+                        body: bytes) -> Tuple[int, str, bytes]:
+        path = target.split('?', 1)[0]
+
+        if path == '/render':
+            if method != 'POST':
+                raise HTTPError(405)
+            html = await self.render(_decode_text(body))
+            return 200, 'text/html; charset=utf-8', html.encode('utf-8')
+
+        if path == '/preview' or path.startswith('/preview/'):
+            return await self._dispatch_preview(method, path, body)
+
+        if path in ('/metrics', '/metrics.json') and self.metrics is not None:
+            if method != 'GET':
+                raise HTTPError(405)
+            registry = self.metrics.registry
+            if path == '/metrics':
+                return (200, 'text/plain; version=0.0.4; charset=utf-8',
+                        registry.to_prometheus().encode('utf-8'))
+            return (200, 'application/json',
+                    json.dumps(registry.to_dict()).encode('utf-8'))
+
+        if path.startswith('/view/') and self.watch_dir is not None:
+            if method != 'GET':
+                raise HTTPError(405)
+            relative = unquote(path[len('/view/'):])
+            source_path = (self.watch_dir / relative).resolve()
+            if (self.watch_dir not in source_path.parents or
+                    not source_path.is_file()):
+                raise HTTPError(404)
+            loop = asyncio.get_running_loop()
+            html = await loop.run_in_executor(
+                self.executor, _render_file, source_path, self.custom_styles)
+            script = RELOAD_SCRIPT.format(path=json.dumps(relative))
+            html = html.replace('</body>', f'{script}</body>', 1)
+            return 200, 'text/html; charset=utf-8', html.encode('utf-8')
+
+        raise HTTPError(404)
+
+    async def _dispatch_preview(self, method: str, path: str,
+                                body: bytes) -> Tuple[int, str, bytes]:
+        """
+        Incremental preview protocol:
+
+        - ``POST /preview`` with the document text opens a session
+        - ``GET /preview/<id>`` serves the page, patched live from
+          ``GET /preview/<id>/events``
+        - ``POST /preview/<id>/edits`` with ``{"version": n, "edits":
+          [...]}`` applies edits and replies with the DOM patches
+        """
+        parts = path.split('/')[2:]
+        if not parts:
+            if method != 'POST':
+                raise HTTPError(405)
+            session_id = await self.open_preview(_decode_text(body))
+            reply = {'session': session_id, 'url': f'/preview/{session_id}',
+                     'version': 0}
+            return 200, 'application/json', json.dumps(reply).encode('utf-8')
+
+        if len(parts) == 1:
+            if method != 'GET':
+                raise HTTPError(405)
+            renderer = self._preview(parts[0]).renderer
+            loop = asyncio.get_running_loop()
+            html = await loop.run_in_executor(
+                None, renderer.page, f'{path}/events')
+            return 200, 'text/html; charset=utf-8', html.encode('utf-8')
+
+        if len(parts) == 2 and parts[1] == 'edits':
+            if method != 'POST':
+                raise HTTPError(405)
+            try:
+                request = json.loads(_decode_text(body))
+                version = int(request['version'])
+                edits = [TextEdit.from_dict(edit) for edit in request['edits']]
+            except (ValueError, KeyError, TypeError) as e:
+                raise HTTPError(400, f"Malformed edit request: {e}") from None
+            reply = await self.edit_preview(parts[0], version, edits)
+            return 200, 'application/json', json.dumps(reply).encode('utf-8')
+
+        raise HTTPError(404)
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int,
+                    content_type: str, payload: bytes) -> None:
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+    async def _stream_events(self, writer: asyncio.StreamWriter,
+                             subscribers: Set[asyncio.Queue]) -> None:
+        """Hold a Server-Sent Events stream open and push the events
+        queued for ``subscribers``."""
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n"
+                     b": connected\n\n")
+        await writer.drain()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(),
+                                                         SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                else:
+                    writer.write(f"event: {event}\ndata: {data}\n\n".encode('utf-8'))
+                await writer.drain()
+        finally:
+            subscribers.discard(queue)
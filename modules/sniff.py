@@ -0,0 +1,44 @@
+"""Content sniffing module.
+
+One scan over the raw input decides which pipeline stages can change the
+output at all, so ``HTMLClipMaker.process_content`` can skip the rest.
+The checks are conservative: a false positive only costs the full
+pipeline, never different output.
+"""
+
+import re
+from dataclasses import dataclass
+
+# Substrings any markdown or math syntax needs somewhere: inline markup,
+# bare URLs, headers and blockquotes, and display math delimiters, plus
+# the HTML special characters prose is escaped for. Substring checks run
+# at memchr speed, far faster than one regex with all of these as
+# alternatives.
+MARKUP_SUBSTRINGS = ('*', '`', '~', '[', '#', '>', '<', '&', '://', '$$', '\\[')
+
+# List items are the one block marker made of common prose characters, so
+# they are matched at line starts; the first line is checked separately
+LIST_ITEM_PATTERN = re.compile(r'\n[^\S\n]*(?:-|\d+\.)\s')
+FIRST_LIST_ITEM_PATTERN = re.compile(r'[^\S\n]*(?:-|\d+\.)\s')
+
+
+@dataclass
+class ContentProfile:
+    """Which pipeline stages a document needs."""
+    display_math: bool  # '$$' or '\[' present: the math stage may act
+    markup: bool        # Any markdown or math syntax present
+
+    @property
+    def plain(self) -> bool:
+        """Plain prose that the markdown stage passes through unchanged."""
+        return not self.markup
+
+
+def sniff(text: str) -> ContentProfile:
+    """Profile a document with substring checks and a line-start scan."""
+    display_math = '$$' in text or '\\[' in text
+    markup = (display_math or
+              any(marker in text for marker in MARKUP_SUBSTRINGS) or
+              FIRST_LIST_ITEM_PATTERN.match(text) is not None or
+              LIST_ITEM_PATTERN.search(text) is not None)
+    return ContentProfile(display_math=display_math, markup=markup)
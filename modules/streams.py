@@ -0,0 +1,103 @@
+"""Bounded-memory input module."""
+
+import mmap
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, List, TextIO, Union
+
+
+def iter_file_lines(path: Union[str, Path]) -> Iterator[str]:
+    """
+    Iterate over the lines of a file through ``mmap``.
+
+    Lines are yielded without their line break, matching
+    ``normalize_newlines(text).split('\\n')``; only the current line is
+    decoded at a time.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            yield ''
+            return
+
+        with mapped:
+            start = 0
+            size = len(mapped)
+            while True:
+                end = mapped.find(b'\n', start)
+                line = mapped[start:size if end == -1 else end].decode('utf-8')
+                if '\r' in line:
+                    yield from _split_returns(line, end != -1)
+                else:
+                    yield line
+                if end == -1:
+                    return
+                start = end + 1
+
+
+def iter_stream_lines(stream: TextIO) -> Iterator[str]:
+    """
+    Iterate over the lines of a text stream without their line breaks.
+
+    '\\r\\n' and bare '\\r' count as line breaks whether or not the
+    stream translates them, so the lines match ``iter_file_lines``.
+    """
+    for line in stream:
+        if line.endswith('\r\n'):
+            body, terminated = line[:-2], True
+        elif line.endswith(('\n', '\r')):
+            body, terminated = line[:-1], True
+        else:
+            body, terminated = line, False
+        if '\r' in body:
+            yield from _split_returns(body, False)
+        else:
+            yield body
+        if not terminated:
+            return
+    # Like split(), a trailing line break leaves an empty final line
+    yield ''
+
+
+def _split_returns(line: str, newline_follows: bool) -> List[str]:
+    """Split text without '\\n' at bare '\\r' breaks. If a '\\n' follows
+    it, a final '\\r' is part of that '\\r\\n' break."""
+    if newline_follows and line.endswith('\r'):
+        line = line[:-1]
+    return line.split('\r')
+
+
+def iter_input_lines(source: Union[str, Path]) -> Iterator[str]:
+    """Iterate over lines from a file path, or from stdin for '-'."""
+    if str(source) == '-':
+        return iter_stream_lines(sys.stdin)
+    return iter_file_lines(source)
+
+
+def strip_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Lazily apply ``str.strip`` to a document given as lines.
+
+    Equivalent to ``'\\n'.join(lines).strip().split('\\n')`` while holding
+    back only the run of blank lines that might turn out to be trailing.
+    """
+    pending = []
+    last = None
+    for line in lines:
+        if last is None:
+            # Drop leading blank lines
+            if not line.strip():
+                continue
+            last = line.lstrip()
+            continue
+        if not line.strip():
+            pending.append(line)
+            continue
+        yield last
+        yield from pending
+        pending = []
+        last = line
+
+    yield '' if last is None else last.rstrip()
@@ -0,0 +1,92 @@
+"""Output target module.
+
+One conversion can produce several artifacts: the styled page, a bare
+fragment for embedding elsewhere, and a JSON summary. The math and
+markdown passes run once; each target serializes the shared result.
+"""
+
+import html
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# Target name -> suffix of its output file
+TARGETS = {
+    'page': '.html',
+    'fragment': '.fragment.html',
+    'json': '.json',
+}
+DEFAULT_TARGETS = ('page',)
+
+_HEADING_PATTERN = re.compile(r'^<h([1-6])[^>]*>(.*)</h\1>$')
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def check_targets(targets: Sequence[str]) -> None:
+    """Raise ValueError for an empty list or unknown or repeated names."""
+    if not targets:
+        raise ValueError("No output targets given")
+    for target in targets:
+        if target not in TARGETS:
+            raise ValueError(f"Unknown output target: {target}")
+    if len(set(targets)) != len(targets):
+        raise ValueError(f"Repeated output target in: {', '.join(targets)}")
+
+
+@dataclass
+class ParsedDocument:
+    """A document after the math and markdown passes and wrapping."""
+    title: str
+    wrapped: str   # Wrapped content, as it appears inside the page body
+    source: str    # Raw input text
+    timestamp: str
+
+
+def headings(wrapped: str) -> List[Dict]:
+    """Return the document's headings as ``{"level", "text"}`` dicts."""
+    outline = []
+    for line in wrapped.split('\n'):
+        if not line.startswith('<h'):
+            continue
+        match = _HEADING_PATTERN.match(line)
+        if match:
+            text = html.unescape(_TAG_PATTERN.sub('', match.group(2)))
+            outline.append({'level': int(match.group(1)), 'text': text})
+    return outline
+
+
+def serialize_page(app, document: ParsedDocument,
+                   custom_styles: Optional[Dict] = None) -> str:
+    """The complete styled page, as ``HTMLClipMaker.render`` produces it."""
+    return app.page_html(document.title, document.wrapped, custom_styles,
+                         document.timestamp)
+
+
+def serialize_fragment(app, document: ParsedDocument,
+                       custom_styles: Optional[Dict] = None) -> str:
+    """The page body's content alone, for embedding in another page."""
+    return document.wrapped + '\n'
+
+
+def serialize_json(app, document: ParsedDocument,
+                   custom_styles: Optional[Dict] = None) -> str:
+    """A summary: title, outline and word count, plus the fragment."""
+    from .config import VERSION
+
+    summary = {
+        'title': document.title,
+        'version': VERSION,
+        'timestamp': document.timestamp,
+        'headings': headings(document.wrapped),
+        'words': len(document.source.split()),
+        'html': document.wrapped,
+    }
+    return json.dumps(summary, indent=2, ensure_ascii=False) + '\n'
+
+
+SERIALIZERS = {
+    'page': serialize_page,
+    'fragment': serialize_fragment,
+    'json': serialize_json,
+}
@@ -0,0 +1,102 @@
+"""Timing spans with Chrome trace-event export."""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+class _Span:
+    """Context manager recording one complete ('X') trace event."""
+
+    __slots__ = ('_tracer', '_name', '_category', '_args', '_start')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Dict):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self) -> '_Span':
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        end = time.perf_counter_ns()
+        self._tracer.add_event(self._name, self._category, self._start, end,
+                               self._args)
+
+
+class _NullSpan:
+    """Span that records nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Records timing spans and exports them as Chrome trace-event JSON.
+
+    The output can be opened in Perfetto (ui.perfetto.dev) or
+    chrome://tracing.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = 'stage', **args) -> _Span:
+        """Return a context manager timing the enclosed code."""
+        return _Span(self, name, category, args)
+
+    def add_event(self, name: str, category: str, start_ns: int, end_ns: int,
+                  args: Dict = None) -> None:
+        """Record a completed span given perf_counter_ns timestamps."""
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start_ns - self._origin) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def to_dict(self) -> Dict:
+        """Return the trace in Chrome trace-event format."""
+        return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def save(self, path: Path) -> None:
+        """Write the trace as JSON."""
+        import json
+
+        Path(path).write_text(json.dumps(self.to_dict()), encoding='utf-8')
+
+
+class NullTracer:
+    """Tracer that records nothing; the default when tracing is off."""
+
+    enabled = False
+
+    def span(self, name: str, category: str = 'stage', **args) -> _NullSpan:
+        """Return a context manager that does nothing."""
+        return _NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
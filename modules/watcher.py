@@ -0,0 +1,228 @@
+"""Filesystem change detection module."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from errno import ENOENT, ENOTDIR
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Set, Tuple
+
+# inotify event masks (see inotify(7))
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+DEFAULT_SUFFIXES = ('.txt', '.md')
+
+
+def _scan(root: Path) -> Dict[Path, Tuple[int, int]]:
+    """Return a ``{path: (mtime_ns, size)}`` snapshot of all files under root."""
+    snapshot = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+    return snapshot
+
+
+class PollingBackend:
+    """Detects changes by comparing mtime/size snapshots."""
+
+    def __init__(self, root: Path, interval: float = 0.25):
+        self.root = root
+        self.interval = interval
+        self._snapshot = _scan(root)
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        """Wait up to ``timeout`` seconds and return paths that changed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = _scan(self.root)
+            changed = {path for path, stamp in snapshot.items()
+                       if self._snapshot.get(path) != stamp}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class InotifyBackend:
+    """Detects changes through the Linux inotify API."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._dirs: Dict[int, Path] = {}
+        for dirpath, _, _ in os.walk(root):
+            self._add_watch(Path(dirpath))
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether inotify can be used on this platform."""
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'))
+            return hasattr(libc, 'inotify_init1')
+        except OSError:
+            return False
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory),
+                                          _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno in (ENOENT, ENOTDIR):
+                # Removed (or replaced) before it could be watched
+                return
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+        self._dirs[wd] = directory
+
+    def read(self, timeout: Optional[float]) -> Set[Path]:
+        """Wait up to ``timeout`` seconds and return paths that changed."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self._fd, 64 * 1024)
+        changed: Set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped; fall back to reporting everything
+                changed.update(_scan(self.root))
+                continue
+
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+
+            if mask & _IN_ISDIR:
+                # New subdirectories are watched and their files reported
+                for dirpath, _, _ in os.walk(path):
+                    self._add_watch(Path(dirpath))
+                changed.update(_scan(path))
+            elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                # IN_CREATE alone fires before the file has any content
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        """Release backend resources."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class FileWatcher:
+    """Watches a directory tree for created and modified source files."""
+
+    def __init__(self, directory: Path,
+                 suffixes: Sequence[str] = DEFAULT_SUFFIXES,
+                 debounce: float = 0.05,
+                 backend: str = 'auto',
+                 poll_interval: float = 0.25):
+        self.directory = Path(directory)
+        self.suffixes = tuple(suffixes)
+        self.debounce = debounce
+
+        if backend == 'auto':
+            backend = 'inotify' if InotifyBackend.is_available() else 'poll'
+        if backend == 'inotify':
+            self._backend = InotifyBackend(self.directory)
+        elif backend == 'poll':
+            self._backend = PollingBackend(self.directory, poll_interval)
+        else:
+            raise ValueError(f"Unknown watch backend: {backend}")
+        self.backend = backend
+
+    def sources(self) -> Iterator[Path]:
+        """Iterate over all watched source files currently on disk."""
+        for path in sorted(_scan(self.directory)):
+            if self._is_source(path):
+                yield path
+
+    def poll(self, timeout: Optional[float] = None) -> Set[Path]:
+        """
+        Wait for changes and return the debounced batch of changed sources.
+
+        Args:
+            timeout: Seconds to wait for the first change, None to block
+
+        Returns:
+            set: Changed source paths, empty if the timeout expired
+        """
+        changed = self._filter(self._backend.read(timeout))
+        if not changed:
+            return changed
+
+        # Keep collecting until the burst of saves has settled
+        while True:
+            more = self._filter(self._backend.read(self.debounce))
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self) -> None:
+        """Stop watching."""
+        self._backend.close()
+
+    def __iter__(self) -> Iterator[Set[Path]]:
+        while True:
+            changed = self.poll()
+            if changed:
+                yield changed
+
+    def __enter__(self) -> 'FileWatcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _is_source(self, path: Path) -> bool:
+        return path.suffix in self.suffixes and not path.name.startswith('.')
+
+    def _filter(self, paths: Set[Path]) -> Set[Path]:
+        return {path for path in paths if self._is_source(path)}
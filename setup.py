@@ -19,7 +19,7 @@ setup(
     author="Your Name",
     author_email="your.email@example.com",
     url="https://github.com/yourusername/html-clip-maker",
-    packages=find_packages(exclude=["tests*"]),
+    packages=find_packages(exclude=["tests*", "benchmarks*"]),
     include_package_data=True,
     package_data={
         'html-clip-maker': ['templates/*.html'],
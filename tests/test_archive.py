@@ -0,0 +1,105 @@
+"""Tests for the content-addressed archive."""
+
+import hashlib
+import sys
+import zlib
+import pytest
+
+from modules.archive import ObjectStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture for an empty ObjectStore."""
+    return ObjectStore(tmp_path / "archive")
+
+
+def test_put_and_get(store):
+    """Test storing and retrieving a blob."""
+    data = b"# Title\nSome clipboard content\n" * 10
+    digest = store.put(data)
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert store.contains(digest)
+    assert store.get(digest) == data
+
+    path = store.object_path(digest)
+    assert path.parent.name == digest[:2]
+    assert path.name == digest[2:]
+    assert zlib.decompress(path.read_bytes()) == data
+    assert path.stat().st_size < len(data)
+
+
+def test_deduplication(store):
+    """Test that identical content is stored once."""
+    first = store.put_text("clip-a", "same paste")
+    second = store.put_text("clip-b", "same paste")
+
+    assert first == second
+    blobs = [p for p in (store.root / "objects").rglob("*") if p.is_file()]
+    assert len(blobs) == 1
+    assert store.index() == {"clip-a": first, "clip-b": first}
+
+
+def test_latest_name_wins(store):
+    """Test that re-archiving a name points it at the new content."""
+    store.put_text("clip", "first version")
+    store.put_text("clip", "second version")
+    assert store.get_text("clip") == "second version"
+
+
+def test_repeated_archive_adds_nothing(store):
+    """Test that archiving the same text again leaves the archive unchanged."""
+    store.put_text("clip", "the same paste")
+    index_size = (store.root / "index").stat().st_size
+    store.put_text("clip", "the same paste")
+    assert (store.root / "index").stat().st_size == index_size
+    assert len([p for p in store.root.rglob("*") if p.is_file()]) == 2
+
+    # Going back to earlier content is still recorded
+    store.put_text("clip", "an edit")
+    store.put_text("clip", "the same paste")
+    assert store.get_text("clip") == "the same paste"
+
+
+def test_unicode_text(store):
+    """Test round-tripping non-ASCII text."""
+    store.put_text("math", "∫ e^{-x²} dx = √π")
+    assert store.get_text("math") == "∫ e^{-x²} dx = √π"
+
+
+def test_missing_entries(store):
+    """Test lookups of missing names and digests."""
+    assert store.lookup("missing") is None
+    assert store.index() == {}
+    with pytest.raises(KeyError):
+        store.get_text("missing")
+    with pytest.raises(KeyError):
+        store.get("0" * 64)
+
+
+def test_invalid_name(store):
+    """Test that names which would corrupt the index are rejected."""
+    with pytest.raises(ValueError):
+        store.put_text("bad\nname", "content")
+
+
+def test_archive_with_input_file(tmp_path, monkeypatch):
+    """Test that --archive stores the text read with --input."""
+    import main
+
+    source = tmp_path / "source.md"
+    source.write_text("# Note\nSome *text*\n")
+    archive = tmp_path / "archive"
+    base = str(tmp_path / "note")
+    monkeypatch.setattr(sys, 'argv', [
+        'html_clip_maker', base, '-i', str(source), '--archive', str(archive)])
+    main.main()
+
+    assert (tmp_path / "note.html").exists()
+    assert not (tmp_path / "note.txt").exists()
+    assert ObjectStore(archive).get_text(base) == source.read_text()
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,116 @@
+"""Tests for the markdown backends, on a shared corpus."""
+
+import pytest
+
+from main import HTMLClipMaker
+from modules.backends import BACKENDS, create_backend
+
+# (name, document body, fragments the processed content must contain);
+# every backend is held to the same expectations
+CORPUS = [
+    ('header', "## Section", ['<h2>Section</h2>']),
+    ('emphasis', "**bold** and *em*", ['<strong>bold</strong>', '<em>em</em>']),
+    ('inline_code', "`x = 1`", ['<code>x = 1</code>']),
+    ('link', "[site](https://example.com)",
+     ['<a href="https://example.com">site</a>']),
+    ('fenced_code', "```python\nprint(1)\n```",
+     ['class="language-python"', 'print(1)']),
+    ('list', "- one\n- two", ['<li>one</li>', '<li>two</li>']),
+    ('blockquote', "> quoted", ['<blockquote>', 'quoted']),
+    ('inline_math', "$a_1 * b_2$ and $c*d$", ['$a_1 * b_2$', '$c*d$']),
+    ('display_math', "$$\na_1 = b_1\n$$", ['$$ a_1 = b_1 $$']),
+    ('bracket_math', "\\[\nx_1 + y_1\n\\]", ['\\[ x_1 + y_1 \\]']),
+    ('math_markup', "$$\n*a* = _b_ + **c**\n$$", ['$$ *a* = _b_ + **c** $$']),
+    ('math_in_code_span', "`$x$`", ['<code>$x$</code>']),
+    ('html_specials', "a < b & c > d", ['a &lt; b &amp; c &gt; d']),
+    ('raw_html', "<script>x</script>", ['&lt;script&gt;x&lt;/script&gt;']),
+    ('code_specials', "```\nif a<b && c:\n```", ['if a&lt;b &amp;&amp; c:']),
+    ('math_specials', "$a<b$ and\n$$\nx &= y\n$$",
+     ['$a&lt;b$', '$$ x &amp;= y $$']),
+    ('link_ampersand', "[q](https://e.com/?a=1&b=2)",
+     ['<a href="https://e.com/?a=1&amp;b=2">q</a>']),
+]
+
+
+@pytest.fixture(scope='module', params=BACKENDS)
+def app(request):
+    if request.param == 'python-markdown':
+        pytest.importorskip('markdown')
+    return HTMLClipMaker(backend=request.param)
+
+
+@pytest.mark.parametrize("name,body,expected", CORPUS,
+                         ids=[case[0] for case in CORPUS])
+def test_corpus(app, name, body, expected):
+    """Test that every backend renders the shared corpus."""
+    title, content = app.process_content(f"Doc\n{body}")
+    assert title == "Doc"
+    for fragment in expected:
+        assert fragment in content
+
+
+def test_render_document(app):
+    """Test a complete document through each backend."""
+    html = app.render("# Notes\nSome *text* with $x^2$\n\n$$\ny = 1\n$$")
+    assert '<title>Notes</title>' in html
+    assert '$x^2$' in html
+    assert '$$ y = 1 $$' in html
+
+
+def test_process_inline(app):
+    """Test rendering a single line of inline markup."""
+    assert app.markdown.process_inline("a **b**") == "a <strong>b</strong>"
+
+
+def test_unknown_backend():
+    """Test error handling for an unknown backend name."""
+    with pytest.raises(ValueError):
+        create_backend('pandoc')
+
+
+class TestPythonMarkdown:
+    """Behaviour specific to the python-markdown backend."""
+
+    @pytest.fixture
+    def processor(self):
+        pytest.importorskip('markdown')
+        return create_backend('python-markdown')
+
+    def test_one_chunk_per_element(self, processor):
+        """Test that each top-level element is emitted on one line."""
+        chunks = list(processor.iter_process(
+            ["para one", "continued", "", "- a", "- b", "", "```",
+             "x", "", "y", "```"]))
+        assert chunks == [
+            '<p>para one&#10;continued</p>',
+            '<ul><li>a</li><li>b</li></ul>',
+            '<pre><code>x&#10;&#10;y&#10;</code></pre>',
+        ]
+
+    def test_math_escaped_and_code_untouched(self, processor):
+        """Test that math is HTML-escaped verbatim and code keeps dollars."""
+        content = processor.process(
+            "$$ a < b $$\n\n```\ncost: $5 and $6\n```")
+        assert '$$ a &lt; b $$' in content
+        assert 'cost: $5 and $6' in content
+
+    def test_repeated_conversions_independent(self, processor):
+        """Test that state does not leak between documents."""
+        processor.process("[a]: https://example.com\n\n$x$")
+        assert processor.process("[a]") == '<p>[a]</p>'
+
+    def test_preview_uses_one_block(self):
+        """Test that previews fall back to re-rendering the whole document."""
+        pytest.importorskip('markdown')
+        from modules.preview import IncrementalRenderer, TextEdit
+
+        app = HTMLClipMaker(backend='python-markdown')
+        renderer = IncrementalRenderer(app, "Title\none\ntwo\n\nthree")
+        renderer.apply([TextEdit('*', (1, 0), (1, 0))])
+        assert len(renderer.blocks) == 1
+        title, content = app.process_content(renderer.text)
+        assert renderer.content() == app.html_gen.wrap_content(content)
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
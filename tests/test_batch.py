@@ -0,0 +1,146 @@
+"""Tests for sharded batch conversion and manifest merging."""
+
+import sys
+import pytest
+
+from main import HTMLClipMaker
+from modules.batch import (ShardManifest, convert_shard, list_sources,
+                           merge_manifests, parse_shard, shard_of)
+
+COUNT = 3
+
+
+@pytest.fixture
+def notes(tmp_path):
+    """Fixture for a source tree of notes."""
+    root = tmp_path / "notes"
+    (root / "sub").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    for i in range(12):
+        (root / f"note{i}.md").write_text(f"# Note {i}\nSome *text* {i}\n")
+    (root / "sub" / "deep.txt").write_text("Deep\n$x^2$\n")
+    (root / "sub" / "image.png").write_bytes(b"\x89PNG")
+    (root / ".hidden" / "skip.md").write_text("Hidden\n")
+    return root
+
+
+def convert_all(notes, output_dir, count=COUNT):
+    app = HTMLClipMaker(timestamp="2024-01-01 00:00:00")
+    return [convert_shard(app, notes, output_dir, shard, count)
+            for shard in range(1, count + 1)]
+
+
+def test_parse_shard():
+    """Test parsing and validation of i/N."""
+    assert parse_shard("2/4") == (2, 4)
+    for value in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_list_sources(notes):
+    """Test that sources are relative POSIX paths, without hidden files."""
+    sources = list_sources(notes)
+    assert len(sources) == 13
+    assert "sub/deep.txt" in sources
+    assert sources == sorted(sources)
+
+
+def test_shards_partition_sources(notes, tmp_path):
+    """Test that the shards convert every source exactly once."""
+    manifests = convert_all(notes, tmp_path / "out")
+    converted = [entry.source for manifest in manifests
+                 for entry in manifest.entries]
+    assert sorted(converted) == list_sources(notes)
+    for manifest in manifests:
+        assert all(shard_of(entry.source, COUNT) == manifest.shard
+                   for entry in manifest.entries)
+    assert (tmp_path / "out" / "sub" / "deep.html").exists()
+
+    merged = merge_manifests(manifests)
+    assert merged.ok, merged.problems
+    assert merged.total == 13
+    assert [entry.source for entry in merged.entries] == list_sources(notes)
+
+
+def test_manifest_round_trip(notes, tmp_path):
+    """Test that a saved manifest loads back unchanged."""
+    manifest = convert_all(notes, tmp_path / "out", count=1)[0]
+    path = tmp_path / "m" / "shard.json"
+    manifest.save(path)
+    assert ShardManifest.load(path) == manifest
+
+    # Output hashes are of the files written
+    import hashlib
+    entry = manifest.entries[0]
+    output = (tmp_path / "out" / entry.output).read_bytes()
+    assert hashlib.sha256(output).hexdigest() == entry.output_sha256
+
+
+def test_missing_and_duplicated_shards(notes, tmp_path):
+    """Test that merging reports missing and repeated shards."""
+    manifests = convert_all(notes, tmp_path / "out")
+    merged = merge_manifests(manifests[:2])
+    assert not merged.ok
+    assert f"Missing manifest for shard 3/{COUNT}" in merged.problems
+    assert any("were not converted" in problem for problem in merged.problems)
+
+    merged = merge_manifests(manifests + [manifests[0]])
+    assert merged.problems == [f"2 manifests for shard 1/{COUNT}"]
+
+
+def test_source_converted_twice(notes, tmp_path):
+    """Test that a source in two shards' manifests is reported."""
+    manifests = convert_all(notes, tmp_path / "out")
+    stray = manifests[0].entries[0]
+    manifests[1].entries.append(stray)
+    problems = merge_manifests(manifests).problems
+    assert f"{stray.source} converted by shards 1 and 2" in problems
+
+
+def test_listing_changed_between_shards(notes, tmp_path):
+    """Test that shards that saw different source trees do not merge."""
+    first = convert_all(notes, tmp_path / "out")
+    (notes / "late.md").write_text("Late\n")
+    second = convert_all(notes, tmp_path / "out")
+    problems = merge_manifests([first[0], second[1], second[2]]).problems
+    assert any("different listing" in problem for problem in problems)
+
+
+def test_failed_conversion_recorded(notes, tmp_path):
+    """Test that a source that cannot be decoded fails alone."""
+    (notes / "binary.md").write_bytes(b"\xff\xfe")
+    manifests = convert_all(notes, tmp_path / "out")
+    failed = [entry for manifest in manifests for entry in manifest.failed]
+    assert [entry.source for entry in failed] == ["binary.md"]
+    assert failed[0].output is None
+    assert not merge_manifests(manifests).ok
+
+
+def test_batch_commands(notes, tmp_path, monkeypatch):
+    """Test sharded runs and the merge from the command line."""
+    import main
+
+    for shard in range(1, COUNT + 1):
+        monkeypatch.setattr(sys, 'argv', [
+            'html_clip_maker', 'batch', str(notes), '--shard', f"{shard}/{COUNT}"])
+        main.main()
+    manifests = sorted((notes / ".manifests").glob("*.json"))
+    assert len(manifests) == COUNT
+    assert (notes / "note0.html").exists()
+
+    merged = tmp_path / "merged.json"
+    monkeypatch.setattr(sys, 'argv', [
+        'html_clip_maker', 'merge-manifests', *map(str, manifests),
+        '-o', str(merged)])
+    main.main()
+    assert merged.exists()
+
+    monkeypatch.setattr(sys, 'argv', [
+        'html_clip_maker', 'merge-manifests', str(manifests[0])])
+    with pytest.raises(SystemExit):
+        main.main()
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
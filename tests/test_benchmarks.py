@@ -0,0 +1,122 @@
+"""Tests for the benchmark corpus generator and result comparison."""
+
+import pytest
+
+from benchmarks.corpus import KINDS, CorpusGenerator, format_size, parse_size
+from benchmarks.legacy import (Sandbox, compare_document, legacy_available,
+                               normalize, structural_diff)
+from benchmarks.runner import ESCAPERS, STAGES, bench_escape, compare, run
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_corpus_is_deterministic(kind):
+    """Test that the same seed produces the same document."""
+    assert (CorpusGenerator(1).generate(kind, 4096) ==
+            CorpusGenerator(1).generate(kind, 4096))
+    assert (CorpusGenerator(1).generate(kind, 4096) !=
+            CorpusGenerator(2).generate(kind, 4096))
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("size", [1024, 64 * 1024])
+def test_corpus_size(kind, size):
+    """Test that documents reach the requested size without overshooting much."""
+    text = CorpusGenerator().generate(kind, size)
+    assert size <= len(text.encode('utf-8')) < size + 2048
+
+
+@pytest.mark.parametrize("kind,marker", [
+    ('list', '- '),
+    ('code', '```'),
+    ('math', '$'),
+])
+def test_corpus_kind_content(kind, marker):
+    """Test that each kind is dominated by its block type."""
+    assert marker in CorpusGenerator().generate(kind, 8192)
+
+
+def test_unknown_kind():
+    """Test error handling for unknown corpus kinds."""
+    with pytest.raises(ValueError):
+        CorpusGenerator().generate('poetry', 1024)
+
+
+@pytest.mark.parametrize("text,size", [
+    ('1K', 1024), ('100K', 102400), ('10M', 10485760), ('2048', 2048)
+])
+def test_size_round_trip(text, size):
+    """Test parsing and formatting of document sizes."""
+    assert parse_size(text) == size
+    assert format_size(size) == ('2K' if text == '2048' else text)
+
+
+def test_run_reports_every_stage():
+    """Test that a small run produces a result for every stage."""
+    results = run(kinds=['mixed'], sizes=[1024], repeat=1)
+    assert [r['stage'] for r in results['results']] == list(STAGES)
+    assert all(r['min'] >= 0 for r in results['results'])
+
+
+def test_bench_escape():
+    """Test that every escaping strategy is timed on the same lines."""
+    results = bench_escape(kinds=['code'], sizes=[1024], repeat=1)
+    assert [r['escaper'] for r in results] == list(ESCAPERS)
+    line = 'if a < b && c > d:'
+    assert len({escape(line) for escape in ESCAPERS.values()}) == 1
+
+
+def test_compare_flags_regressions():
+    """Test regression detection against a threshold."""
+    def results(seconds):
+        return {'results': [
+            {'kind': 'prose', 'size': '1K', 'stage': stage, 'min': value}
+            for stage, value in zip(STAGES, seconds)
+        ]}
+
+    baseline = results([1.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+    current = results([1.05, 1.2, 0.5, 1.0, 1.11, 1.0])
+    flagged = [row['stage'] for row in compare(baseline, current, 0.10)
+               if row['regression']]
+    assert flagged == ['markdown', 'save']
+
+
+def test_normalize_ignores_presentation():
+    """Test that classes and whitespace do not count as differences."""
+    page = ('<html><head><title> A  title </title></head><body>'
+            '<div id="content">\n<div class="indent-h2 x">one\n two</div>'
+            '<a href="https://e.com" class="link">e</a><br></div>'
+            '<div class="footer">ignored</div></body></html>')
+    assert normalize(page) == [
+        'title: A title', '<div>', 'text: one two', '</div>',
+        '<a href="https://e.com">', 'text: e', '</a>', '<br>']
+
+
+def test_structural_diff():
+    """Test the diff summary of two normalized pages."""
+    assert structural_diff(['a', 'b'], ['a', 'b'])['first_difference'] is None
+    summary = structural_diff(['a', 'b', 'c'], ['a', 'x', 'c', 'd'])
+    assert summary['first_difference'] == 1
+    assert (summary['only_legacy'], summary['only_python']) == (1, 2)
+    assert '-b' in summary['diff'] and '+x' in summary['diff']
+
+
+@pytest.mark.skipif(not legacy_available(), reason="needs bash, awk and sed")
+def test_compare_with_legacy():
+    """Test a differential run on a document both implementations agree on."""
+    text = "Title\n## Part\nSome **bold** text\n$$\nx = 1\n$$"
+    with Sandbox() as sandbox:
+        result = compare_document(sandbox, text, repeat=1)
+        assert not sandbox.work.joinpath('template.html').exists()
+    for name in ('legacy', 'python'):
+        assert result[name]['returncode'] == 0
+        assert result[name]['max_rss_kb'] > 0
+    # The legacy script repeats the title as a heading in the body
+    assert result['first_difference'] == 1
+    assert (result['only_legacy'], result['only_python']) == (3, 0)
+    changed = [line for line in result['diff'][2:] if line[0] in '+-']
+    assert changed == ['-<h1>', '-text: Title', '-</h1>']
+    assert not result['equivalent']
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
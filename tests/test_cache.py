@@ -0,0 +1,157 @@
+"""Tests for the cross-run conversion cache."""
+
+import os
+import sys
+import pytest
+
+from modules.cache import ConversionCache, conversion_key
+
+SETTINGS = {'version': '1', 'template': 'default'}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture for an empty ConversionCache."""
+    return ConversionCache(tmp_path / "cache")
+
+
+def set_atime(path, seconds):
+    os.utime(path, (seconds, path.stat().st_mtime))
+
+
+def test_conversion_key():
+    """Test that keys depend on the text and every setting."""
+    key = conversion_key(["# Title", "body"], SETTINGS)
+    assert key == conversion_key(["# Title\nbody"], SETTINGS)
+    assert key != conversion_key(["# Title", "body", ""], SETTINGS)
+    assert key != conversion_key(["# Title", "body"],
+                                 {**SETTINGS, 'template': 'fast'})
+
+
+def test_settings_cover_template_text(monkeypatch):
+    """Test that editing the template changes the cache key."""
+    from main import HTMLClipMaker
+    from modules.html_generator import HTMLGenerator
+
+    lines = ["# Title", "body"]
+    before = conversion_key(lines, HTMLClipMaker().output_settings())
+    monkeypatch.setattr(HTMLGenerator, '_load_base_template',
+                        lambda self: '<!-- changed -->{content}')
+    after = conversion_key(lines, HTMLClipMaker().output_settings())
+    assert before != after
+
+
+def test_fetch_links_entry(cache, tmp_path):
+    """Test that a hit hard-links the stored document into place."""
+    key = conversion_key(["text"], SETTINGS)
+    dest = tmp_path / "out.html"
+    assert cache.fetch(key, dest) is None
+
+    entry = cache.put(key, "<html>cached</html>")
+    assert cache.fetch(key, dest) is True
+    assert dest.read_text() == "<html>cached</html>"
+    assert os.path.samefile(dest, entry)
+    assert cache.read(key) == b"<html>cached</html>"
+
+    # Already in place
+    assert cache.fetch(key, dest, skip_unchanged=True) is False
+
+
+def test_output_rewritten_in_place(cache, tmp_path):
+    """Test that an entry changed through a linked output is not used."""
+    key = conversion_key(["text"], SETTINGS)
+    dest = tmp_path / "out.html"
+    cache.put(key, "<html>cached</html>")
+    cache.fetch(key, dest)
+
+    with open(dest, 'w') as f:
+        f.write("edited")
+    assert cache.read(key) is None
+    assert cache.fetch(key, tmp_path / "other.html") is None
+    assert dest.read_text() == "edited"
+
+
+def test_relative_root(tmp_path, monkeypatch):
+    """Test a cache directory given relative to the working directory."""
+    monkeypatch.chdir(tmp_path)
+    cache = ConversionCache("cache")
+    key = conversion_key(["text"], SETTINGS)
+    cache.put(key, "stored")
+    assert cache.read(key) == b"stored"
+
+
+def test_replacing_entry(cache):
+    """Test that storing new content for a key replaces the old entry."""
+    key = conversion_key(["text"], SETTINGS)
+    cache.put(key, "first")
+    cache.put(key, "second")
+    assert cache.read(key) == b"second"
+    assert len(list(cache.root.rglob("*.html"))) == 1
+
+
+def test_lru_eviction(tmp_path):
+    """Test that the least recently used entries go first."""
+    cache = ConversionCache(tmp_path / "cache", max_bytes=250)
+    keys = [conversion_key([str(i)], SETTINGS) for i in range(3)]
+    entries = [cache.put(key, "x" * 100) for key in keys[:2]]
+    set_atime(entries[0], 1000)
+    set_atime(entries[1], 500)
+
+    cache.put(keys[2], "x" * 100)
+    assert cache.read(keys[1]) is None
+    assert cache.read(keys[0]) is not None
+    assert cache.read(keys[2]) is not None
+    assert cache.size() == 200
+
+
+def test_oversized_entry_kept(tmp_path):
+    """Test that the newest entry survives even over the limit."""
+    cache = ConversionCache(tmp_path / "cache", max_bytes=10)
+    key = conversion_key(["big"], SETTINGS)
+    cache.put(key, "x" * 100)
+    assert cache.read(key) == b"x" * 100
+
+
+def test_failed_write_stores_nothing(cache):
+    """Test that an error while writing leaves no entry behind."""
+    key = conversion_key(["text"], SETTINGS)
+    with pytest.raises(RuntimeError):
+        with cache.writer(key) as output:
+            output.write("partial")
+            raise RuntimeError
+    assert cache.read(key) is None
+    assert [p for p in cache.root.rglob("*") if p.is_file()] == []
+
+
+def test_cached_conversion(tmp_path, monkeypatch):
+    """Test that a repeated conversion is served from the cache."""
+    import main
+
+    source = tmp_path / "note.md"
+    source.write_text("# Note\nSome *text*\n")
+    cache_dir = tmp_path / "cache"
+    output = tmp_path / "note.html"
+
+    def run(*options):
+        monkeypatch.setattr(sys, 'argv', [
+            'html_clip_maker', str(tmp_path / "note"), '-i', str(source),
+            '--cache-dir', str(cache_dir), *options])
+        main.main()
+
+    run()
+    first = output.read_text()
+    entries = list(cache_dir.rglob("*.html"))
+    assert len(entries) == 1
+    assert not os.path.samefile(output, entries[0])
+
+    run()
+    assert output.read_text() == first
+    assert os.path.samefile(output, entries[0])
+
+    run('--template', 'fast')
+    assert output.read_text() != first
+    assert len(list(cache_dir.rglob("*.html"))) == 2
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
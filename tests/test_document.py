@@ -0,0 +1,68 @@
+"""Tests for the shared document buffer."""
+
+import pytest
+
+from modules.document import Document, LineReplacement
+from modules.math_processor import MathProcessor
+
+TEXTS = ["", "a", "a\nb", "a\n", "\n\nx\n\n", "  a\nb  \n ", "\n", "é\nü\n中"]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_lines_match_split(text):
+    """Test that lines are exactly what str.split would produce."""
+    document = Document(text)
+    assert list(document) == text.split('\n')
+    assert len(document) == text.count('\n') + 1
+    assert [document.line(i) for i in range(len(document))] == text.split('\n')
+
+
+@pytest.mark.parametrize("text", TEXTS + [" " * 10000 + "x" + "\n" * 9000])
+def test_stripped_matches_strip(text):
+    """Test that the stripped document matches str.strip()."""
+    document = Document.stripped(text)
+    assert document.text is text
+    assert list(document) == text.strip().split('\n')
+
+
+def test_offsets_are_compact():
+    """Test that offsets use a 4-byte array."""
+    document = Document("a\nb\nc")
+    assert document.offsets.typecode == 'I'
+    assert list(document.offsets) == [0, 2, 4]
+
+
+def test_line_at():
+    """Test mapping text positions to line indexes."""
+    document = Document("ab\ncd\n\nef")
+    assert [document.line_at(i) for i in range(9)] == [0, 0, 0, 1, 1, 1, 2, 3, 3]
+
+
+def test_iter_lines_with_replacements():
+    """Test lazy reading from a line with replacements applied."""
+    document = Document("0\n1\n2\n3\n4")
+    replacements = [LineReplacement(0, 1, 'A'), LineReplacement(2, 4, 'B'),
+                    LineReplacement(4, 5, 'C')]
+    assert list(document.iter_lines(0, replacements)) == ['A', '1', 'B', 'C']
+    assert list(document.iter_lines(1, replacements)) == ['1', 'B', 'C']
+    assert list(document.iter_lines(5)) == []
+
+
+@pytest.mark.parametrize("text", [
+    "Intro\n$$\nx = 1\n$$\nText $y$",
+    "Intro\n  \\[\n  a \\\\\n  b\n  \\]\nafter",
+    "Unclosed\n$$\nx\ny",
+    "$$ not alone\n\\] stray end\n$$\n\\]",
+    "```\n$$\n```\n$$",
+])
+def test_math_annotations_match_processing(text):
+    """Test that math annotations give the same lines as processing."""
+    processor = MathProcessor()
+    document = Document(text)
+    replacements = processor.annotate_math_blocks(document, 1)
+    assert (list(document.iter_lines(1, replacements)) ==
+            processor.process_math_blocks(text.split('\n')[1:]))
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,36 @@
+"""Tests for HTML escaping."""
+
+import html
+import random
+import pytest
+
+from modules.escape import escape_attribute, escape_text
+
+ALPHABET = 'ab <>&"\'\n$é'
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_html_escape(seed):
+    """Test agreement with the standard library on random text."""
+    rng = random.Random(seed)
+    for _ in range(200):
+        text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 20)))
+        assert escape_text(text) == html.escape(text, quote=False)
+        assert html.unescape(escape_attribute(text)) == text
+        assert '"' not in escape_attribute(text)
+
+
+def test_fast_path_returns_input():
+    """Test that text without special characters is returned as is."""
+    text = "plain prose with $x$ and 'quotes'"
+    assert escape_text(text) is text
+
+
+def test_no_double_escaping_order():
+    """Test that entities introduced for '<' are not escaped again."""
+    assert escape_text("<&>") == "&lt;&amp;&gt;"
+    assert escape_attribute("\"'") == "&quot;&#x27;"
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,130 @@
+"""Tests for change-aware output writing and reproducible output."""
+
+import io
+import os
+import pytest
+
+from modules.fileutil import ChangeAwareFile, file_digest, write_if_changed
+from modules.html_generator import (HTMLTemplate, current_timestamp,
+                                    reproducible_timestamp)
+
+
+def stat_key(path):
+    """Identify a file version: replacing or rewriting it changes this."""
+    st = path.stat()
+    return st.st_ino, st.st_mtime_ns
+
+
+def test_write_if_changed(tmp_path):
+    """Test that identical content leaves the file untouched."""
+    path = tmp_path / "page.html"
+    assert write_if_changed(path, "<p>one</p>")
+    assert path.read_text() == "<p>one</p>"
+
+    before = stat_key(path)
+    assert not write_if_changed(path, "<p>one</p>")
+    assert stat_key(path) == before
+
+    assert write_if_changed(path, "<p>two</p>")  # Same size, new content
+    assert path.read_text() == "<p>two</p>"
+    assert not list(tmp_path.glob('.tmp-*'))
+
+
+def test_write_if_changed_permissions(tmp_path):
+    """Test that replaced files get normal permissions, not mkstemp's."""
+    path = tmp_path / "page.html"
+    write_if_changed(path, b"data")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_file_digest_missing(tmp_path):
+    """Test the digest of a missing file."""
+    assert file_digest(tmp_path / "missing") is None
+
+
+def test_change_aware_file(tmp_path):
+    """Test streamed writes replace the target only when it changed."""
+    path = tmp_path / "page.html"
+    output_file = ChangeAwareFile(path)
+    with output_file as output:
+        output.write("streamed")
+    assert output_file.changed
+    assert path.read_text() == "streamed"
+
+    before = stat_key(path)
+    output_file = ChangeAwareFile(path)
+    with output_file as output:
+        output.write("stream")
+        output.write("ed")
+    assert output_file.changed is False
+    assert stat_key(path) == before
+    assert not list(tmp_path.glob('.tmp-*'))
+
+
+def test_change_aware_file_error(tmp_path):
+    """Test that a failed write leaves the target and no temporary file."""
+    path = tmp_path / "page.html"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with ChangeAwareFile(path) as output:
+            output.write("partial")
+            raise RuntimeError("render failed")
+    assert path.read_text() == "old"
+    assert not list(tmp_path.glob('.tmp-*'))
+
+
+def test_reproducible_timestamp(monkeypatch):
+    """Test SOURCE_DATE_EPOCH handling."""
+    monkeypatch.delenv('SOURCE_DATE_EPOCH', raising=False)
+    assert reproducible_timestamp() == "1970-01-01 00:00:00"
+
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    assert reproducible_timestamp() == "2023-11-14 22:13:20"
+    assert current_timestamp() == "2023-11-14 22:13:20"
+    assert HTMLTemplate(title='', content='').timestamp == "2023-11-14 22:13:20"
+
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', 'yesterday')
+    with pytest.raises(ValueError):
+        reproducible_timestamp()
+
+
+def test_reproducible_render(tmp_path):
+    """Test that reproducible renders are identical and skip rewrites."""
+    from main import HTMLClipMaker
+
+    text = "# Title\nSome **bold** text and $x$\n\n$$\nx = 1\n$$"
+    app = HTMLClipMaker(timestamp="2000-01-01 00:00:00")
+    html = app.render(text)
+    assert html == HTMLClipMaker(timestamp="2000-01-01 00:00:00").render(text)
+    assert "2000-01-01 00:00:00" in html
+
+    output = io.StringIO()
+    app.stream(text.split('\n'), output)
+    assert output.getvalue() == html
+
+    source = tmp_path / "note.txt"
+    source.write_text(text)
+    output_path = app.render_file(source)
+    before = stat_key(output_path)
+    app.render_file(source)
+    assert stat_key(output_path) == before
+
+
+def test_reproducible_pages(tmp_path):
+    """Test that re-rendering paginated output rewrites nothing."""
+    from main import HTMLClipMaker
+    from modules.paginate import Paginator
+
+    lines = ["Book", "# One", "first", "# Two", "second"]
+    app = HTMLClipMaker(timestamp="2000-01-01 00:00:00")
+    paths = Paginator(app, workers=1).render(lines, tmp_path)
+    before = {path: stat_key(path) for path in tmp_path.iterdir()}
+
+    assert Paginator(app, workers=1).render(lines, tmp_path) == paths
+    assert {path: stat_key(path) for path in tmp_path.iterdir()} == before
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
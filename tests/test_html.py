@@ -8,7 +8,7 @@ from datetime import datetime
 from bs4 import BeautifulSoup
 import re
 
-from modules.html_generator import HTMLGenerator, HTMLTemplate
+from modules.html_generator import TEMPLATES, HTMLGenerator, HTMLTemplate
 from modules.config import VERSION, DEFAULT_FONTS
 
 
@@ -135,6 +135,67 @@ def test_content_wrapping_variants(html_generator, test_input, expected):
     assert expected in wrapped
 
 
+def test_title_escaped(html_generator):
+    """Test that the page title is escaped."""
+    html = html_generator.generate(HTMLTemplate(title="a < b & c", content=""))
+    assert '<title>a &lt; b &amp; c</title>' in html
+
+
+def test_section_indentation(html_generator):
+    """Test that content is indented to the level of the header above it."""
+    wrapped = html_generator.wrap_content(
+        "intro\n<h2>Sub</h2>\n$$ x $$\n<h4>Deep</h4>\ntext\n<h1>Top</h1>\nend")
+    classes = [div['class'][0] for div in
+               BeautifulSoup(wrapped, 'html.parser').find_all('div')]
+    assert classes == ['indent-h1', 'indent-h2', 'indent-h4', 'indent-h1']
+
+    resumed = list(html_generator.iter_wrap(['text'], level=3))
+    assert resumed == ['<div class="indent-h3 content-preserve">text</div>']
+
+
+def test_no_client_indent_pass(html_generator, template_data):
+    """Test that pages do not re-indent math after typesetting."""
+    html = html_generator.generate(template_data)
+    assert 'marginLeft' not in html
+
+
+def test_fast_template(template_data):
+    """Test that the fast variant keeps third-party resources non-blocking."""
+    html = HTMLGenerator('fast').generate(template_data)
+    soup = BeautifulSoup(html, 'html.parser')
+
+    head = soup.find('head')
+    blocking = [link for link in head.find_all('link', rel='stylesheet')
+                if link.find_parent('noscript') is None]
+    assert blocking == []
+    assert len(head.find_all('link', rel='preload')) == 2
+    assert len(head.find_all('link', rel='preconnect')) == 4
+    for script in head.find_all('script', src=True):
+        assert script.has_attr('defer') or script.has_attr('async')
+    assert 'initHighlightingOnLoad' not in html
+    # The load handler highlights instead, before MathJax may have loaded
+    handler = html[html.index('addEventListener("DOMContentLoaded"'):]
+    assert handler.index('hljs.highlightBlock') < handler.index('renderMath();')
+    assert 'content-visibility: auto' in html
+    assert 'display=swap' in html
+    assert soup.find('div', id='content')
+
+
+def test_fast_template_custom_styles(template_data):
+    """Test that custom styles land in the single inline stylesheet."""
+    generator = HTMLGenerator('fast')
+    html = generator.apply_custom_styles(
+        generator.generate(template_data), {'body': 'color: red;'})
+    assert html.count('<style>') == 1
+    assert 'color: red;' in html
+
+
+def test_unknown_template():
+    """Test error handling for an unknown template variant."""
+    with pytest.raises(ValueError):
+        HTMLGenerator('tiny')
+
+
 def test_math_rendering_setup(html_generator, template_data):
     """Test setup for math rendering in generated HTML."""
     html = html_generator.generate(template_data)
@@ -159,6 +220,42 @@ def test_code_highlighting_setup(html_generator, template_data):
     assert soup.find('link', href=re.compile(r'highlight\.js'))
 
 
+def test_large_code_block_wrapping(html_generator):
+    """Test that a chunked code block stays inside one wrapper element."""
+    from modules.markdown import MarkdownProcessor
+
+    processor = MarkdownProcessor()
+    lines = [f'line {i}' for i in range(processor.large_code_lines + 1)]
+    block = processor.process('```\n' + '\n'.join(lines) + '\n```')
+    wrapped = html_generator.wrap_content(block)
+
+    soup = BeautifulSoup(wrapped, 'html.parser')
+    assert len(soup.find_all('div', class_='content-preserve')) == 1
+    assert soup.find('div', class_='code-virtual')
+
+
+def test_large_code_block_script(html_generator, template_data):
+    """Test that pages carry the code chunk hydration script."""
+    html = html_generator.generate(template_data)
+    assert 'setupLargeCodeBlocks();' in html
+    assert '.code-virtual pre code' in html
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_load_handler_does_not_wait_for_mathjax(template, template_data):
+    """Test that code is set up before, and regardless of, async MathJax."""
+    html = HTMLGenerator(template).generate(template_data)
+    handler = html[html.index('addEventListener("DOMContentLoaded"'):]
+    highlight = handler.index('hljs.highlightBlock(block)')
+    setup = handler.index('setupLargeCodeBlocks();')
+    render = handler.index('renderMath();')
+    assert highlight < setup < render
+
+    assert 'if (!(window.MathJax && MathJax.typesetPromise)) {' in html
+    # Pages loaded before MathJax still get their math marked
+    assert '.then(() => markMath([document]))' in html
+
+
 @pytest.mark.integration
 class TestHTMLGeneratorIntegration:
     """Integration tests for HTMLGenerator."""
@@ -1,5 +1,6 @@
 """Tests for markdown processing functionality."""
 
+import re
 import unittest
 import pytest
 from textwrap import dedent
@@ -240,6 +241,52 @@ def test_error_handling(markdown_processor):
     assert "###No space" in result  # Should remain unchanged
 
 
+def test_many_math_spans_restored(markdown_processor):
+    """Test that more than ten math spans on a line are restored intact."""
+    text = ' '.join(f'${i}$' for i in range(12))
+    assert markdown_processor.process(text) == text
+
+
+def test_math_placeholder_text_untouched(markdown_processor):
+    """Test that text resembling a placeholder is left alone."""
+    text = 'MATH_BLOCK_0 and $x$'
+    assert markdown_processor.process(text) == text
+
+
+def test_link_after_unmatched_bracket(markdown_processor):
+    """Test that a stray '[' before a link does not swallow it."""
+    result = markdown_processor.process('[[Link](page.html)')
+    assert result == '[<a href="page.html">Link</a>'
+
+
+def test_large_code_block_chunks(markdown_processor):
+    """Test that very large code blocks are split into inert chunks."""
+    import html
+
+    markdown_processor.large_code_lines = 5
+    markdown_processor.code_chunk_lines = 3
+    lines = ['x < 1 & y'] + [f'line {i}' for i in range(6)]
+    result = markdown_processor.process('```bash\n' + '\n'.join(lines) + '\n```')
+
+    assert '\n' not in result
+    assert result.startswith('<div class="code-virtual" data-language="bash">')
+    assert 'Show all 7 lines' in result
+    assert ('<pre><code class="language-bash">'
+            'x &lt; 1 &amp; y&#10;line 0&#10;line 1&#10;</code></pre>') in result
+    assert result.count('<template class="code-chunk">') == 2
+
+    # The chunks reassemble into the original text
+    pieces = re.findall(r'<(?:code|template)[^>]*>(.*?)</(?:code|template)>',
+                        result)
+    assert html.unescape(''.join(pieces)) == '\n'.join(lines)
+
+
+def test_small_code_block_unchanged(markdown_processor):
+    """Test that code blocks under the threshold render as before."""
+    result = markdown_processor.process('```\nprint(1)\n```')
+    assert result == '<pre><code class="language-plaintext">print(1)</code></pre>'
+
+
 class TestMarkdownBlock:
     """Test suite for MarkdownBlock class."""
 
@@ -0,0 +1,102 @@
+"""Tests for per-stage memory accounting."""
+
+import json
+import tracemalloc
+import pytest
+
+from modules.instrumentation import NULL_MEMORY, NullMemoryProfiler
+from modules.memory import MemoryProfiler, format_bytes
+
+
+@pytest.fixture
+def profiler():
+    profiler = MemoryProfiler()
+    profiler.start()
+    yield profiler
+    profiler.stop()
+
+
+def test_stage_peak_and_retained(profiler):
+    """Test that a stage reports its transient peak and what it kept."""
+    with profiler.stage('build'):
+        transient = bytearray(4 * 1024 * 1024)
+        kept = bytearray(1024 * 1024)
+        del transient
+
+    record, = profiler.stages
+    assert record.name == 'build'
+    assert record.peak >= 5 * 1024 * 1024
+    assert 1024 * 1024 <= record.retained < 2 * 1024 * 1024
+    assert record.top[0][0].endswith('test_memory.py:' + str(
+        test_stage_peak_and_retained.__code__.co_firstlineno + 4))
+    del kept
+
+
+def test_nested_stage_peak_folds_into_parent(profiler):
+    """Test that a nested stage's peak counts towards its parent."""
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            data = bytearray(2 * 1024 * 1024)
+            del data
+
+    inner, outer = profiler.stages
+    assert inner.peak >= 2 * 1024 * 1024
+    assert outer.peak >= inner.peak
+
+
+def test_stage_without_tracing():
+    """Test that stages are no-ops when tracemalloc is not running."""
+    assert not tracemalloc.is_tracing()
+    profiler = MemoryProfiler()
+    with profiler.stage('idle'):
+        pass
+    assert profiler.stages == []
+
+
+def test_pipeline_report(profiler, tmp_path):
+    """Test the per-stage report from a full conversion."""
+    from main import HTMLClipMaker
+
+    app = HTMLClipMaker(memory=profiler)
+    content = "# Title\n" + "Some text with $x$ math.\n" * 2000
+    app.render(content)
+    profiler.stop()
+
+    assert profiler.input_bytes == len(content.encode('utf-8'))
+    names = [record.name for record in profiler.stages]
+    assert names == ['title', 'sniff', 'math', 'markdown', 'wrap', 'template']
+    assert profiler.peak > profiler.input_bytes
+
+    report = profiler.format_report()
+    assert report.startswith('Input: ')
+    for name in names:
+        assert f"\n{name} " in report
+
+    path = tmp_path / "memory.json"
+    profiler.save(path)
+    data = json.loads(path.read_text())
+    assert data['peak_to_input'] > 1
+    assert [stage['name'] for stage in data['stages']] == names
+
+
+def test_null_profiler():
+    """Test that the null profiler records nothing."""
+    assert isinstance(NULL_MEMORY, NullMemoryProfiler)
+    assert not NULL_MEMORY.enabled
+    with NULL_MEMORY.stage('anything'):
+        pass
+
+
+@pytest.mark.parametrize("size,expected", [
+    (512, '512 B'),
+    (2048, '2.0 KiB'),
+    (3 * 1024 ** 2, '3.0 MiB'),
+    (5 * 1024 ** 3, '5.0 GiB'),
+])
+def test_format_bytes(size, expected):
+    """Test byte count formatting."""
+    assert format_bytes(size) == expected
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
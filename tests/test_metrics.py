@@ -0,0 +1,120 @@
+"""Tests for the metrics registry and its exporters."""
+
+import json
+import os
+import pytest
+
+from modules.instrumentation import NULL_METRICS, NullRegistry, PipelineMetrics
+from modules.metrics import MetricsRegistry
+
+
+def test_counter_with_labels():
+    """Test counting per label set."""
+    registry = MetricsRegistry()
+    blocks = registry.counter('blocks_total', 'Blocks', ['type'])
+    blocks.inc('header')
+    blocks.inc('header')
+    blocks.inc('list', amount=3)
+
+    assert blocks.get('header') == 2
+    assert blocks.get('list') == 3
+    assert blocks.get('code') == 0
+
+
+def test_histogram_buckets():
+    """Test that observations land in cumulative buckets."""
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ['stage'],
+                                 buckets=[0.1, 1.0])
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        latency.observe(value, 'math')
+
+    lines = latency.samples()
+    assert 'latency_seconds_bucket{stage="math",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="math",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="math",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="math"} 2.65' in lines
+    assert 'latency_seconds_count{stage="math"} 4' in lines
+
+
+def test_register_returns_existing_metric():
+    """Test that registering a name twice returns the same metric."""
+    registry = MetricsRegistry()
+    first = registry.counter('docs_total', 'Documents')
+    assert registry.counter('docs_total', 'Documents') is first
+    with pytest.raises(ValueError):
+        registry.histogram('docs_total', 'Documents')
+
+
+def test_prometheus_format():
+    """Test the text exposition format, including label escaping."""
+    registry = MetricsRegistry()
+    registry.counter('docs_total', 'Documents converted').inc()
+    registry.counter('code_total', 'Code', ['language']).inc('a"b')
+
+    text = registry.to_prometheus()
+    assert text.endswith('\n')
+    assert '# HELP docs_total Documents converted\n' in text
+    assert '# TYPE docs_total counter\n' in text
+    assert 'docs_total 1\n' in text
+    assert 'code_total{language="a\\"b"} 1\n' in text
+
+
+def test_write_textfile(tmp_path):
+    """Test that the textfile is written atomically and world-readable."""
+    registry = MetricsRegistry()
+    registry.counter('docs_total', 'Documents').inc()
+    path = tmp_path / "htmlclip.prom"
+    registry.write_textfile(path)
+    registry.write_textfile(path)
+
+    assert path.read_text() == registry.to_prometheus()
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert [p.name for p in tmp_path.iterdir()] == ['htmlclip.prom']
+
+
+def test_write_json(tmp_path):
+    """Test JSON export."""
+    registry = MetricsRegistry()
+    registry.counter('docs_total', 'Documents').inc(amount=2)
+    path = tmp_path / "metrics.json"
+    registry.write_json(path)
+
+    data = json.loads(path.read_text())
+    assert data['docs_total']['type'] == 'counter'
+    assert data['docs_total']['values'] == [{'labels': {}, 'value': 2}]
+
+
+def test_null_metrics():
+    """Test that the null registry records nothing."""
+    assert not NULL_METRICS.enabled
+    assert isinstance(NULL_METRICS.registry, NullRegistry)
+    NULL_METRICS.documents.inc()
+    NULL_METRICS.stage_seconds.observe(1.0, 'math')
+
+
+def test_pipeline_metrics():
+    """Test the counters recorded by a full conversion."""
+    from main import HTMLClipMaker
+
+    metrics = PipelineMetrics()
+    app = HTMLClipMaker(metrics=metrics)
+    content = ("# Title\n## Section\nText $x$ and $y$\n$$\ny = 1\n$$\n"
+               "```python\ncode\n```")
+    html = app.render(content)
+
+    assert metrics.documents.get() == 1
+    assert metrics.bytes_in.get() == len(content.encode('utf-8'))
+    assert metrics.bytes_out.get() == len(html.encode('utf-8'))
+    assert metrics.blocks.get('header') == 1
+    assert metrics.blocks.get('code') == 1
+    assert metrics.code_blocks.get('python') == 1
+    assert metrics.math_spans.get('inline') == 2
+    assert metrics.math_spans.get('display') == 1
+
+    stages = {key[0] for key in metrics.stage_seconds.values}
+    assert {'title', 'math', 'markdown', 'wrap', 'template'} <= stages
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,116 @@
+"""Tests for paginated output."""
+
+import pytest
+
+from main import HTMLClipMaker
+from modules.paginate import (INDEX_NAME, STYLESHEET_NAME, Paginator,
+                              Section, SectionSplitter, extract_stylesheet,
+                              iter_pages)
+
+DOCUMENT = """# Notes
+Intro text
+## First $x$
+Body one
+```
+## Not a header
+```
+### Subsection
+## Second
+$$
+# still math
+$$
+# Part Two
+Body three"""
+
+
+def titles(sections):
+    return [section.title for section in sections]
+
+
+@pytest.mark.parametrize("split_at,expected", [
+    ('h1', ['', 'Part Two']),
+    ('h2', ['', 'First $x$', 'Second', 'Part Two']),
+])
+def test_split_levels(split_at, expected):
+    """Test splitting at h1 and h2, skipping code and display math."""
+    lines = DOCUMENT.split('\n')[1:]
+    sections = list(SectionSplitter(split_at).split(lines))
+    assert titles(sections) == expected
+    assert [line for section in sections for line in section.lines] == lines
+    assert [section.number for section in sections] == list(range(len(expected)))
+
+
+def test_unknown_split_level():
+    """Test error handling for an unsupported split level."""
+    with pytest.raises(ValueError):
+        SectionSplitter('h3')
+
+
+def test_iter_pages_links_neighbours():
+    """Test that pages know their previous and next sections."""
+    sections = [Section(name, number=i) for i, name in enumerate('abc', 1)]
+    pages = list(iter_pages(sections))
+    assert [(page.previous and page.previous.title,
+             page.section.title,
+             page.next and page.next.title) for page in pages] == [
+        (None, 'a', 'b'), ('a', 'b', 'c'), ('b', 'c', None)]
+
+
+def test_section_filename():
+    """Test stable, filesystem-safe section file names."""
+    assert Section('1. Basic Markdown!', number=2).filename == '002-1-basic-markdown.html'
+    assert Section('$$', number=7).filename == '007-section.html'
+
+
+def test_extract_stylesheet():
+    """Test moving the inline stylesheet to a linked file."""
+    page = "<head>\n    <style>\n        body {\n            color: red;\n        }\n    </style>\n</head>"
+    html, css = extract_stylesheet(page, 'style.css')
+    assert html == '<head>\n    <link rel="stylesheet" href="style.css">\n</head>'
+    assert css == 'body {\n    color: red;\n}\n'
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_directory(tmp_path, workers):
+    """Test the index, section pages, navigation and shared stylesheet."""
+    app = HTMLClipMaker()
+    paths = Paginator(app, 'h2', workers=workers).render(
+        DOCUMENT.split('\n'), tmp_path, {'body': 'color: red;'})
+
+    names = [path.name for path in paths]
+    assert names == [INDEX_NAME, '001-first-x.html', '002-second.html',
+                     '003-part-two.html']
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        names + [STYLESHEET_NAME])
+
+    css = (tmp_path / STYLESHEET_NAME).read_text()
+    assert 'color: red;' in css
+    assert '.pager' in css
+
+    index = (tmp_path / INDEX_NAME).read_text()
+    assert '<title>Notes</title>' in index
+    assert 'Intro text' in index
+    assert '<a href="002-second.html">Second</a>' in index
+    assert '<style>' not in index
+
+    second = (tmp_path / '002-second.html').read_text()
+    assert '<title>Second</title>' in second
+    assert '<h2>Second</h2>' in second
+    assert 'Body one' not in second
+    assert '$$ # still math $$' in second
+    assert second.count('<nav class="pager">') == 2
+    assert '<a href="001-first-x.html">First $x$</a>' in second
+    assert '<a href="003-part-two.html">Part Two</a>' in second
+    assert f'<link rel="stylesheet" href="{STYLESHEET_NAME}">' in second
+
+
+def test_render_without_sections(tmp_path):
+    """Test a document with no split headers renders only the index."""
+    paths = Paginator(HTMLClipMaker(), 'h1', workers=1).render(
+        ['Title', 'Just text'], tmp_path)
+    assert [path.name for path in paths] == [INDEX_NAME]
+    assert 'Just text' in paths[0].read_text()
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,170 @@
+"""Tests for the incremental live preview renderer."""
+
+import random
+import pytest
+
+from main import HTMLClipMaker
+from modules.preview import IncrementalRenderer, TextEdit
+
+DOCUMENT = '\n'.join([
+    "# Notes",
+    "Intro with $x$ and **bold**",
+    "",
+    "## Math",
+    "$$",
+    "a = b",
+    "$$",
+    "```python",
+    "print(1)",
+    "```",
+    "- item",
+    "End",
+])
+
+PIECES = ['# Head', '## Sub', 'text $x$ **b**', '', '  ', '$$', 'a = b',
+          '\\[', '\\]', '```', '```python', '- item', '1. one', '> quote',
+          'plain', 'tail  ', '\t']
+INSERTS = ['', '\n', 'x', '$$', '\n$$\n', '```', '\n```\n', '# ', ' ',
+           '\n\n', '- ', '\n\\[\n']
+
+
+@pytest.fixture(scope='module')
+def app():
+    return HTMLClipMaker()
+
+
+def full_render(app, text):
+    """Return (title, wrapped content) from the whole-document pipeline."""
+    title, content = app.process_content(text)
+    return title, app.html_gen.wrap_content(content)
+
+
+def apply_patches(dom, patches):
+    """Apply splice patches to a list of block ids, as the page script does."""
+    for patch in patches:
+        if patch['op'] != 'splice':
+            continue
+        position = 0 if patch['after'] is None else dom.index(patch['after']) + 1
+        for block_id in patch['remove']:
+            assert dom.pop(position) == block_id
+        for block in patch['insert']:
+            dom.insert(position, block['id'])
+            position += 1
+
+
+def test_initial_render_matches(app):
+    """Test that the block-wise render matches the full pipeline."""
+    renderer = IncrementalRenderer(app, DOCUMENT)
+    assert (renderer.title, renderer.content()) == full_render(app, DOCUMENT)
+    assert [(block.first, block.stop) for block in renderer.blocks][3:6] == [
+        (3, 6), (6, 9), (9, 10)]
+
+
+def test_edit_rerenders_one_block(app):
+    """Test that typing in a paragraph replaces only that block."""
+    renderer = IncrementalRenderer(app, DOCUMENT)
+    target = renderer.blocks[0]
+    patches = renderer.apply([TextEdit('!', (1, 5), (1, 5))])
+
+    assert patches == [{
+        'op': 'splice',
+        'after': None,
+        'remove': [target.id],
+        'insert': [renderer.blocks[0].to_dict()],
+    }]
+    assert renderer.version == 1
+    assert 'Intro! with' in patches[0]['insert'][0]['html']
+    assert patches[0]['insert'][0]['math']
+
+
+def test_opening_fence_swallows_following_blocks(app):
+    """Test that an unclosed fence re-renders everything after it."""
+    renderer = IncrementalRenderer(app, "Title\none\n```\ntwo\nthree")
+    patches = renderer.apply([TextEdit('```\n', (1, 0), (1, 0))])
+    assert (renderer.title, renderer.content()) == full_render(app, renderer.text)
+    assert len(patches[0]['remove']) == 2
+
+
+def test_header_change_reindents_section(app):
+    """Test that changing a header level re-renders its section only."""
+    renderer = IncrementalRenderer(app, DOCUMENT)
+    patches = renderer.apply([TextEdit('###', (3, 0), (3, 2))])
+    assert (renderer.title, renderer.content()) == full_render(app, renderer.text)
+    # The header and the four blocks below it, down to the end
+    assert len(patches[0]['remove']) == 5
+    assert 'indent-h3' in renderer.blocks[-1].html
+
+
+def test_title_patch(app):
+    """Test that editing the first line updates the page title."""
+    renderer = IncrementalRenderer(app, DOCUMENT)
+    patches = renderer.apply([TextEdit('Drafts', (0, 2), (0, 7))])
+    assert patches == [{'op': 'title', 'title': 'Drafts'}]
+
+
+def test_unchanged_output_sends_no_patch(app):
+    """Test that edits without visible effect keep the page as is."""
+    renderer = IncrementalRenderer(app, DOCUMENT + "\n\n")
+    assert renderer.apply([TextEdit('  ', (13, 0), (13, 0))]) == []
+
+
+def test_bad_range_applies_nothing(app):
+    """Test that an out-of-range edit leaves the document unchanged."""
+    renderer = IncrementalRenderer(app, DOCUMENT)
+    with pytest.raises(ValueError):
+        renderer.apply([TextEdit('x', (0, 0), (0, 0)),
+                        TextEdit('y', (99, 0), (99, 0))])
+    assert renderer.text == DOCUMENT
+    assert renderer.version == 0
+
+
+def test_replace_whole_document(app):
+    """Test an edit without a range."""
+    renderer = IncrementalRenderer(app, DOCUMENT)
+    renderer.apply([TextEdit("New\nbody")])
+    assert (renderer.title, renderer.content()) == full_render(app, "New\nbody")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_full_render(app, seed):
+    """Test that after any edit the blocks equal a full re-render and the
+    patches turn the old page into the new one."""
+    rng = random.Random(seed)
+    for _ in range(40):
+        text = '\n'.join(rng.choice(PIECES) for _ in range(rng.randint(0, 12)))
+        renderer = IncrementalRenderer(app, text)
+        dom = [block.id for block in renderer.blocks]
+        for _ in range(10):
+            lines = renderer.lines
+            first = rng.randrange(len(lines))
+            last = rng.randrange(first, min(len(lines), first + 3))
+            start = rng.randint(0, len(lines[first]))
+            end = rng.randint(0 if last > first else start, len(lines[last]))
+            edit = TextEdit(rng.choice(INSERTS), (first, start), (last, end))
+
+            apply_patches(dom, renderer.apply([edit]))
+            assert dom == [block.id for block in renderer.blocks]
+            assert ((renderer.title, renderer.content()) ==
+                    full_render(app, renderer.text)), repr(renderer.text)
+
+
+def test_page(app):
+    """Test the preview page carries block elements and the patch client."""
+    page = IncrementalRenderer(app, DOCUMENT).page('/preview/abc/events')
+    assert '<title>Notes</title>' in page
+    assert page.count('class="preview-block"') == 7
+    assert 'new EventSource("/preview/abc/events")' in page
+
+
+def test_edit_from_dict():
+    """Test parsing edits from JSON."""
+    edit = TextEdit.from_dict({'start': [1, 2], 'end': [1, 4], 'text': 'x'})
+    assert edit == TextEdit('x', (1, 2), (1, 4))
+    assert TextEdit.from_dict({'text': 'all'}) == TextEdit('all')
+    for bad in ({'start': [0, 0], 'text': 'x'}, {'text': 5}, {}):
+        with pytest.raises(ValueError):
+            TextEdit.from_dict(bad)
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,129 @@
+"""Scaling tests: pathological inputs must take near-linear time.
+
+Each case is timed at a small size and at ``FACTOR`` times that size. A
+linear algorithm grows by about ``FACTOR``; a quadratic one by about
+``FACTOR ** 2``. The bound sits between the two with room for timer noise.
+"""
+
+import random
+import time
+import pytest
+
+from modules.markdown import MarkdownProcessor
+from modules.math_processor import MathProcessor
+
+FACTOR = 8
+MAX_GROWTH = FACTOR * 3
+SMALL = 2000
+REPEAT = 3
+
+
+def best_time(func, arg) -> float:
+    """Return the fastest of REPEAT calls."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def assert_linear(func, make_input):
+    """Assert that func's time grows roughly linearly with input size."""
+    small = best_time(func, make_input(SMALL))
+    large = best_time(func, make_input(SMALL * FACTOR))
+    # Below timer resolution there is nothing meaningful to compare
+    small = max(small, 1e-4)
+    assert large / small < MAX_GROWTH, (
+        f"{small * 1e3:.2f}ms -> {large * 1e3:.2f}ms at {FACTOR}x input")
+
+
+# Single lines, as handed to _process_inline
+LINE_CASES = {
+    'unmatched_stars': lambda n: '*' * n,
+    'star_words': lambda n: '*a ' * n,
+    'unmatched_bold': lambda n: '**a' * n,
+    'unmatched_bold_italic': lambda n: '***a ' * n,
+    'unmatched_dollars': lambda n: '$' * n,
+    'dollar_words': lambda n: '$a ' * n,
+    'math_spans': lambda n: '$x$ ' * n,
+    'open_brackets': lambda n: '[' * n,
+    'open_links': lambda n: '[a](' * n,
+    'backticks': lambda n: '`a' * n,
+    'tildes': lambda n: '~~a' * n,
+    'url_prefixes': lambda n: 'http://' * n,
+    'long_line': lambda n: 'word ' * n,
+}
+
+# Whole documents, as lists of lines
+DOCUMENT_CASES = {
+    'indented_lists': lambda n: [' ' * (i % 200) + '- item' for i in range(n)],
+    'deep_indent': lambda n: [' ' * n + '- x'],
+    'unclosed_fence': lambda n: ['```'] + ['code'] * n,
+    'unclosed_display': lambda n: ['\\['] + ['x'] * n,
+    'padded_delimiter': lambda n: [' ' * n + '$$' + ' ' * n + 'x'],
+    'math_heavy_lines': lambda n: ['$a$ $b$ $c$ ' * 10] * (n // 10),
+    'long_line': lambda n: ['*a [b]( $c ' * n],
+}
+
+
+@pytest.fixture(scope='module')
+def markdown_processor():
+    return MarkdownProcessor()
+
+
+@pytest.fixture(scope='module')
+def math_processor():
+    return MathProcessor()
+
+
+@pytest.mark.parametrize('make_input', LINE_CASES.values(), ids=LINE_CASES)
+def test_inline_scaling(markdown_processor, make_input):
+    """Test _process_inline on pathological lines."""
+    assert_linear(markdown_processor._process_inline, make_input)
+
+
+@pytest.mark.parametrize('make_input', DOCUMENT_CASES.values(),
+                         ids=DOCUMENT_CASES)
+def test_markdown_scaling(markdown_processor, make_input):
+    """Test MarkdownProcessor.process on pathological documents."""
+    assert_linear(markdown_processor.process,
+                  lambda n: '\n'.join(make_input(n)))
+
+
+@pytest.mark.parametrize('make_input', DOCUMENT_CASES.values(),
+                         ids=DOCUMENT_CASES)
+def test_math_scaling(math_processor, make_input):
+    """Test MathProcessor.process_math_blocks on pathological documents."""
+    assert_linear(math_processor.process_math_blocks, make_input)
+
+
+FUZZ_ALPHABET = ['*', '**', '$', '$$', '\\[', '\\]', '`', '```', '~~', '[',
+                 ']', '(', ')', '](', '#', '> ', '- ', '1. ', '  ', '\n',
+                 'http://', 'x', 'word ', '<', '&']
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_fuzz(markdown_processor, math_processor, seed):
+    """Test random markup soup: no errors, bounded time, no leaked stash."""
+    rng = random.Random(seed)
+    text = ''.join(rng.choice(FUZZ_ALPHABET) for _ in range(20000))
+
+    start = time.perf_counter()
+    lines = math_processor.process_math_blocks(text.split('\n'))
+    html = markdown_processor.process('\n'.join(lines))
+    assert time.perf_counter() - start < 2.0
+    assert '\x00' not in html
+
+
+def test_math_spans_survive_markup(markdown_processor):
+    """Test that math spans among markdown syntax come back unchanged."""
+    spans = [f'$a_{i} * b^{i}$' for i in range(50)]
+    line = ' **x** [y](z) '.join(spans)
+    html = markdown_processor._process_inline(line)
+    for span in spans:
+        assert span in html
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,126 @@
+"""Tests for the client-side search index."""
+
+import json
+import shutil
+import subprocess
+import pytest
+
+from main import HTMLClipMaker
+from modules import search
+from modules.batch import convert_shard, write_search_index
+from modules.search import (SearchIndexBuilder, document_terms, search_index,
+                            term_shard)
+
+
+def terms_of(text):
+    app = HTMLClipMaker()
+    return document_terms(*app.process_content(text))
+
+
+def test_document_terms():
+    """Test term weights, and that code and math are left out."""
+    scores = terms_of("Fourier Notes\n## Transform\nThe transform of "
+                      "$secret$ is `hidden`\n```\ncodeword\n```\n$$\nmathword\n$$")
+    assert scores['fourier'] == search.TITLE_WEIGHT
+    assert scores['transform'] == search.HEADER_WEIGHT + search.BODY_WEIGHT
+    assert scores['the'] == search.BODY_WEIGHT
+    for excluded in ('secret', 'hidden', 'codeword', 'mathword'):
+        assert excluded not in scores
+
+
+def test_entities_and_markup_stripped():
+    """Test that terms are taken from text, not markup."""
+    scores = terms_of("T\nA [link](https://example.com) to *Zürich* & back")
+    assert {'link', 'zürich', 'back'} <= set(scores)
+    assert 'href' not in scores and 'amp' not in scores
+
+
+def test_term_shard():
+    """Test the term hash that search.js reproduces."""
+    assert term_shard('fourier', 97) == 95
+    assert term_shard('x\U0001d538y', 97) == 19
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    """Fixture for an index of three documents over several shards."""
+    monkeypatch.setattr(search, 'TERMS_PER_SHARD', 2)
+    builder = SearchIndexBuilder()
+    builder.add('a.html', 'A', {'fourier': 8, 'series': 1})
+    builder.add('b.html', 'B', {'fourier': 1, 'transform': 3})
+    builder.add('c.html', 'C', {'fourier': 2, 'series': 3, 'transform': 1})
+    builder.write(tmp_path / 'search')
+    return tmp_path / 'search'
+
+
+def test_search_index(index_dir):
+    """Test that every query term must match, ranked by summed score."""
+    assert search_index(index_dir, 'fourier') == [
+        ('a.html', 'A', 8), ('c.html', 'C', 2), ('b.html', 'B', 1)]
+    assert search_index(index_dir, 'Fourier SERIES') == [
+        ('a.html', 'A', 9), ('c.html', 'C', 5)]
+    assert search_index(index_dir, 'fourier missing') == []
+    assert search_index(index_dir, '') == []
+
+
+def test_index_files(index_dir):
+    """Test the sharded layout and the delta-encoded postings."""
+    index = json.loads((index_dir / 'index.json').read_text())
+    assert index['shards'] == 2
+    assert index['docs'][1] == ['b.html', 'B']
+    shard = json.loads(
+        (index_dir / f"terms-{term_shard('fourier', 2)}.json").read_text())
+    assert shard['fourier'] == [0, 8, 1, 1, 1, 2]
+    assert (index_dir / 'search.js').exists()
+
+
+def test_rewrite_removes_stale_shards(index_dir):
+    """Test that a smaller index leaves no shards of the old one behind."""
+    builder = SearchIndexBuilder()
+    builder.add('a.html', 'A', {'fourier': 1})
+    builder.write(index_dir)
+    assert sorted(path.name for path in index_dir.glob('terms-*.json')) == [
+        'terms-0.json']
+    assert builder.write(index_dir) == []
+
+
+def test_batch_search_index(tmp_path):
+    """Test building the index from a batch conversion's manifest."""
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    (notes / "one.md").write_text("Wavelets\nCompact support\n")
+    (notes / "two.md").write_text("Splines\nCompact notes\n")
+    app = HTMLClipMaker()
+
+    manifest = convert_shard(app, notes, tmp_path / "out", search=True)
+    index_dir = write_search_index(manifest.entries, tmp_path / "out")
+    assert search_index(index_dir, 'compact') == [
+        ('one.html', 'Wavelets', 1), ('two.html', 'Splines', 1)]
+
+    manifest = convert_shard(app, notes, tmp_path / "out")
+    with pytest.raises(ValueError):
+        write_search_index(manifest.entries, tmp_path / "out")
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="needs node")
+def test_search_script(index_dir):
+    """Test that search.js finds what search_index finds."""
+    script = """
+    const fs = require('fs');
+    global.document = {baseURI: process.argv[1]};
+    global.fetch = async url => ({
+      ok: true, json: async () => JSON.parse(fs.readFileSync(url, 'utf8'))});
+    require(process.argv[2]);
+    createSearch('search/')('Fourier series')
+      .then(results => console.log(JSON.stringify(results)));
+    """
+    site = index_dir.parent.as_uri() + '/'
+    output = subprocess.run(
+        ['node', '-e', script, site, str(index_dir / 'search.js')],
+        capture_output=True, text=True, check=True).stdout
+    assert [(r['url'], r['title'], r['score']) for r in json.loads(output)] == [
+        (site + 'a.html', 'A', 9), (site + 'c.html', 'C', 5)]
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,178 @@
+"""Tests for the local render service."""
+
+import asyncio
+import json
+import pytest
+
+from modules.server import RenderServer
+
+
+class FakeApp:
+    """Minimal stand-in for HTMLClipMaker."""
+
+    def render(self, content, custom_styles=None):
+        return f"<html><body>{content.upper()}</body></html>"
+
+
+async def request(port, method, target, body=b''):
+    """Send one HTTP request and return (status, body)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), payload.decode('utf-8')
+
+
+def run_with_server(coroutine, app_factory=FakeApp, **kwargs):
+    """Run coroutine(server, port) against a started server."""
+    async def runner():
+        server = RenderServer(app_factory, **kwargs)
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return await coroutine(server, port)
+        finally:
+            await server.close()
+    return asyncio.run(runner())
+
+
+def test_render_post():
+    """Test rendering POSTed content."""
+    async def check(server, port):
+        return await request(port, 'POST', '/render', b'hello')
+
+    status, body = run_with_server(check)
+    assert status == 200
+    assert body == "<html><body>HELLO</body></html>"
+
+
+def test_concurrent_renders():
+    """Test that concurrent requests are all served."""
+    async def check(server, port):
+        return await asyncio.gather(*[
+            request(port, 'POST', '/render', f'doc {i}'.encode())
+            for i in range(10)
+        ])
+
+    results = run_with_server(check, workers=4)
+    assert [body for _, body in results] == [
+        f"<html><body>DOC {i}</body></html>" for i in range(10)]
+
+
+@pytest.mark.parametrize("method,target,expected", [
+    ('GET', '/render', 405),
+    ('GET', '/missing', 404),
+    ('GET', '/view/note.txt', 404),  # No watch directory configured
+])
+def test_error_statuses(method, target, expected):
+    """Test error status codes."""
+    async def check(server, port):
+        return await request(port, method, target)
+
+    status, _ = run_with_server(check)
+    assert status == expected
+
+
+def test_view_and_live_reload(tmp_path):
+    """Test serving watched sources and pushing change events."""
+    note = tmp_path / "note.txt"
+    note.write_text("first")
+
+    async def check(server, port):
+        status, body = await request(port, 'GET', '/view/note.txt')
+        assert status == 200
+        assert "FIRST" in body
+        assert 'EventSource("/events")' in body
+
+        traversal, _ = await request(port, 'GET', '/view/../secret.txt')
+        assert traversal == 404
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b"GET /events HTTP/1.1\r\n\r\n")
+        await writer.drain()
+        await reader.readuntil(b": connected\n\n")
+
+        note.write_text("second version")
+        event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 5)
+        writer.close()
+        return event.decode('utf-8')
+
+    event = run_with_server(check, watch_dir=tmp_path)
+    assert event.startswith("event: change\n")
+    assert json.loads(event.split("data: ", 1)[1]) == {'path': 'note.txt'}
+
+
+def test_metrics_endpoints():
+    """Test Prometheus and JSON metrics endpoints."""
+    from modules.instrumentation import PipelineMetrics
+
+    metrics = PipelineMetrics()
+    metrics.documents.inc()
+
+    async def check(server, port):
+        return (await request(port, 'GET', '/metrics'),
+                await request(port, 'GET', '/metrics.json'))
+
+    (status, text), (json_status, body) = run_with_server(
+        check, metrics=metrics)
+    assert status == json_status == 200
+    assert 'htmlclip_documents_total 1\n' in text
+    assert json.loads(body)['htmlclip_documents_total']['values'][0]['value'] == 1
+
+
+def test_incremental_preview():
+    """Test the edit/patch protocol and patch events pushed to the page."""
+    from main import HTMLClipMaker
+
+    async def check(server, port):
+        status, body = await request(port, 'POST', '/preview',
+                                     b"# Notes\nfirst\nsecond")
+        assert status == 200
+        opened = json.loads(body)
+        url = opened['url']
+
+        status, page = await request(port, 'GET', url)
+        assert status == 200
+        assert 'class="preview-block"' in page
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"GET {url}/events HTTP/1.1\r\n\r\n".encode())
+        await writer.drain()
+        await reader.readuntil(b": connected\n\n")
+
+        edit = {'version': 0, 'edits': [
+            {'start': [2, 0], 'end': [2, 6], 'text': '**2nd**'}]}
+        status, body = await request(port, 'POST', f'{url}/edits',
+                                     json.dumps(edit).encode())
+        event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 5)
+        writer.close()
+
+        stale, _ = await request(port, 'POST', f'{url}/edits',
+                                 json.dumps(edit).encode())
+        bad, _ = await request(port, 'POST', f'{url}/edits', b'{"version": 1}')
+        missing, _ = await request(port, 'GET', '/preview/nope')
+        return status, json.loads(body), event.decode('utf-8'), stale, bad, missing
+
+    status, reply, event, stale, bad, missing = run_with_server(
+        check, app_factory=HTMLClipMaker)
+    assert status == 200
+    assert reply['version'] == 1
+    [patch] = reply['patches']
+    assert patch['op'] == 'splice' and len(patch['remove']) == 1
+    assert '<strong>2nd</strong>' in patch['insert'][0]['html']
+    assert event.startswith("event: patch\n")
+    assert json.loads(event.split("data: ", 1)[1]) == reply
+    assert (stale, bad, missing) == (409, 400, 404)
+
+
+def test_unknown_executor():
+    """Test error handling for an unknown executor type."""
+    with pytest.raises(ValueError):
+        RenderServer(FakeApp, executor='fiber')
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
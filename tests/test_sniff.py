@@ -0,0 +1,99 @@
+"""Tests for content sniffing and the fast paths it enables."""
+
+import pytest
+
+from main import HTMLClipMaker
+from modules import sniff as sniff_module
+from modules.sniff import ContentProfile, sniff
+
+PLAIN_DOCUMENTS = [
+    "Title\nJust some prose.\n\nAnother paragraph - with a dash.",
+    "Title\nPrices rose 3.5% in 2024. Email me at a.b@example.com.",
+    "Title\n  indented prose\n\ttabbed prose",
+    "Only a title",
+    "Title\nMath-free $5 and $6 amounts",
+]
+
+MARKUP_DOCUMENTS = [
+    "Title\n- item",
+    "Title\n   1. nested item",
+    "Title\n# Header",
+    "Title\n> quote",
+    "Title\n```\ncode\n```",
+    "Title\nsome *emphasis*",
+    "Title\nsee https://example.com",
+    "Title\n[link](page.html)",
+    "Title\n~~gone~~",
+    "- list item as the first line\nmore",
+    "Title\n$$\nx^2\n$$",
+    "Title\n\\[\nx\n\\]",
+    "Title\nif a < b",
+    "Title\nsalt & pepper",
+]
+
+
+@pytest.mark.parametrize("text", PLAIN_DOCUMENTS)
+def test_plain_documents(text):
+    """Test that prose without markup is detected as plain."""
+    profile = sniff(text)
+    assert profile.plain
+    assert not profile.display_math
+
+
+@pytest.mark.parametrize("text", MARKUP_DOCUMENTS)
+def test_markup_documents(text):
+    """Test that any markdown or math syntax disables the plain path."""
+    assert not sniff(text).plain
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("a $x$ b", False),
+    ("$$\nx\n$$", True),
+    ("\\[ x \\]", True),
+])
+def test_display_math_detection(text, expected):
+    """Test detection of display math delimiters."""
+    assert sniff(text).display_math is expected
+
+
+class Everything:
+    """Container that holds every character."""
+
+    def __contains__(self, item):
+        return True
+
+
+def corpus_documents():
+    from benchmarks.corpus import KINDS, generate
+
+    return [generate(kind, 4096, seed=3) for kind in KINDS]
+
+
+@pytest.mark.parametrize("text", PLAIN_DOCUMENTS + MARKUP_DOCUMENTS +
+                         corpus_documents())
+def test_fast_paths_match_full_pipeline(monkeypatch, text):
+    """Test that skipping stages never changes the output."""
+    app = HTMLClipMaker()
+    fast = app.process_content(text)
+
+    monkeypatch.setattr(sniff_module, 'sniff',
+                        lambda text: ContentProfile(display_math=True,
+                                                    markup=True))
+    # Also bypass the per-line fast paths inside the processors
+    app.markdown.block_start_chars = Everything()
+    app.markdown.inline_markup_pattern = sniff_module.re.compile('')
+    assert app.process_content(text) == fast
+
+
+def test_fast_path_metrics():
+    """Test that skipped stages still record block and math counters."""
+    from modules.instrumentation import PipelineMetrics
+
+    metrics = PipelineMetrics()
+    HTMLClipMaker(metrics=metrics).render("Title\nCosts $5 or $x$ here\n\nEnd")
+    assert metrics.blocks.get('paragraph') == 3
+    assert metrics.math_spans.get('inline') == 1
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,110 @@
+"""Tests for the cold-start budget of the command line tool."""
+
+import subprocess
+import sys
+import pytest
+from pathlib import Path
+from typing import Dict, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budgets in microseconds, as reported by
+# ``python -X importtime`` (best of several runs). Currently about 25 ms
+# and 35 ms; the slack absorbs some CI noise, while an eagerly imported
+# dependency such as tempfile (~7 ms) or dataclasses (~8 ms) shows up.
+MAIN_IMPORT_BUDGET_US = 40_000
+ONE_LINE_CLIP_BUDGET_US = 50_000
+
+# Modules that a plain `import main` must not pull in
+DEFERRED_MODULES = [
+    'argparse',
+    'asyncio',
+    'ctypes',
+    'dataclasses',
+    'datetime',
+    'json',
+    'modules.batch',
+    'modules.cache',
+    'modules.targets',
+    'modules.clipboard',
+    'modules.html_generator',
+    'modules.markdown',
+    'modules.math_processor',
+    'modules.search',
+    'modules.server',
+    'modules.watcher',
+    'tempfile',
+]
+
+ONE_LINE_CLIP = "import main; main.HTMLClipMaker().render('# Title\\nOne line')"
+
+
+def import_times(code: str) -> Dict[str, Tuple[int, int]]:
+    """Return ``{module: (cumulative_us, depth)}`` for imports made by code."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level imports have a single space of indentation
+        depth = len(name) - len(name.lstrip(' '))
+        times[name.strip()] = (int(cumulative), depth)
+    return times
+
+
+def user_import_time(code: str, runs: int = 5) -> int:
+    """Best-of-N cumulative import time of code, excluding interpreter startup."""
+    startup = import_times('pass')
+    best = None
+    for _ in range(runs):
+        total = sum(cumulative
+                    for name, (cumulative, depth) in import_times(code).items()
+                    if depth == 1 and name not in startup)
+        best = total if best is None else min(best, total)
+    return best
+
+
+def imported_modules(code: str) -> set:
+    """Return the names of all modules imported while running code."""
+    return set(import_times(code))
+
+
+@pytest.mark.parametrize("module", DEFERRED_MODULES)
+def test_import_main_defers(module):
+    """Test that rarely needed modules are not imported up front."""
+    assert module not in imported_modules('import main')
+
+
+def test_import_main_budget():
+    """Test the import time budget for the main module."""
+    assert user_import_time('import main') < MAIN_IMPORT_BUDGET_US
+
+
+def test_one_line_clip_budget():
+    """Test the import time budget for converting a one-line clip."""
+    assert user_import_time(ONE_LINE_CLIP) < ONE_LINE_CLIP_BUDGET_US
+
+
+def test_one_line_clip_skips_optional_paths():
+    """Test that converting a clip does not import command-specific modules."""
+    imported = imported_modules(ONE_LINE_CLIP)
+    for module in ['asyncio', 'ctypes', 'modules.server', 'modules.watcher']:
+        assert module not in imported
+
+
+def test_processors_built_lazily():
+    """Test that reading the clipboard does not construct the processors."""
+    code = ("import main, sys; app = main.HTMLClipMaker(); app.clipboard; "
+            "print('modules.markdown' in sys.modules, "
+            "'modules.html_generator' in sys.modules)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ['False', 'False']
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
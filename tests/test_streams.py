@@ -0,0 +1,74 @@
+"""Tests for bounded-memory input and streaming output."""
+
+import io
+import pytest
+
+from modules.document import normalize_newlines
+from modules.streams import (iter_file_lines, iter_stream_lines,
+                             strip_lines)
+
+DOCUMENTS = [
+    "",
+    "\n",
+    "single line",
+    "title\nbody\n",
+    "\n\n  # Title  \n\nbody\n\n  \n",
+    "title\n\n\nafter blanks\nlast   ",
+    "unicode: é ∑ 😀\r\nwindows line\r\n",
+    "old mac\rline\r\rend\r",
+    "mixed\r\r\nbreaks\n\r\nlast\r",
+    "   \n\t\n",
+]
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_file_lines_match_split(tmp_path, text):
+    """Test that mmap iteration yields the same lines as split()."""
+    path = tmp_path / "input.txt"
+    path.write_bytes(text.encode('utf-8'))
+    assert list(iter_file_lines(path)) == normalize_newlines(text).split('\n')
+
+
+@pytest.mark.parametrize("newline", [None, '', '\n'])
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_stream_lines_match_split(text, newline):
+    """Test that stream iteration yields the same lines as split(),
+    whether or not the stream translates line breaks."""
+    stream = io.TextIOWrapper(io.BytesIO(text.encode('utf-8')),
+                              encoding='utf-8', newline=newline)
+    assert list(iter_stream_lines(stream)) == normalize_newlines(text).split('\n')
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_strip_lines_matches_strip(text):
+    """Test that lazy stripping matches str.strip()."""
+    assert list(strip_lines(text.split('\n'))) == text.strip().split('\n')
+
+
+@pytest.mark.parametrize("text", DOCUMENTS + [
+    "# Title\n**bold** and $x$\n\n$$\nx = 1\n$$\n```python\ncode\n```\n- item",
+    "# Title\nbefore\n```python\nunclosed = True",
+    "# Title\n```",
+    "# Title\r\n\r\n- one\r\n- two\r\n\r\n```\r\ncode\r\n```\r\n",
+])
+def test_stream_matches_render(tmp_path, text):
+    """Test that streaming a file produces the same document as render."""
+    from main import HTMLClipMaker
+
+    path = tmp_path / "input.md"
+    path.write_bytes(text.encode('utf-8'))
+    app = HTMLClipMaker()
+    output = io.StringIO()
+    app.stream(iter_file_lines(path), output, {'body': 'color: red;'})
+
+    expected = app.render(text, {'body': 'color: red;'})
+    assert without_stamps(output.getvalue()) == without_stamps(expected)
+
+
+def without_stamps(html):
+    """Drop the lines carrying the generation timestamp."""
+    return [line for line in html.split('\n') if 'Generated by' not in line]
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,112 @@
+"""Tests for producing several output targets from one conversion."""
+
+import json
+import sys
+import pytest
+
+from main import HTMLClipMaker
+from modules.targets import check_targets, headings
+
+DOCUMENT = "Notes\n# Intro\nSome *text* & more\n## Details <b>\n$x < y$"
+STAMP = "2024-01-01 00:00:00"
+
+
+@pytest.fixture
+def app():
+    """Fixture for an HTMLClipMaker producing every target."""
+    return HTMLClipMaker(timestamp=STAMP, targets=('page', 'fragment', 'json'))
+
+
+def test_targets_match_single_outputs(app):
+    """Test that each target equals the output of its own conversion."""
+    outputs = app.render_targets(DOCUMENT)
+    assert list(outputs) == ['page', 'fragment', 'json']
+    assert outputs['page'] == HTMLClipMaker(timestamp=STAMP).render(DOCUMENT)
+
+    title, content = app.process_content(DOCUMENT)
+    assert outputs['fragment'] == app.html_gen.wrap_content(content) + '\n'
+
+
+def test_json_summary(app):
+    """Test the title, outline and word count of the JSON target."""
+    summary = json.loads(app.render_targets(DOCUMENT)['json'])
+    assert summary['title'] == "Notes"
+    assert summary['timestamp'] == STAMP
+    assert summary['headings'] == [{'level': 1, 'text': "Intro"},
+                                   {'level': 2, 'text': "Details <b>"}]
+    assert summary['words'] == 13
+    assert '&lt;' in summary['html']
+
+
+def test_content_processed_once(app, monkeypatch):
+    """Test that the math and markdown passes run once for all targets."""
+    calls = []
+    process_content = app.process_content
+
+    def counting(content):
+        calls.append(content)
+        return process_content(content)
+
+    monkeypatch.setattr(app, 'process_content', counting)
+    app.render_targets(DOCUMENT)
+    assert len(calls) == 1
+
+
+def test_headings():
+    """Test that markup inside headings is reduced to text."""
+    assert headings('<h3>A <em>b</em> &amp; c</h3>\n<div>x</div>') == [
+        {'level': 3, 'text': "A b & c"}]
+
+
+def test_check_targets():
+    """Test error handling for empty, unknown and repeated targets."""
+    check_targets(('page', 'json'))
+    with pytest.raises(ValueError):
+        check_targets(())
+    with pytest.raises(ValueError):
+        check_targets(('page', 'pdf'))
+    with pytest.raises(ValueError):
+        check_targets(('json', 'json'))
+    with pytest.raises(ValueError):
+        HTMLClipMaker(targets=('epub',)).render_targets(DOCUMENT)
+    with pytest.raises(ValueError):
+        HTMLClipMaker(targets=()).render_targets(DOCUMENT)
+
+
+def test_save_targets(app, tmp_path):
+    """Test that every target is written next to the base path."""
+    written = app.save_targets(app.render_targets(DOCUMENT), tmp_path / "notes")
+    assert sorted(path.name for path in written) == [
+        'notes.fragment.html', 'notes.html', 'notes.json']
+    assert all(written.values())
+    assert (tmp_path / "notes.html").read_text().startswith('<!DOCTYPE html>')
+
+
+def test_targets_option(tmp_path, monkeypatch):
+    """Test writing several targets from the command line."""
+    import main
+
+    source = tmp_path / "note.md"
+    source.write_text(DOCUMENT)
+    monkeypatch.setattr(sys, 'argv', [
+        'html_clip_maker', str(tmp_path / "note"), '-i', str(source),
+        '--targets', 'json,fragment'])
+    main.main()
+    assert json.loads((tmp_path / "note.json").read_text())['title'] == "Notes"
+    assert (tmp_path / "note.fragment.html").exists()
+    assert not (tmp_path / "note.html").exists()
+
+
+def test_empty_targets_option(tmp_path, monkeypatch):
+    """Test that an empty --targets value is a usage error."""
+    import main
+
+    monkeypatch.setattr(sys, 'argv', [
+        'html_clip_maker', str(tmp_path / "note"), '--targets', ' , '])
+    with pytest.raises(SystemExit) as excinfo:
+        main.main()
+    assert excinfo.value.code == 2
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
@@ -0,0 +1,85 @@
+"""Tests for timing spans and trace export."""
+
+import json
+import pytest
+
+from modules.tracing import NULL_TRACER, NullTracer, Tracer
+
+
+def test_span_records_complete_event():
+    """Test that a span records a Chrome 'X' event."""
+    tracer = Tracer()
+    with tracer.span('math', lines=3):
+        pass
+
+    event, = tracer.events
+    assert event['name'] == 'math'
+    assert event['cat'] == 'stage'
+    assert event['ph'] == 'X'
+    assert event['ts'] >= 0
+    assert event['dur'] >= 0
+    assert event['args'] == {'lines': 3}
+
+
+def test_nested_spans_are_contained():
+    """Test that nested spans lie within their parent."""
+    tracer = Tracer()
+    with tracer.span('outer'):
+        with tracer.span('inner', 'markdown'):
+            sum(range(1000))
+
+    inner, outer = tracer.events
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+
+def test_span_records_on_exception():
+    """Test that a span is recorded even when the body raises."""
+    tracer = Tracer()
+    with pytest.raises(RuntimeError):
+        with tracer.span('save'):
+            raise RuntimeError("disk full")
+    assert [event['name'] for event in tracer.events] == ['save']
+
+
+def test_save_writes_trace_json(tmp_path):
+    """Test writing the trace-event JSON file."""
+    tracer = Tracer()
+    with tracer.span('wrap'):
+        pass
+    path = tmp_path / "trace.json"
+    tracer.save(path)
+
+    data = json.loads(path.read_text())
+    assert data['traceEvents'][0]['name'] == 'wrap'
+
+
+def test_null_tracer():
+    """Test that the null tracer records nothing."""
+    assert isinstance(NULL_TRACER, NullTracer)
+    assert not NULL_TRACER.enabled
+    with NULL_TRACER.span('anything', extra=1) as span:
+        assert span is not None
+
+
+def test_pipeline_spans():
+    """Test stage and block spans from a full conversion."""
+    from main import HTMLClipMaker
+
+    tracer = Tracer()
+    app = HTMLClipMaker(tracer=tracer)
+    app.render("# Title\n## Section\nText $x$\n$$\ny = 1\n$$\n```\ncode\n```",
+               {'body': 'color: red;'})
+
+    names = {(event['cat'], event['name']) for event in tracer.events}
+    for stage in ['title', 'math', 'markdown', 'wrap', 'template',
+                  'custom_styles']:
+        assert ('stage', stage) in names
+    # Inline math needs no processing, so only display blocks get spans
+    for block in [('markdown', 'header'), ('markdown', 'paragraph'),
+                  ('markdown', 'code'), ('math', 'display')]:
+        assert block in names
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])
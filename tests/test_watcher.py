@@ -0,0 +1,108 @@
+"""Tests for filesystem watching functionality."""
+
+import os
+import shutil
+import time
+import pytest
+
+from modules.watcher import FileWatcher, InotifyBackend
+
+BACKENDS = [
+    'poll',
+    pytest.param('inotify', marks=pytest.mark.skipif(
+        not InotifyBackend.is_available(), reason="inotify not available")),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def watcher(request, tmp_path):
+    """Fixture for a FileWatcher on an empty directory."""
+    watcher = FileWatcher(tmp_path, debounce=0.05, backend=request.param,
+                          poll_interval=0.01)
+    yield watcher
+    watcher.close()
+
+
+def test_detects_created_file(watcher, tmp_path):
+    """Test that new source files are reported."""
+    note = tmp_path / "note.txt"
+    note.write_text("# Title\nBody")
+    assert watcher.poll(timeout=2) == {note}
+
+
+def test_detects_modified_file(tmp_path):
+    """Test that modified source files are reported."""
+    note = tmp_path / "note.md"
+    note.write_text("first")
+    with FileWatcher(tmp_path, backend='poll', poll_interval=0.01) as watcher:
+        note.write_text("second, longer")
+        assert watcher.poll(timeout=2) == {note}
+
+
+def test_ignores_other_suffixes(watcher, tmp_path):
+    """Test that generated HTML does not trigger a rebuild."""
+    (tmp_path / "note.html").write_text("<html></html>")
+    assert watcher.poll(timeout=0.2) == set()
+
+
+def test_debounces_bursts(watcher, tmp_path):
+    """Test that a burst of saves is reported as one batch."""
+    notes = [tmp_path / f"note{i}.txt" for i in range(5)]
+    for note in notes:
+        note.write_text("content")
+        time.sleep(0.005)
+    assert watcher.poll(timeout=2) == set(notes)
+    assert watcher.poll(timeout=0.2) == set()
+
+
+def test_detects_files_in_new_subdirectory(watcher, tmp_path):
+    """Test that files in newly created subdirectories are reported."""
+    subdir = tmp_path / "sub"
+    subdir.mkdir()
+    note = subdir / "note.txt"
+    note.write_text("content")
+    changed = watcher.poll(timeout=2)
+    if note not in changed:
+        changed |= watcher.poll(timeout=2)
+    assert note in changed
+
+
+@pytest.mark.skipif(not InotifyBackend.is_available(),
+                    reason="inotify not available")
+def test_skips_directory_removed_before_watch(tmp_path, monkeypatch):
+    """Test that a directory gone before it is watched does not end the loop."""
+    backend = InotifyBackend(tmp_path)
+    try:
+        walk = os.walk
+
+        def walk_then_remove(top):
+            entries = list(walk(top))
+            shutil.rmtree(top)
+            return iter(entries)
+
+        subdir = tmp_path / "sub"
+        subdir.mkdir()
+        monkeypatch.setattr(os, 'walk', walk_then_remove)
+        assert backend.read(timeout=2) == set()
+        assert subdir not in backend._dirs.values()
+    finally:
+        backend.close()
+
+
+def test_sources(tmp_path):
+    """Test listing of existing sources."""
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.html").write_text("b")
+    (tmp_path / ".hidden.txt").write_text("c")
+    watcher = FileWatcher(tmp_path, backend='poll')
+    assert list(watcher.sources()) == [tmp_path / "a.txt"]
+
+
+def test_unknown_backend(tmp_path):
+    """Test error handling for an unknown backend."""
+    with pytest.raises(ValueError):
+        FileWatcher(tmp_path, backend='kqueue')
+
+
+if __name__ == '__main__':
+    pytest.main(['-v'])